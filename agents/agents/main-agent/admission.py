@@ -0,0 +1,144 @@
+"""
+Admission control for the main agent.
+
+A request that reaches the expensive path (smart search, MeTTa, LLM) first
+takes a token from its sender's bucket, then waits for one of max_concurrent
+slots in a bounded queue with priority lanes. When the sender is out of tokens
+or the queue is full the request is rejected right away, so the agent can
+answer "busy" instead of slowing every admitted request down.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, List, Set
+
+# Lanes, served in this order
+PRIORITY = 0
+NORMAL = 1
+
+MAX_TRACKED_SENDERS = 10000
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason  # "rate_limited" or "queue_full"
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.burst
+
+class AdmissionController:
+    """
+    Global concurrency cap + bounded priority queue + per-sender token buckets
+
+    Args:
+        max_concurrent: Requests processed at once
+        max_queue: Requests allowed to wait for a slot (all lanes together)
+        sender_rate: Sustained requests per second allowed per sender
+        sender_burst: Requests a sender may send back to back
+        priority_senders: Addresses served from the priority lane
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, sender_rate: float, sender_burst: float, priority_senders: Set[str] = frozenset()):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.sender_rate = sender_rate
+        self.sender_burst = sender_burst
+        self.priority_senders = priority_senders
+        self._active = 0
+        self._lanes: List[deque] = [deque(), deque()]
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._admitted = 0
+        self._rejected = {"rate_limited": 0, "queue_full": 0}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+
+    def _bucket(self, sender: str) -> TokenBucket:
+        bucket = self._buckets.get(sender)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_SENDERS:
+                # Full buckets carry no state worth keeping
+                self._buckets = {s: b for s, b in self._buckets.items() if not b.is_full()}
+            bucket = self._buckets[sender] = TokenBucket(self.sender_rate, self.sender_burst)
+        return bucket
+
+    def _reject(self, reason: str):
+        self._rejected[reason] += 1
+        raise AdmissionRejected(reason)
+
+    async def acquire(self, sender: str):
+        """
+        Waits for a processing slot
+
+        Raises:
+            AdmissionRejected: If the sender is rate limited or the queue is full
+        """
+        if not self._bucket(sender).take():
+            self._reject("rate_limited")
+
+        if self._active < self.max_concurrent and self.queued == 0:
+            self._active += 1
+            self._admitted += 1
+            return
+
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+
+        lane = self._lanes[PRIORITY if sender in self.priority_senders else NORMAL]
+        waiter = asyncio.get_running_loop().create_future()
+        lane.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in lane:
+                lane.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                self.release()  # The slot was handed over just before cancellation
+            raise
+        self._admitted += 1
+
+    def release(self):
+        """Frees a slot, handing it to the oldest waiter of the highest lane"""
+        for lane in self._lanes:
+            while lane:
+                waiter = lane.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)  # The slot passes on; _active is unchanged
+                    return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "queued": [len(lane) for lane in self._lanes],
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+        }
@@ -1,11 +1,15 @@
+import time
+_import_start = time.perf_counter()  # Module import time is logged at the end of the module
 import os
 import json
+import asyncio
+import hashlib
+from collections import OrderedDict, deque
 from uagents import Agent, Context, Protocol, Model
 from datetime import datetime, timezone
 from uagents.setup import fund_agent_if_low
-from openai import OpenAI
-import requests
-from typing import Any, Dict, List
+import requests  # Already loaded by uagents; the openai SDK is imported lazily (build_asi1_client)
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
@@ -14,6 +18,18 @@ from uagents_core.contrib.protocols.chat import (
     TextContent,
     chat_protocol_spec,
 )
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+from breakers import OPEN, CircuitBreaker, CircuitOpenError
+from capture import TrafficCapture
+from chunk_index import ChunkIndex
+from compression import compress_chunks
+from faq_store import FaqStore, docs_version
+from history_store import SQLiteHistoryStore, StorageHistoryStore
+from retrieval_memory import AUGMENT, REUSE, RetrievalMemory
+from workers import WorkerPool, worker_name
+from rerank import rerank_chunks
+from tracing import Tracer
+from warmup import Lazy, log_import_time, open_api_connection, start_warm_up
 
 # Define message models
 class QueryMessage(Model):
@@ -22,6 +38,36 @@ class QueryMessage(Model):
 class ResponseMessage(Model):
     response: str
 
+# Reasoning wire protocol (must match the models in metta-agent/metta-agent.py)
+class ChunkRef(Model):
+    chunk_id: str
+    content_hash: str
+    content: Optional[str] = None  # Omitted when the MeTTa agent should already have this chunk
+    source: str = ""  # Sponsor/project the chunk belongs to (knowledge graph subject)
+
+class ReasoningRequest(Model):
+    session_id: str
+    query: str
+    chunks: List[ChunkRef]
+    traceparent: str = ""
+
+class ChunkBodiesRequest(Model):
+    session_id: str
+    missing_hashes: List[str]
+
+class ReasoningResponse(Model):
+    session_id: str
+    reasoning: str = ""
+    error: str = ""
+
+class AgentMetrics(Model):
+    breakers: Dict[str, Dict[str, Any]]
+    admission: Dict[str, Any]
+    workers: Optional[Dict[str, Any]] = None
+    retrieval: Optional[Dict[str, Any]] = None
+    chunk_index: Optional[Dict[str, Any]] = None
+    faq: Optional[Dict[str, Any]] = None
+
 AGENT_NAME = "EtHGlobalHackerAgent"
 AGENT_SEED = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
 
@@ -33,62 +79,328 @@ DOCS_SEARCH_URL = f"{NEXT_API_BASE}/docs/smart-search"  # Smart search with ASI1
 METTA_AGENT_ADDRESS = os.getenv("METTA_AGENT_ADDRESS", "")
 USE_METTA_REASONING = METTA_AGENT_ADDRESS and METTA_AGENT_ADDRESS != ""
 
+# Chunk hashes remembered as already sent to the MeTTa agent (keep below its METTA_CHUNK_CACHE_SIZE)
+METTA_KNOWN_CHUNKS = int(os.getenv("METTA_KNOWN_CHUNKS", "1024"))
+
 # Conversation history settings
-MAX_HISTORY_MESSAGES = 20  # Keep last 20 messages (10 user + 10 assistant)
+MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "20"))  # Keep last 20 messages (10 user + 10 assistant)
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "sqlite").lower()  # "sqlite" (append-only, local disk) or "storage" (uAgents storage)
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "conversation_history.db"))
+HISTORY_TTL_HOURS = float(os.getenv("HISTORY_TTL_HOURS", "72"))  # Drop the history of senders idle for longer than this
+HISTORY_SWEEP_INTERVAL = int(os.getenv("HISTORY_SWEEP_INTERVAL", "3600"))  # Seconds between idle-sender sweeps
+
+# Admission control (per process): requests past the no-docs check wait for one of MAX_CONCURRENT_REQUESTS slots
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "4"))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "16"))  # Beyond this, senders get an immediate "busy" reply
+SENDER_RATE_PER_MINUTE = float(os.getenv("SENDER_RATE_PER_MINUTE", "6"))  # Sustained queries per sender
+SENDER_BURST = float(os.getenv("SENDER_BURST", "3"))  # Queries a sender may send back to back
+PRIORITY_SENDERS = {a.strip() for a in os.getenv("PRIORITY_SENDERS", "").split(",") if a.strip()}  # Served first when queued
+
+# Circuit breakers: a dependency whose recent calls mostly failed (or were slower than its threshold) is skipped until a background probe succeeds
+ASI1_TIMEOUT = float(os.getenv("ASI1_TIMEOUT", "60"))  # Seconds per LLM call
+BREAKER_PROBE_INTERVAL = float(os.getenv("BREAKER_PROBE_INTERVAL", "10"))  # Seconds between probes of open breakers
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "15"))  # Seconds before smart search gives way to the local index
+LOCAL_FALLBACK_DEADLINE = float(os.getenv("LOCAL_FALLBACK_DEADLINE", "3"))  # Seconds before a query the local index covers is answered from it (0 = wait up to SEARCH_TIMEOUT)
+
+# Local BM25 index of served chunks: answers while smart search is down (and, optionally, well-covered questions)
+SERVED_CHUNKS_CACHE = int(os.getenv("SERVED_CHUNKS_CACHE", "500"))  # Chunks kept in the index
+CHUNK_INDEX_PATH = os.getenv("CHUNK_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chunk_index.db"))
+LOCAL_SEARCH_FIRST = os.getenv("LOCAL_SEARCH_FIRST", "false").lower() == "true"  # Skip smart search when the index covers the query
+LOCAL_SEARCH_MIN_MATCH = float(os.getenv("LOCAL_SEARCH_MIN_MATCH", "0.8"))  # Share of query terms each of TOP_K_CHUNKS local chunks must contain
+LOCAL_FALLBACK_MIN_MATCH = 0.5  # Share of query terms a local chunk must contain to be used while search is down
+
+# Multi-worker mode: a supervisor process plus this many worker processes (0 or 1 = single process)
+MAIN_AGENT_WORKERS = int(os.getenv("MAIN_AGENT_WORKERS", "0"))
+if MAIN_AGENT_WORKERS > 1 and HISTORY_BACKEND == "storage":
+    raise ValueError("MAIN_AGENT_WORKERS > 1 requires HISTORY_BACKEND=sqlite (uAgents storage is per process)")
+WORKER_NAME = worker_name() or ""  # "worker-<index>" when this module is re-imported by a worker process
+IS_SUPERVISOR = MAIN_AGENT_WORKERS > 1 and not WORKER_NAME
 
 # Performance settings
 ENABLE_METTA_REASONING = os.getenv("ENABLE_METTA_REASONING", "true").lower() == "true"  # We can disable if for faster responses
+ENABLE_RERANKING = os.getenv("ENABLE_RERANKING", "true").lower() == "true"  # Local MMR reranking + near-duplicate removal
+ASI1_MODEL = os.getenv("ASI1_MODEL", "asi1-extended")  # Answer model ("asi1-mini" is faster)
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "10"))  # Chunks retrieved per search, across all projects
+TOP_K_CHUNKS = int(os.getenv("TOP_K_CHUNKS", "5"))  # Chunks passed to the LLM
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))  # Max documentation tokens in the prompt (0 = no compression)
+
+# Retrieval memory: follow-up questions reuse (or search together with) the previous turn's chunks
+RETRIEVAL_MEMORY_SESSIONS = int(os.getenv("RETRIEVAL_MEMORY_SESSIONS", "1000"))  # Senders remembered (0 = always search)
+RETRIEVAL_MEMORY_TTL = float(os.getenv("RETRIEVAL_MEMORY_TTL", "1800"))  # Seconds a turn's chunks stay reusable
+
+# Starter questions answered in the background for each indexed sponsor whenever the docs change ({sponsor} is replaced by its name)
+FAQ_TEMPLATES = [t.strip() for t in os.getenv(
+    "FAQ_TEMPLATES",
+    "How do I get started with {sponsor}?|Show me a code example for {sponsor}|What are the requirements for {sponsor}?",
+).split("|") if t.strip()]
+FAQ_DB_PATH = os.getenv("FAQ_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "faq_answers.db"))
+FAQ_CHECK_INTERVAL = float(os.getenv("FAQ_CHECK_INTERVAL", "30"))  # Seconds between docs-status checks (and at most one answer generated per check)
+FAQ_RATE_PER_MINUTE = float(os.getenv("FAQ_RATE_PER_MINUTE", "2"))  # Answers generated per minute, only while no live request is running (0 = disabled)
+
+
+def build_asi1_client():
+    # The openai SDK takes ~0.5s to import: it is loaded by the startup warm-up or on first use
+    from openai import OpenAI
+    return OpenAI(
+        base_url=os.getenv("ASI1_BASE_URL", "https://api.asi1.ai/v1"),
+        api_key=os.getenv("ASI1_API_KEY")
+    )
+
+asi1_client = Lazy(build_asi1_client)
+
+# Keep-alive connections to the Next.js API, shared by all requests
+http = requests.Session()
+
+agent = Agent()
+
+# Request/upstream capture for replay (enabled by TRAFFIC_CAPTURE_PATH)
+traffic = TrafficCapture.from_env("main", WORKER_NAME)  # Workers write e.g. capture.worker-0.jsonl next to capture.jsonl
+
+# Spans of each chat request, continued by the search route, query understanding and MeTTa
+tracer = Tracer.from_env("main", WORKER_NAME)
 
+docs_status_breaker = CircuitBreaker("docs-status", slow_call_seconds=5)
+search_breaker = CircuitBreaker("smart-search", slow_call_seconds=10)
+metta_breaker = CircuitBreaker("metta", slow_call_seconds=15)
+asi1_breaker = CircuitBreaker("asi1", slow_call_seconds=45)
+breakers = [docs_status_breaker, search_breaker, metta_breaker, asi1_breaker]
 
-client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key=os.getenv("ASI1_API_KEY")
+admission = AdmissionController(
+    MAX_CONCURRENT_REQUESTS,
+    MAX_QUEUED_REQUESTS,
+    SENDER_RATE_PER_MINUTE / 60,
+    SENDER_BURST,
+    PRIORITY_SENDERS,
 )
 
-agent = Agent()
+BUSY_REPLIES = {
+    "queue_full": "⏳ I'm helping a lot of hackers right now. Please retry in a few seconds!",
+    "rate_limited": "⏳ You're sending questions faster than I can answer them. Please wait a few seconds and try again.",
+}
+
+if HISTORY_BACKEND == "storage":
+    history_store = StorageHistoryStore(agent.storage, MAX_HISTORY_MESSAGES)
+else:
+    history_store = SQLiteHistoryStore(HISTORY_DB_PATH, MAX_HISTORY_MESSAGES)
+
+# Last turn's search query and chunks per sender (in-process: a sender always lands on the same worker)
+retrieval_memory = RetrievalMemory(RETRIEVAL_MEMORY_SESSIONS, RETRIEVAL_MEMORY_TTL)
 
 protocol = Protocol(spec=chat_protocol_spec)
+reasoning_protocol = Protocol(name="MeTTaReasoning", version="0.1.0")
 #fund_agent_if_low(agent.wallet.address())
 
+# Last successful documentation status (served while the status endpoint is down)
+last_docs_status = None
+
 # Function to check documentation status
 def get_docs_status():
+    global last_docs_status
+    if not docs_status_breaker.allow():
+        # Status endpoint is down: reuse the last answer, or assume docs exist and let search decide
+        return last_docs_status or {"hasDocumentation": True, "sources": {"sponsors": 0, "projects": 0}}
+    start = time.time()
     try:
-        response = requests.get(DOCS_STATUS_URL, timeout=10)
+        response = http.get(DOCS_STATUS_URL, headers=tracer.headers(), timeout=10)
         response.raise_for_status()
         data = response.json()
+        docs_status_breaker.record(True, time.time() - start)
+        last_docs_status = data
         # The endpoint returns {"hasDocumentation": bool, "hackathon": {...}, "sources": {...}}
         return data
     except Exception as e:
+        docs_status_breaker.record(False, time.time() - start)
         print(f"Error fetching documentation status: {e}")
-        return {"hasDocumentation": False, "sources": {"sponsors": 0, "projects": 0}}
+        return last_docs_status or {"hasDocumentation": False, "sources": {"sponsors": 0, "projects": 0}}
+
+# Chunks served by smart search, searched locally with BM25 when it is down (persisted across restarts)
+chunk_index = ChunkIndex(SERVED_CHUNKS_CACHE, CHUNK_INDEX_PATH)
+
+def smart_search(query: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """POSTs a query to smart search and returns its JSON answer (blocking)"""
+    response = http.post(
+        DOCS_SEARCH_URL,
+        json={
+            "query": query,
+            "limit": SEARCH_LIMIT,  # Most relevant chunks across all projects
+            "includeInactive": False
+        },
+        headers=headers,
+        timeout=SEARCH_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+# Smart searches still running after their request was answered from the local index
+background_searches = set()
+
+def finish_search_in_background(search: asyncio.Future, search_start: float, recording):
+    """Records the outcome of a search that missed its deadline and indexes its results when it completes"""
+    def finished(task: asyncio.Future):
+        background_searches.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        search_breaker.record(error is None, time.time() - search_start)
+        recording.upstream("smart-search", time.time() - search_start, {"error": str(error)} if error else task.result())
+        if error is None:
+            chunk_index.add(task.result().get("results", []))
+
+    background_searches.add(search)
+    search.add_done_callback(finished)
+
+def local_search(query: str, min_match: float) -> list:
+    """Chunks from the local index containing at least min_match of the query's terms, best first"""
+    with tracer.span("local-search", min_match=min_match) as span:
+        chunks = chunk_index.search(query, limit=SEARCH_LIMIT, min_match=min_match)
+        span.set(chunks=len(chunks), indexed=len(chunk_index))
+    return chunks
+
+# Answers to the FAQ_TEMPLATES questions of each sponsor, per docs version (shared by worker processes through SQLite)
+faq_store = FaqStore(FAQ_DB_PATH)
+
+# Docs version the FAQ queue was built for, and the (sponsor, question) pairs still to answer
+faq_version = None
+faq_queue = deque()
+faq_bucket = TokenBucket(FAQ_RATE_PER_MINUTE / 60, 1)
 
 # Storage for MeTTa reasoning responses (key: session_id, value: reasoning text)
 metta_reasoning_cache = {}
 
-@protocol.on_message(ChatMessage)
-async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
-    # Check if this is a response from MeTTa agent
-    if sender == METTA_AGENT_ADDRESS:
-        for item in msg.content:
-            if isinstance(item, TextContent):
-                text = item.text
-                if text.startswith("REASONING_RESPONSE:"):
-                    # Parse: REASONING_RESPONSE:session_id:reasoning_text
-                    parts = text.split(":", 2)
-                    if len(parts) == 3:
-                        session_id = parts[1]
-                        reasoning_text = parts[2]
-                        metta_reasoning_cache[session_id] = reasoning_text
-                        ctx.logger.info(f"🧠 Stored MeTTa reasoning for session {session_id}")
-                        # Send acknowledgement
-                        await ctx.send(sender, ChatAcknowledgement(
-                            timestamp=datetime.now(timezone.utc),
-                            acknowledged_msg_id=msg.msg_id
-                        ))
-                        return
+# Reasoning requests awaiting a response (key: session_id, value: (query, chunks, traceparent)) - used to resend chunk bodies
+metta_pending_requests = {}
+
+# Content hashes the MeTTa agent has been sent recently (LRU, values unused)
+metta_known_hashes = OrderedDict()
+
+# Session ids of MeTTa health probes (sent while the MeTTa breaker is open)
+PROBE_SESSION_PREFIX = "probe-"
+
+# Set in the supervisor process when MAIN_AGENT_WORKERS > 1; workers run the handlers below themselves
+worker_pool: Optional[WorkerPool] = None
+
+def chunk_hash(content: str) -> str:
+    """Content address of a chunk, shared with the MeTTa agent's chunk cache"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def build_reasoning_request(session_id: str, query: str, chunks: List[Dict[str, Any]], resend: frozenset = frozenset(), traceparent: str = "") -> ReasoningRequest:
+    """
+    Builds a reasoning request carrying chunk ids and hashes
+
+    Chunk bodies are only included for hashes the MeTTa agent has not been sent
+    recently, or that it explicitly asked for (resend).
+    """
+    refs = []
+    for idx, chunk in enumerate(chunks):
+        content = chunk.get("content", "")
+        content_hash = chunk_hash(content)
+        include_body = content_hash not in metta_known_hashes or content_hash in resend
+        refs.append(ChunkRef(
+            chunk_id=f"chunk-{idx}",
+            content_hash=content_hash,
+            content=content if include_body else None,
+            source=chunk.get("sponsorName", ""),
+        ))
+        metta_known_hashes[content_hash] = True
+        metta_known_hashes.move_to_end(content_hash)
+    while len(metta_known_hashes) > METTA_KNOWN_CHUNKS:
+        metta_known_hashes.popitem(last=False)
+    return ReasoningRequest(session_id=session_id, query=query, chunks=refs, traceparent=traceparent)
+
+def build_llm_messages(query: str, context_docs: str, metta_reasoning_text: Optional[str], conversation_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Assembles the ASI-1 chat messages: system prompt with documentation context
+    (and MeTTa reasoning if available), previous turns, then the current query
+    """
+    # Build system prompt with MeTTa reasoning if available
+    system_prompt = f"""
+You are an expert AI assistant specialized in helping developers during hackathons with blockchain technologies and smart contracts.
+Your mission is to accelerate development by providing clear, actionable guidance based on official documentation.
+
+🎯 **Your Role:**
+- Help developers implement technologies quickly and correctly
+- Provide practical code examples and step-by-step guides
+- Explain concepts clearly with a focus on getting things working
+- Be encouraging and supportive - hackathons are time-sensitive!
+
+📚 **Available Documentation Context:**
+{context_docs}
+"""
+    if metta_reasoning_text:
+        system_prompt += f"""
+
+🧠 **Symbolic Analysis (MeTTa):**
+{metta_reasoning_text}
+
+Use this to identify dependencies, execution order, and potential conflicts in your response.
+"""
+
+    system_prompt += """
+
+✅ **Response Guidelines:**
+1. **Be practical and actionable** - focus on what developers need to do NOW
+2. **Provide complete code examples** when relevant (not just snippets)
+3. **Mention prerequisites and dependencies** upfront
+4. **Structure your response** with clear steps or sections
+5. **Cite the source project** when referencing specific documentation
+6. **If something is missing from docs**, acknowledge it but offer alternative approaches or related information
+7. **Be encouraging** - remind them they're building something awesome!
+8. **Include troubleshooting tips** when relevant
+
+Remember: You're here to help hackers ship fast and win! 🚀
+"""
+
+    # Build messages with conversation history
+    messages = [{"role": "system", "content": system_prompt}]
+
+    # Add conversation history
+    messages.extend(conversation_history)
+
+    # Add current query
+    messages.append({"role": "user", "content": query})
+
+    return messages
+
+@reasoning_protocol.on_message(ReasoningResponse)
+async def handle_reasoning_response(ctx: Context, sender: str, msg: ReasoningResponse):
+    if worker_pool is not None:
+        if not worker_pool.dispatch_session(msg.session_id, sender, msg, release=True):
+            ctx.logger.warning(f"⚠️ MeTTa reply for unknown session {msg.session_id}")
+        return
+    if msg.session_id.startswith(PROBE_SESSION_PREFIX):
+        if not msg.error:
+            metta_breaker.close()
+        return
+    metta_pending_requests.pop(msg.session_id, None)
+    if msg.error:
+        # Store a None result so the waiting request stops polling right away
+        ctx.logger.warning(f"⚠️ MeTTa reasoning failed for session {msg.session_id}: {msg.error}")
+        metta_reasoning_cache[msg.session_id] = None
+        return
+    metta_reasoning_cache[msg.session_id] = msg.reasoning
+    ctx.logger.info(f"🧠 Stored MeTTa reasoning for session {msg.session_id}")
+
+@reasoning_protocol.on_message(ChunkBodiesRequest)
+async def handle_chunk_bodies_request(ctx: Context, sender: str, msg: ChunkBodiesRequest):
+    if worker_pool is not None:
+        if not worker_pool.dispatch_session(msg.session_id, sender, msg):
+            ctx.logger.warning(f"⚠️ MeTTa asked for chunks of unknown session {msg.session_id}")
+        return
+    pending = metta_pending_requests.get(msg.session_id)
+    if pending is None:
+        ctx.logger.warning(f"⚠️ MeTTa asked for chunks of unknown session {msg.session_id}")
+        return
+    query, chunks, traceparent = pending
+    ctx.logger.info(f"📤 Resending {len(msg.missing_hashes)} chunk bodies for session {msg.session_id}")
+    await ctx.send(sender, build_reasoning_request(msg.session_id, query, chunks, resend=frozenset(msg.missing_hashes), traceparent=traceparent))
 
 @protocol.on_message(ChatMessage)
 async def handle_user_message(ctx: Context, sender: str, msg: ChatMessage):
+    if worker_pool is not None:
+        # Supervisor: the sender's worker acknowledges and answers
+        worker_pool.dispatch(sender, msg)
+        return
+
     # Extract text from message content (FIX: msg.content is a list, not a string)
     ctx.logger.info(f"📨 RECEIVED MESSAGE from {sender}")
     ctx.logger.info(f"   Message ID: {msg.msg_id}")
@@ -104,15 +416,15 @@ async def handle_user_message(ctx: Context, sender: str, msg: ChatMessage):
 
     await ctx.send(sender, ChatAcknowledgement(timestamp=datetime.now(timezone.utc), acknowledged_msg_id=msg.msg_id))
 
-    # Retrieve or initialize conversation history for this user
-    history_key = f"conversation_history_{sender}"
-    conversation_history = ctx.storage.get(history_key) or []
+    # Retrieve previous turns for this user
+    conversation_history = history_store.load(sender)
 
     ctx.logger.info(f"📚 Conversation history: {len(conversation_history)} messages")
 
     # Check for special commands
     if query.lower() in ["/clear", "/reset", "/new"]:
-        ctx.storage.set(history_key, [])
+        history_store.clear(sender)
+        retrieval_memory.forget(sender)
         ctx.logger.info(f"🗑️ Cleared conversation history for {sender}")
 
         clear_msg = ChatMessage(
@@ -126,17 +438,22 @@ async def handle_user_message(ctx: Context, sender: str, msg: ChatMessage):
         await ctx.send(sender, clear_msg)
         return
 
-    # Add user message to history
-    conversation_history.append({"role": "user", "content": query})
-
     # Track processing time
     import time
     start_time = time.time()
+    admitted = False
+    recording = traffic.begin("chat", {"sender": sender, "query": query})
+    trace = tracer.span("chat", sender=sender, query_chars=len(query))
+    ctx.logger.info(f"🧵 Trace {trace.trace_id}")
 
     try:
         # Check documentation status
         ctx.logger.info(f"⏱️ [0.00s] Checking documentation status...")
-        docs_status = get_docs_status()
+        status_start = time.time()
+        with tracer.span("docs-status"):
+            # Blocking upstream calls run in threads so other admitted requests keep progressing
+            docs_status = await asyncio.to_thread(get_docs_status)
+        recording.upstream("docs-status", time.time() - status_start, docs_status)
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Documentation available: {docs_status.get('hasDocumentation', False)}")
         ctx.logger.info(f"   - Sponsors: {docs_status.get('sources', {}).get('sponsors', 0)}")
         ctx.logger.info(f"   - Projects: {docs_status.get('sources', {}).get('projects', 0)}")
@@ -192,32 +509,99 @@ Ready to set up? Head to the main page and let's get building! 🚀"""
             await ctx.send(sender, no_docs_msg)
             return
 
+        # Starter questions answered in the background for the current docs skip search and the LLM
+        with tracer.span("faq") as faq_span:
+            faq_answer = faq_store.get(docs_version(docs_status), query) if FAQ_TEMPLATES else None
+            faq_span.set(hit=faq_answer is not None)
+        if faq_answer is not None:
+            ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] ⚡ Answered from the precomputed FAQ")
+            history_store.append(sender, [
+                {"role": "user", "content": query},
+                {"role": "assistant", "content": faq_answer},
+            ])
+            recording.finish(faq_answer)
+            await ctx.send(sender, ChatMessage(
+                timestamp=datetime.now(timezone.utc),
+                msg_id=msg.msg_id,
+                content=[
+                    TextContent(text=faq_answer),
+                    EndSessionContent()
+                ]
+            ))
+            return
+
+        # Admission control: wait for a processing slot, or tell the sender to retry
+        try:
+            with tracer.span("admission"):
+                await admission.acquire(sender)
+            admitted = True
+        except AdmissionRejected as e:
+            ctx.logger.warning(f"🚦 Request from {sender} not admitted ({e.reason}): {admission.stats()}")
+            busy_msg = ChatMessage(
+                timestamp=datetime.now(timezone.utc),
+                msg_id=msg.msg_id,
+                content=[
+                    TextContent(text=BUSY_REPLIES[e.reason]),
+                    EndSessionContent()
+                ]
+            )
+            await ctx.send(sender, busy_msg)
+            return
+        ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] 🚦 Admitted")
+
         sponsor_count = docs_status.get('sources', {}).get('sponsors', 0)
         ctx.logger.info(f"📚 Searching across {sponsor_count} indexed sponsor(s)")
-        ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Starting smart search with ASI1 query understanding...")
+
+        # Follow-ups may be answered from (or searched together with) the previous turn's chunks
+        with tracer.span("retrieval-plan") as plan_span:
+            plan = retrieval_memory.plan(sender, query)
+            plan_span.set(action=plan.action, similarity=round(plan.similarity, 3), coverage=round(plan.coverage, 3))
+        search_query = plan.search_query
+        ctx.logger.info(f"🧠 Retrieval memory: {plan.action} (similarity {plan.similarity:.2f}, coverage {plan.coverage:.2f})")
+        if search_query != query:
+            ctx.logger.info(f"   - Rewritten query: {search_query}")
 
         # Use smart search endpoint (POST with ASI1-powered query understanding)
-        try:
-            response = requests.post(
-                DOCS_SEARCH_URL,
-                json={
-                    "query": query,
-                    "limit": 10,  # Get top 10 most relevant chunks across all projects
-                    "includeInactive": False
-                },
-                timeout=15  # Slightly longer timeout for ASI1 processing
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            # Check for NO_ACTIVE_HACKATHON error
-            if data.get("error") == "NO_ACTIVE_HACKATHON":
-                ctx.logger.warning(f"⚠️ No active hackathon configured")
-                no_hackathon_msg = ChatMessage(
-                    timestamp=datetime.now(timezone.utc),
-                    msg_id=msg.msg_id,
-                    content=[
-                        TextContent(text="""👋 Hi! I'm your hackathon AI assistant.
+        data = {}
+        search_degraded = False
+        all_chunks = []
+        if plan.action == REUSE:
+            all_chunks = plan.chunks
+            ctx.logger.info(f"♻️ Reusing {len(all_chunks)} chunks from the previous turn, smart search skipped")
+        elif LOCAL_SEARCH_FIRST and len(local_chunks := local_search(search_query, LOCAL_SEARCH_MIN_MATCH)) >= TOP_K_CHUNKS:
+            all_chunks = local_chunks
+            ctx.logger.info(f"📇 {len(all_chunks)} local chunks cover the query, smart search skipped")
+        else:
+            ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Starting smart search with ASI1 query understanding...")
+            search_start = time.time()
+            try:
+                search_breaker.check()
+                with tracer.span("smart-search", limit=SEARCH_LIMIT) as search_span:
+                    search = asyncio.ensure_future(asyncio.to_thread(smart_search, search_query, tracer.headers()))
+                    # Past the deadline, a query the local index covers is answered from it while the search finishes in the background
+                    done, _ = await asyncio.wait({search}, timeout=LOCAL_FALLBACK_DEADLINE if LOCAL_FALLBACK_DEADLINE > 0 else None)
+                    deadline_chunks = [] if done else local_search(search_query, LOCAL_FALLBACK_MIN_MATCH)
+                    if deadline_chunks:
+                        search_span.set(deadline_exceeded=True, local_chunks=len(deadline_chunks))
+                        finish_search_in_background(search, search_start, recording)
+                    else:
+                        data = await search
+                        search_span.set(results=len(data.get("results", [])))
+                if deadline_chunks:
+                    all_chunks = deadline_chunks
+                    ctx.logger.info(f"📇 Smart search slower than {LOCAL_FALLBACK_DEADLINE}s, answering from {len(all_chunks)} local chunks")
+                else:
+                    search_breaker.record(True, time.time() - search_start)
+                    recording.upstream("smart-search", time.time() - search_start, data)
+
+                    # Check for NO_ACTIVE_HACKATHON error
+                    if data.get("error") == "NO_ACTIVE_HACKATHON":
+                        ctx.logger.warning(f"⚠️ No active hackathon configured")
+                        no_hackathon_msg = ChatMessage(
+                            timestamp=datetime.now(timezone.utc),
+                            msg_id=msg.msg_id,
+                            content=[
+                                TextContent(text="""👋 Hi! I'm your hackathon AI assistant.
 
 📢 **No Active Hackathon Selected**
 It looks like no hackathon has been set as active yet. Please ask an organizer to:
@@ -228,31 +612,48 @@ It looks like no hackathon has been set as active yet. Please ask an organizer t
 Once a hackathon is active, I'll be able to search through the documentation of all its sponsors and help you build! 🚀
 
 Need help with something else? Feel free to ask!"""),
-                        EndSessionContent()
-                    ]
-                )
-                await ctx.send(sender, no_hackathon_msg)
-                return
-
-            ctx.logger.info(f"🔍 Smart Search Response:")
-            ctx.logger.info(f"   - Total results: {data.get('totalResults', 0)}")
-            ctx.logger.info(f"   - Sponsors searched: {data.get('sponsorsSearched', 0)}")
-            ctx.logger.info(f"   - Query intent: {data.get('queryIntent', {})}")
-            ctx.logger.info(f"   - Applied filters: {data.get('appliedFilters', {})}")
-            ctx.logger.info(f"   - Hackathon: {data.get('hackathon', {}).get('name', 'Unknown')}")
-
-            # Extract results (already ranked by relevance and filtered by ASI1)
-            all_chunks = data.get("results", [])
-
-            if all_chunks:
-                ctx.logger.info(f"✅ {len(all_chunks)} relevant chunks found (smart filtered)")
-            else:
-                ctx.logger.info(f"⚠️ No results found for query: {query}")
+                                EndSessionContent()
+                            ]
+                        )
+                        await ctx.send(sender, no_hackathon_msg)
+                        return
 
-        except Exception as e:
-            ctx.logger.error(f"❌ Error calling smart search: {e}")
-            # Fallback to empty results
-            all_chunks = []
+                    ctx.logger.info(f"🔍 Smart Search Response:")
+                    ctx.logger.info(f"   - Total results: {data.get('totalResults', 0)}")
+                    ctx.logger.info(f"   - Sponsors searched: {data.get('sponsorsSearched', 0)}")
+                    ctx.logger.info(f"   - Query intent: {data.get('queryIntent', {})}")
+                    ctx.logger.info(f"   - Applied filters: {data.get('appliedFilters', {})}")
+                    ctx.logger.info(f"   - Hackathon: {data.get('hackathon', {}).get('name', 'Unknown')}")
+
+                    # Extract results (already ranked by relevance and filtered by ASI1)
+                    all_chunks = data.get("results", [])
+
+                    if all_chunks:
+                        ctx.logger.info(f"✅ {len(all_chunks)} relevant chunks found (smart filtered)")
+                        chunk_index.add(all_chunks)
+                    else:
+                        ctx.logger.info(f"⚠️ No results found for query: {search_query}")
+
+            except CircuitOpenError as e:
+                ctx.logger.warning(f"⚡ {e}, skipping smart search")
+                search_degraded = True
+            except Exception as e:
+                search_breaker.record(False, time.time() - search_start)
+                recording.upstream("smart-search", time.time() - search_start, {"error": str(e)})
+                ctx.logger.error(f"❌ Error calling smart search: {e}")
+                search_degraded = True
+
+            if search_degraded:
+                # Degraded mode: answer from the local index of previously served chunks
+                all_chunks = local_search(search_query, LOCAL_FALLBACK_MIN_MATCH)
+                ctx.logger.info(f"📇 {len(all_chunks)} local chunks match the query")
+
+        if plan.action == AUGMENT:
+            # Keep the previous turn's chunks next to the new results (reranking drops near-duplicates)
+            seen = {c.get("id") or chunk_hash(c.get("content", "")) for c in all_chunks}
+            remembered = [c for c in plan.chunks if (c.get("id") or chunk_hash(c["content"])) not in seen]
+            all_chunks = all_chunks + remembered
+            ctx.logger.info(f"➕ Added {len(remembered)} chunks from the previous turn")
 
         if not all_chunks:
             # Show available sponsors from active hackathon
@@ -311,144 +712,116 @@ It looks like no sponsor documentation is available yet. To get started:
 
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Search completed, got {len(all_chunks)} total chunks")
 
-        # Sort by score (if exists) and take top 5
+        # Sort by score (if exists) and take the top chunks, dropping near-duplicates
         all_chunks.sort(key=lambda x: x.get("score", 0), reverse=True)
-        top_chunks = all_chunks[:5]
+        if ENABLE_RERANKING:
+            rerank_start = time.time()
+            with tracer.span("rerank", chunks=len(all_chunks)):
+                top_chunks = rerank_chunks(search_query, all_chunks, k=TOP_K_CHUNKS)
+            ctx.logger.info(f"🔀 Reranked {len(all_chunks)} chunks in {(time.time() - rerank_start) * 1000:.1f}ms")
+        else:
+            top_chunks = all_chunks[:TOP_K_CHUNKS]
 
         ctx.logger.info(f"📚 Selected {len(top_chunks)} most relevant snippets")
+        retrieval_memory.remember(sender, search_query, top_chunks, reused=plan.action == REUSE)
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Preparing context for LLM...")
 
+        # Keep only the query-relevant sentences and code blocks within the token budget
+        with tracer.span("compress") as compress_span:
+            context_chunks, tokens_before, tokens_after = compress_chunks(search_query, top_chunks, CONTEXT_TOKEN_BUDGET)
+            compress_span.set(tokens_before=tokens_before, tokens_after=tokens_after)
+        ctx.logger.info(f"🗜️ Context compressed: ~{tokens_before} → ~{tokens_after} tokens (budget {CONTEXT_TOKEN_BUDGET})")
+
         # Preparar contexto para el LLM
         context_docs = "\n\n".join([
             f"[{c.get('sponsorName', 'Unknown')}]\n{c['content']}"
-            for c in top_chunks
+            for c in context_chunks
         ])
 
         # Request MeTTa reasoning if agent is available and enabled
         metta_reasoning_text = None
-        if USE_METTA_REASONING and ENABLE_METTA_REASONING:
+        if USE_METTA_REASONING and ENABLE_METTA_REASONING and metta_breaker.allow():
             try:
                 ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Requesting MeTTa reasoning from {METTA_AGENT_ADDRESS}")
 
-                # Prepare data for MeTTa agent (serialize as JSON)
-                reasoning_data = {
-                    "query": query,
-                    "chunks": top_chunks
-                }
-
                 # Create session ID to track this reasoning request
                 session_id = str(uuid4())
+                with tracer.span("metta", session_id=session_id) as metta_span:
+                    metta_pending_requests[session_id] = (query, top_chunks, metta_span.traceparent)
 
-                # Send ChatMessage to MeTTa agent with JSON payload
-                metta_request_msg = ChatMessage(
-                    timestamp=datetime.now(timezone.utc),
-                    msg_id=uuid4(),
-                    content=[
-                        TextContent(text=f"REASONING_REQUEST:{session_id}:{json.dumps(reasoning_data)}")
-                    ]
-                )
-
-                await ctx.send(METTA_AGENT_ADDRESS, metta_request_msg)
+                    # Send chunk references; bodies only for chunks the MeTTa agent hasn't seen
+                    await ctx.send(METTA_AGENT_ADDRESS, build_reasoning_request(session_id, query, top_chunks, traceparent=metta_span.traceparent))
 
-                # Wait for response (with timeout)
-                import asyncio
-                max_wait = 30  # 30 seconds timeout for MeTTa reasoning
-                waited = 0
-                while session_id not in metta_reasoning_cache and waited < max_wait:
-                    await asyncio.sleep(0.5)
-                    waited += 0.5
+                    # Wait for response (with timeout)
+                    max_wait = 30  # 30 seconds timeout for MeTTa reasoning
+                    waited = 0
+                    while session_id not in metta_reasoning_cache and waited < max_wait:
+                        await asyncio.sleep(0.5)
+                        waited += 0.5
+                    metta_span.set(received=session_id in metta_reasoning_cache)
 
-                # Check if we got a response
+                # Check if we got a response (None means the MeTTa agent replied with an error)
                 if session_id in metta_reasoning_cache:
                     metta_reasoning_text = metta_reasoning_cache.pop(session_id)
+                    metta_breaker.record(metta_reasoning_text is not None, waited)
+                    recording.upstream("metta", waited, metta_reasoning_text)
                     ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] ✅ MeTTa reasoning received")
                 else:
+                    metta_breaker.record(False, waited)
+                    recording.upstream("metta", waited, {"error": "timeout"})
                     ctx.logger.warning(f"⏱️ [{time.time() - start_time:.2f}s] ⚠️ MeTTa reasoning timeout after {max_wait}s")
+                metta_pending_requests.pop(session_id, None)
             except Exception as e:
                 ctx.logger.error(f"⏱️ [{time.time() - start_time:.2f}s] ❌ Error calling MeTTa agent: {e}")
+        elif metta_breaker.state == OPEN:
+            ctx.logger.warning(f"⏱️ [{time.time() - start_time:.2f}s] ⚡ MeTTa circuit is open, answering without symbolic reasoning")
         else:
             ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] MeTTa reasoning skipped (disabled or not configured)")
 
         # Use ASI-1 LLM to generate intelligent response based on documentation
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Building prompt for ASI-1 LLM...")
         llm_response = "I'm sorry, I couldn't process your query at this time."
+        llm_start = time.time()
         try:
-            # Build system prompt with MeTTa reasoning if available
-            system_prompt = f"""
-You are an expert AI assistant specialized in helping developers during hackathons with blockchain technologies and smart contracts.
-Your mission is to accelerate development by providing clear, actionable guidance based on official documentation.
-
-🎯 **Your Role:**
-- Help developers implement technologies quickly and correctly
-- Provide practical code examples and step-by-step guides
-- Explain concepts clearly with a focus on getting things working
-- Be encouraging and supportive - hackathons are time-sensitive!
-
-📚 **Available Documentation Context:**
-{context_docs}
-"""
-            if metta_reasoning_text:
-                system_prompt += f"""
-
-🧠 **Symbolic Analysis (MeTTa):**
-{metta_reasoning_text}
-
-Use this to identify dependencies, execution order, and potential conflicts in your response.
-"""
-
-            system_prompt += """
-
-✅ **Response Guidelines:**
-1. **Be practical and actionable** - focus on what developers need to do NOW
-2. **Provide complete code examples** when relevant (not just snippets)
-3. **Mention prerequisites and dependencies** upfront
-4. **Structure your response** with clear steps or sections
-5. **Cite the source project** when referencing specific documentation
-6. **If something is missing from docs**, acknowledge it but offer alternative approaches or related information
-7. **Be encouraging** - remind them they're building something awesome!
-8. **Include troubleshooting tips** when relevant
-
-Remember: You're here to help hackers ship fast and win! 🚀
-"""
-
-            # Build messages with conversation history
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add conversation history (excluding the last user message we just added)
-            messages.extend(conversation_history[:-1])
-
-            # Add current query
-            messages.append({"role": "user", "content": query})
+            asi1_breaker.check()
+            messages = build_llm_messages(query, context_docs, metta_reasoning_text, conversation_history)
 
             ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Calling ASI-1 LLM...")
-            r = client.chat.completions.create(
-                #model="asi1-mini",
-                model="asi1-extended",
-                messages=messages,
-                max_tokens=2048,
-            )
+            with tracer.span("asi1", model=ASI1_MODEL, messages=len(messages)) as llm_span:
+                r = await asyncio.to_thread(
+                    lambda: asi1_client.get().chat.completions.create(
+                        model=ASI1_MODEL,
+                        messages=messages,
+                        max_tokens=2048,
+                        timeout=ASI1_TIMEOUT,
+                    )
+                )
+                if r.usage is not None:
+                    llm_span.set(prompt_tokens=r.usage.prompt_tokens, completion_tokens=r.usage.completion_tokens)
             llm_response = str(r.choices[0].message.content)
+            asi1_breaker.record(True, time.time() - llm_start)
+            recording.upstream("asi1", time.time() - llm_start, llm_response)
             ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] ✅ Response generated by ASI-1 LLM")
+        except CircuitOpenError as e:
+            ctx.logger.warning(f"⏱️ [{time.time() - start_time:.2f}s] ⚡ {e}, answering with documentation excerpts")
+            llm_response = f"⚠️ The AI model is temporarily unavailable, so here are the most relevant documentation excerpts I found:\n\n{context_docs}"
         except Exception as e:
+            asi1_breaker.record(False, time.time() - llm_start)
+            recording.upstream("asi1", time.time() - llm_start, {"error": str(e)})
             ctx.logger.error(f"⏱️ [{time.time() - start_time:.2f}s] ❌ Error calling ASI-1: {e}")
             # Fallback: basic response
             llm_response = f"I found {len(top_chunks)} relevant sections in the documentation, but had issues generating a detailed response."
 
-        # Add assistant response to conversation history
-        conversation_history.append({"role": "assistant", "content": llm_response})
-
-        # Truncate history if it exceeds max length (keep only recent messages)
-        if len(conversation_history) > MAX_HISTORY_MESSAGES:
-            conversation_history = conversation_history[-MAX_HISTORY_MESSAGES:]
-            ctx.logger.info(f"✂️ Truncated conversation history to {MAX_HISTORY_MESSAGES} messages")
-
-        # Save updated conversation history
-        ctx.storage.set(history_key, conversation_history)
+        # Append this turn to the conversation history (the store keeps the last MAX_HISTORY_MESSAGES)
+        history_store.append(sender, [
+            {"role": "user", "content": query},
+            {"role": "assistant", "content": llm_response},
+        ])
 
         # Log total processing time
         total_time = time.time() - start_time
         ctx.logger.info(f"⏱️ [{total_time:.2f}s] Preparing response message...")
-        ctx.logger.info(f"💾 Saved conversation history: {len(conversation_history)} messages")
+        ctx.logger.info(f"💾 Saved conversation turn ({HISTORY_BACKEND} history)")
 
         response = ChatMessage(
             timestamp=datetime.now(timezone.utc),
@@ -460,6 +833,7 @@ Remember: You're here to help hackers ship fast and win! 🚀
         )
 
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] Sending response to {sender}...")
+        recording.finish(llm_response)
         await ctx.send(sender, response)
         ctx.logger.info(f"⏱️ [{time.time() - start_time:.2f}s] ✅ COMPLETED - Total time: {time.time() - start_time:.2f}s")
 
@@ -474,6 +848,12 @@ Remember: You're here to help hackers ship fast and win! 🚀
         )
         await ctx.send(sender, error_response)
         ctx.logger.error(f"❌ Error: {e}")
+        trace.end(e)
+    finally:
+        recording.finish()  # Early replies (no docs, busy, errors) are captured without a response body
+        trace.end()
+        if admitted:
+            admission.release()
 
 @protocol.on_message(ChatAcknowledgement)
 async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledgement):
@@ -483,6 +863,7 @@ async def handle_acknowledgement(ctx: Context, sender: str, msg: ChatAcknowledge
 
 @agent.on_event("startup")
 async def on_startup(ctx: Context):
+    global worker_pool
     ctx.logger.info(f"🤖 Agent {AGENT_NAME} started!")
     ctx.logger.info(f"📍 Agent address: {agent.address}")
     ctx.logger.info(f"🌐 Listening on port 8000")
@@ -491,8 +872,188 @@ async def on_startup(ctx: Context):
     ctx.logger.info(f"🔍 Docs Search URL: {DOCS_SEARCH_URL}")
     ctx.logger.info("")
 
+    if MAIN_AGENT_WORKERS > 1:
+        worker_pool = WorkerPool(MAIN_AGENT_WORKERS, {
+            "ChatMessage": handle_user_message,
+            "ReasoningResponse": handle_reasoning_response,
+            "ChunkBodiesRequest": handle_chunk_bodies_request,
+        }, intervals=[(BREAKER_PROBE_INTERVAL, probe_open_breakers)])
+        worker_pool.start()
+        asyncio.create_task(worker_pool.pump(ctx.send))
+        ctx.logger.info(f"👷 Multi-worker mode: {MAIN_AGENT_WORKERS} worker processes")
+
+@agent.on_event("shutdown")
+async def on_shutdown(ctx: Context):
+    if worker_pool is not None:
+        worker_pool.shutdown()
+
+async def probe_open_breakers(ctx: Context):
+    """Probes the upstreams of open breakers and closes those that answer again"""
+    probes = [
+        (docs_status_breaker, lambda: http.get(DOCS_STATUS_URL, timeout=5).raise_for_status()),
+        (search_breaker, lambda: http.post(
+            DOCS_SEARCH_URL, json={"query": "getting started", "limit": 1, "includeInactive": False}, timeout=10
+        ).raise_for_status()),
+        (asi1_breaker, lambda: asi1_client.get().chat.completions.create(
+            model=ASI1_MODEL, messages=[{"role": "user", "content": "ping"}], max_tokens=1, timeout=10
+        )),
+    ]
+    for breaker, probe in probes:
+        if breaker.state != OPEN:
+            continue
+        try:
+            await asyncio.to_thread(probe)
+            breaker.close()
+            ctx.logger.info(f"⚡ {breaker.name} is back, circuit closed")
+        except Exception as e:
+            ctx.logger.info(f"⚡ {breaker.name} still unavailable: {e}")
+    if metta_breaker.state == OPEN and USE_METTA_REASONING:
+        # Closed by handle_reasoning_response when the MeTTa agent answers
+        await ctx.send(METTA_AGENT_ADDRESS, ReasoningRequest(session_id=f"{PROBE_SESSION_PREFIX}{uuid4()}", query="ping", chunks=[]))
+
+    report = getattr(ctx, "report", None)  # Workers publish their metrics to the supervisor
+    if report is not None:
+        report({"breakers": {b.name: b.stats() for b in breakers}, "admission": admission.stats(), "faq": faq_store.stats()})
+
+@agent.on_interval(period=BREAKER_PROBE_INTERVAL)
+async def probe_breakers(ctx: Context):
+    if worker_pool is None:  # In multi-worker mode each worker probes its own breakers
+        await probe_open_breakers(ctx)
+
+def live_requests() -> int:
+    """Chat requests being processed or queued (in multi-worker mode, as last reported by the workers)"""
+    if worker_pool is not None:
+        reports = [m.get("admission", {}) for m in worker_pool.worker_metrics.values()]
+    else:
+        reports = [admission.stats()]
+    return sum(a.get("active", 0) + sum(a.get("queued", [])) for a in reports)
+
+def open_faq_upstreams() -> List[str]:
+    """Smart search / ASI1 breakers that are open here or (multi-worker mode) in any worker's last report"""
+    own = [search_breaker, asi1_breaker]
+    names = {b.name for b in own}
+    opened = {b.name for b in own if b.state == OPEN}
+    if worker_pool is not None:
+        for metrics in worker_pool.worker_metrics.values():
+            opened |= {name for name, stats in metrics.get("breakers", {}).items() if name in names and stats.get("state") == OPEN}
+    return sorted(opened)
+
+def generate_faq_answer(question: str) -> str:
+    """
+    Answers a template question like a first message from a new sender, without MeTTa reasoning (blocking)
+
+    Raises:
+        CircuitOpenError: If smart search or ASI1 is unavailable
+    """
+    search_breaker.check()
+    asi1_breaker.check()
+    search_start = time.time()
+    try:
+        chunks = smart_search(question).get("results", [])
+    except Exception:
+        search_breaker.record(False, time.time() - search_start)
+        raise
+    search_breaker.record(True, time.time() - search_start)
+    if not chunks:
+        return ""
+
+    chunks.sort(key=lambda x: x.get("score", 0), reverse=True)
+    top_chunks = rerank_chunks(question, chunks, k=TOP_K_CHUNKS) if ENABLE_RERANKING else chunks[:TOP_K_CHUNKS]
+    context_chunks, _, _ = compress_chunks(question, top_chunks, CONTEXT_TOKEN_BUDGET)
+    context_docs = "\n\n".join(f"[{c.get('sponsorName', 'Unknown')}]\n{c['content']}" for c in context_chunks)
+
+    llm_start = time.time()
+    try:
+        r = asi1_client.get().chat.completions.create(
+            model=ASI1_MODEL,
+            messages=build_llm_messages(question, context_docs, None, []),
+            max_tokens=2048,
+            timeout=ASI1_TIMEOUT,
+        )
+    except Exception:
+        asi1_breaker.record(False, time.time() - llm_start)
+        raise
+    asi1_breaker.record(True, time.time() - llm_start)
+    return str(r.choices[0].message.content or "")
+
+@agent.on_interval(period=FAQ_CHECK_INTERVAL)
+async def precompute_faq(ctx: Context):
+    """Queues the starter questions of a new docs version, then answers one of them if the agent is idle"""
+    global faq_version
+    if not FAQ_TEMPLATES or FAQ_RATE_PER_MINUTE <= 0:
+        return
+    docs_status = await asyncio.to_thread(get_docs_status)
+    sponsors = [s["name"] for s in docs_status.get("sponsorList") or [] if s.get("name")]
+    if not docs_status.get("hasDocumentation", False) or not sponsors:
+        return
+
+    version = docs_version(docs_status)
+    if version != faq_version:
+        questions = [(sponsor, t.replace("{sponsor}", sponsor)) for sponsor in sponsors for t in FAQ_TEMPLATES]
+        faq_queue.clear()
+        faq_queue.extend(faq_store.missing(version, questions))
+        removed = faq_store.prune(version)
+        if faq_version is not None or removed:
+            ctx.logger.info(f"📚 Documentation changed (version {version}), dropped {removed} precomputed answers")
+        ctx.logger.info(f"❓ {len(faq_queue)} of {len(questions)} starter questions to precompute for {len(sponsors)} sponsor(s)")
+        faq_version = version
+
+    # Generation never competes with live traffic: only when no request is running or queued, at FAQ_RATE_PER_MINUTE
+    if not faq_queue or live_requests() or open_faq_upstreams():
+        return
+    if not faq_bucket.take():
+        return
+    sponsor, question = faq_queue.popleft()
+    start = time.time()
+    try:
+        with tracer.span("faq-generate", sponsor=sponsor) as span:
+            answer = await asyncio.to_thread(generate_faq_answer, question)
+            span.set(answer_chars=len(answer))
+    except CircuitOpenError as e:
+        faq_queue.appendleft((sponsor, question))
+        ctx.logger.info(f"❓ Precomputing paused: {e}")
+        return
+    except Exception as e:
+        ctx.logger.warning(f"❓ Could not precompute '{question}': {e}")
+        return
+    if not answer:
+        ctx.logger.info(f"❓ No documentation found for '{question}', not precomputed")
+        return
+    faq_store.put(version, sponsor, question, answer)
+    ctx.logger.info(f"❓ Precomputed '{question}' in {time.time() - start:.1f}s ({len(faq_queue)} left)")
+
+@agent.on_rest_get("/metrics", AgentMetrics)
+async def handle_metrics(ctx: Context) -> AgentMetrics:
+    if worker_pool is not None:
+        # Breakers and admission live in the workers; the supervisor only routes
+        return AgentMetrics(breakers={}, admission={}, workers=worker_pool.stats())
+    return AgentMetrics(
+        breakers={b.name: b.stats() for b in breakers},
+        admission=admission.stats(),
+        retrieval=retrieval_memory.stats(),
+        chunk_index=chunk_index.stats(),
+        faq={**faq_store.stats(), "version": faq_version, "queued": len(faq_queue)},
+    )
+
+@agent.on_interval(period=HISTORY_SWEEP_INTERVAL)
+async def sweep_idle_history(ctx: Context):
+    removed = history_store.sweep(HISTORY_TTL_HOURS * 3600)
+    if removed:
+        ctx.logger.info(f"🧹 Dropped conversation history of {removed} idle senders")
+
 # Enabling chat functionality
 agent.include(protocol, publish_manifest=True)
+agent.include(reasoning_protocol)
+
+log_import_time(AGENT_NAME, _import_start)
+
+# Build the ASI1 client, open the upstream connections and load NumPy for reranking before the first
+# message, in each process that answers chats (every worker re-imports this module; the supervisor only routes)
+if not IS_SUPERVISOR:
+    start_warm_up(AGENT_NAME, [
+        ("ASI1 client", lambda: open_api_connection(asi1_client.get())),
+        ("Next.js API", get_docs_status),
+    ] + ([("Reranker", lambda: rerank_chunks("warm up", [{"content": "warm up"}]))] if ENABLE_RERANKING else []))
 
 if __name__ == "__main__":
     agent.run()
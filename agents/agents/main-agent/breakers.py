@@ -0,0 +1,113 @@
+"""
+Circuit breakers for the main agent's upstream dependencies.
+
+Each breaker keeps a rolling window of recent calls (bounded by count and
+age). A call counts as failed when it raised or took longer than the
+dependency's slow-call threshold. When enough calls in the window failed the
+breaker opens: callers skip that stage right away (degraded answer) instead
+of waiting out the timeout, and a background probe closes the breaker again
+once the upstream answers. Upstream calls run in threads, so the window is
+guarded by a lock.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+
+class CircuitOpenError(Exception):
+    """Raised by CircuitBreaker.check() while the breaker is open"""
+
+class CircuitBreaker:
+    """
+    Args:
+        name: Dependency name (for logs and monitoring)
+        slow_call_seconds: Calls slower than this count as failures
+        window_size: Maximum number of calls in the rolling window
+        window_seconds: Calls older than this leave the window
+        min_calls: Calls needed in the window before the breaker may open
+        failure_ratio: Share of failed calls in the window that opens the breaker
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slow_call_seconds: float,
+        window_size: int = 20,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+    ):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._window: deque = deque(maxlen=window_size)  # (timestamp, failed, latency)
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def _trim(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._window and self._window[0][0] < cutoff:
+            self._window.popleft()
+
+    def allow(self) -> bool:
+        """True if the stage should run (counts a skip otherwise)"""
+        if self.state == OPEN:
+            self._skipped += 1
+            return False
+        return True
+
+    def check(self):
+        """
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record(self, ok: bool, latency: float):
+        """Records the outcome of a call made while the breaker was closed"""
+        failed = not ok or latency > self.slow_call_seconds
+        with self._lock:
+            self._window.append((time.monotonic(), failed, latency))
+            self._trim()
+            if self.state != CLOSED or len(self._window) < self.min_calls:
+                return
+            failures = sum(1 for _, f, _ in self._window if f)
+            if failures / len(self._window) >= self.failure_ratio:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                logger.warning(f"Circuit for {self.name} opened ({failures}/{len(self._window)} recent calls failed or slow)")
+
+    def close(self):
+        """Closes the breaker after a successful probe and starts a fresh window"""
+        if self.state == OPEN:
+            logger.warning(f"Circuit for {self.name} closed after {time.monotonic() - self.opened_at:.0f}s")
+        with self._lock:
+            self.state = CLOSED
+            self._window.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._trim()
+            window = list(self._window)
+        latencies = sorted(latency for _, _, latency in window)
+        return {
+            "state": self.state,
+            "open_for": round(time.monotonic() - self.opened_at, 1) if self.state == OPEN else 0,
+            "window_calls": len(window),
+            "window_failures": sum(1 for _, f, _ in window if f),
+            "p50_latency": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "max_latency": round(latencies[-1], 3) if latencies else None,
+            "skipped": self._skipped,
+        }
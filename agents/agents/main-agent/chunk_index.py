@@ -0,0 +1,212 @@
+"""
+Local BM25 index over the documentation chunks the main agent has served.
+
+Smart search is a network round trip through the Next.js route, query
+understanding and Qdrant. Every chunk it returns is added to this index, so
+that while search is slow, failing or behind an open breaker the agent can
+still answer from the documentation it has seen, in milliseconds (and, when
+LOCAL_SEARCH_FIRST is on, answer well-covered questions without searching).
+
+- Bounded: at most max_chunks chunks, least recently served evicted first
+- Incremental: adding or evicting a chunk only touches its own postings
+- Persistent: chunks are written through to a small SQLite table and the
+  in-memory postings are rebuilt from it on startup (":memory:" disables)
+- Shared: worker processes (multi-worker mode) write to the same table; a
+  search first rebuilds the postings if another process changed it, so every
+  worker searches the same chunks
+"""
+
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List
+
+from compression import STOPWORDS
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+# Chunk fields kept in the index (search results carry more, e.g. Qdrant metadata)
+STORED_FIELDS = ("id", "content", "sponsorName", "sponsorId")
+
+def index_terms(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+class ChunkIndex:
+    """
+    Args:
+        max_chunks: Chunks kept (least recently served are evicted)
+        path: SQLite file the chunks are persisted to (":memory:" keeps them in memory only)
+        k1: BM25 term-frequency saturation
+        b: BM25 length normalization
+    """
+
+    def __init__(self, max_chunks: int, path: str = ":memory:", k1: float = 1.2, b: float = 0.75):
+        self.max_chunks = max_chunks
+        self.k1 = k1
+        self.b = b
+        self._chunks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # content hash -> chunk, LRU order
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {content hash: term frequency}
+        self._total_length = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                hash TEXT PRIMARY KEY,
+                chunk TEXT NOT NULL,
+                served_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        self._data_version = None  # PRAGMA data_version the postings reflect (it changes on other connections' commits)
+        self._sync()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT hash, chunk FROM chunks ORDER BY served_at DESC LIMIT ?", (self.max_chunks,)
+        ).fetchall()
+        for key, chunk in reversed(rows):
+            self._insert(key, json.loads(chunk))
+        with self._db:  # Rows beyond a lowered max_chunks
+            self._db.execute(
+                "DELETE FROM chunks WHERE hash NOT IN (SELECT hash FROM chunks ORDER BY served_at DESC LIMIT ?)",
+                (self.max_chunks,),
+            )
+
+    def _in_sync(self) -> bool:
+        (version,) = self._db.execute("PRAGMA data_version").fetchone()
+        return version == self._data_version
+
+    def _sync(self):
+        """Rebuilds the postings from the table if another process changed it since they were built"""
+        if self._in_sync():
+            return
+        self._chunks.clear()
+        self._lengths.clear()
+        self._postings.clear()
+        self._total_length = 0
+        (self._data_version,) = self._db.execute("PRAGMA data_version").fetchone()
+        self._load()
+
+    def _insert(self, key: str, chunk: Dict[str, Any]):
+        terms = Counter(index_terms(chunk.get("content", "")))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[key] = tf
+        self._lengths[key] = sum(terms.values())
+        self._total_length += self._lengths[key]
+        self._chunks[key] = chunk
+
+    def _evict(self, key: str):
+        chunk = self._chunks.pop(key)
+        for term in set(index_terms(chunk.get("content", ""))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(key)
+
+    def add(self, chunks: List[Dict[str, Any]]):
+        """Indexes served chunks (already indexed ones only move to the front)"""
+        if self.max_chunks <= 0:
+            return
+        if not self._in_sync():
+            self._add_rows(chunks)  # The next search rebuilds the postings anyway
+            return
+        now = time.time()
+        rows = []
+        for chunk in chunks:
+            content = chunk.get("content", "")
+            if not content:
+                continue
+            key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if key in self._chunks:
+                self._chunks.move_to_end(key)
+            else:
+                stored = {field: chunk[field] for field in STORED_FIELDS if chunk.get(field) is not None}
+                self._insert(key, stored)
+            # Microsecond steps keep the serving order of one batch for _load
+            rows.append((key, json.dumps(self._chunks[key], ensure_ascii=False), now + len(rows) * 1e-6))
+        evicted = []
+        while len(self._chunks) > self.max_chunks:
+            key = next(iter(self._chunks))
+            self._evict(key)
+            evicted.append((key,))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO chunks (hash, chunk, served_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET served_at = excluded.served_at",
+                rows,
+            )
+            self._db.executemany("DELETE FROM chunks WHERE hash = ?", evicted)
+
+    def _add_rows(self, chunks: List[Dict[str, Any]]):
+        """Writes served chunks to the table only, evicting the least recently served rows"""
+        now = time.time()
+        rows = []
+        for chunk in chunks:
+            content = chunk.get("content", "")
+            if content:
+                stored = {field: chunk[field] for field in STORED_FIELDS if chunk.get(field) is not None}
+                key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                rows.append((key, json.dumps(stored, ensure_ascii=False), now + len(rows) * 1e-6))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO chunks (hash, chunk, served_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET served_at = excluded.served_at",
+                rows,
+            )
+            self._db.execute(
+                "DELETE FROM chunks WHERE hash NOT IN (SELECT hash FROM chunks ORDER BY served_at DESC LIMIT ?)",
+                (self.max_chunks,),
+            )
+
+    def search(self, query: str, limit: int = 10, min_match: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Best chunks for the query by BM25
+
+        Args:
+            query: The user's query
+            limit: Maximum number of chunks returned
+            min_match: Share of the query's terms a chunk must contain
+
+        Returns:
+            list: Chunk copies with 'score' (BM25) and 'matched' (share of query terms), best first
+        """
+        self._sync()
+        terms = set(index_terms(query))
+        if not terms or not self._chunks:
+            return []
+        count = len(self._chunks)
+        average_length = self._total_length / count or 1
+        scores: Dict[str, float] = {}
+        matched: Counter = Counter()
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[key] += 1
+        ranked = sorted(
+            (key for key in scores if matched[key] / len(terms) >= min_match),
+            key=lambda key: scores[key],
+            reverse=True,
+        )[:limit]
+        return [
+            {**self._chunks[key], "score": round(scores[key], 4), "matched": matched[key] / len(terms)}
+            for key in ranked
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"chunks": len(self._chunks), "terms": len(self._postings)}
@@ -0,0 +1,176 @@
+"""
+Extractive context compression.
+
+Prompt size drives ASI-1 latency, so instead of pasting whole chunks into the
+system prompt we keep only the query-relevant sentences and code blocks of each
+chunk and pack them into a token budget. Code fences are treated as single
+units; the only fence ever cut is a chunk's best segment when it alone exceeds
+that chunk's share of the budget, and it is cut at a line boundary and closed.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9`*\[(])")
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "for", "with", "is", "are", "be",
+    "how", "do", "i", "can", "what", "my", "me", "it", "this", "that", "use", "using", "you",
+}
+
+def estimate_tokens(text: str) -> int:
+    """Estimate token count (rough: 1 token ≈ 4 chars)"""
+    return len(text) // 4
+
+def split_segments(content: str) -> List[Tuple[str, bool]]:
+    """
+    Splits a chunk into (segment, is_code) units in document order
+
+    Code fences are kept whole; prose is split into lines and then sentences.
+    """
+    segments = []
+    prose: List[str] = []
+
+    def flush_prose():
+        for line in prose:
+            for sentence in _SENTENCE_END.split(line.strip()):
+                if sentence:
+                    segments.append((sentence, False))
+        prose.clear()
+
+    fence: List[str] = []
+    for line in content.splitlines():
+        if line.lstrip().startswith("```"):
+            if fence:
+                fence.append(line)
+                segments.append(("\n".join(fence), True))
+                fence = []
+            else:
+                flush_prose()
+                fence = [line]
+        elif fence:
+            fence.append(line)
+        elif line.strip():
+            prose.append(line)
+    flush_prose()
+    if fence:
+        # Unterminated fence (chunk boundary): keep it whole and close it
+        segments.append(("\n".join(fence + ["```"]), True))
+    return segments
+
+def truncate_segment(segment: str, is_code: bool, max_tokens: int) -> str:
+    """
+    Cuts a segment to at most max_tokens (separator included) at a line or word boundary
+
+    A cut code fence is closed again so the rest of the prompt is not read as
+    code. Returns "" when nothing useful fits.
+    """
+    max_chars = (max_tokens - 1) * 4
+    if len(segment) <= max_chars:
+        return segment
+    if not is_code:
+        cut = segment[:max(max_chars - 1, 0)].rsplit(" ", 1)[0]
+        return cut + "…" if cut else ""
+    closing = "\n```"
+    kept: List[str] = []
+    size = len(closing)
+    for line in segment.splitlines()[:-1]:  # Fence segments always end with their closing line
+        if size + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    if len(kept) <= 1:
+        return ""  # Not even one line of code after the opening fence
+    return "\n".join(kept) + closing
+
+def compress_chunks(query: str, chunks: List[Dict[str, Any]], token_budget: int) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Packs the query-relevant segments of each chunk into a token budget
+
+    Every chunk first gets its best segment, cut down to the chunk's share of
+    the budget when it is larger (so no source disappears), then the remaining
+    budget goes to the highest-scoring segments overall. Selected segments are
+    reassembled in their original order.
+
+    Args:
+        query: The user's query
+        chunks: Chunks to compress (dicts with 'content')
+        token_budget: Maximum estimated tokens for all chunk contents (0 disables compression)
+
+    Returns:
+        tuple: (compressed chunks, tokens before, tokens after)
+    """
+    tokens_before = sum(estimate_tokens(c.get("content", "")) for c in chunks)
+    if token_budget <= 0 or tokens_before <= token_budget:
+        return chunks, tokens_before, tokens_before
+
+    query_terms = set(_TOKEN.findall(query.lower())) - STOPWORDS
+    per_chunk = [split_segments(c.get("content", "")) for c in chunks]
+
+    # Inverse document frequency of query terms across all segments
+    all_tokens = [set(_TOKEN.findall(seg.lower())) for segments in per_chunk for seg, _ in segments]
+    idf = {
+        term: math.log(1 + len(all_tokens) / (1 + sum(term in tokens for tokens in all_tokens)))
+        for term in query_terms
+    }
+
+    # (score, chunk index, segment index, tokens) - each segment costs one extra token for its separator
+    candidates = []
+    token_iter = iter(all_tokens)
+    for ci, segments in enumerate(per_chunk):
+        for si, (segment, is_code) in enumerate(segments):
+            tokens = next(token_iter)
+            score = sum(idf[t] for t in query_terms & tokens)
+            if is_code:
+                score = score * 1.5 + 0.5  # Snippets are what hackers need most
+            if si == 0 and not is_code:
+                score += 0.25  # Headings/lead sentences give context
+            cost = estimate_tokens(segment) + 1
+            candidates.append((score / math.sqrt(1 + cost / 50), ci, si, cost))
+
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    selected = set()
+    selected_text = set()  # Overlapping chunks often repeat the same sentence or snippet
+    truncated = {}  # (chunk index, segment index) -> cut text of an oversized best segment
+    used = 0
+
+    def select(ci: int, si: int, tokens: int):
+        nonlocal used
+        text = per_chunk[ci][si][0]
+        if (ci, si) in selected or text in selected_text or used + tokens > token_budget:
+            return
+        selected.add((ci, si))
+        selected_text.add(text)
+        used += tokens
+
+    # First pass: the best segment of each chunk, cheapest first so the share
+    # a small segment leaves unused goes to the larger ones
+    best_per_chunk = {}
+    for candidate in candidates:
+        best_per_chunk.setdefault(candidate[1], candidate)
+    firsts = sorted(best_per_chunk.values(), key=lambda c: c[3])
+    for left, (_, ci, si, tokens) in zip(range(len(firsts), 0, -1), firsts):
+        share = (token_budget - used) // left
+        if tokens > share:
+            segment, is_code = per_chunk[ci][si]
+            text = truncate_segment(segment, is_code, share)
+            if not text:
+                continue
+            truncated[(ci, si)] = text
+            tokens = estimate_tokens(text) + 1
+        select(ci, si, tokens)
+
+    # Second pass: fill the remaining budget by score
+    for _, ci, si, tokens in candidates:
+        select(ci, si, tokens)
+
+    compressed = []
+    for ci, (chunk, segments) in enumerate(zip(chunks, per_chunk)):
+        kept = [truncated.get((ci, si), segment) for si, (segment, _) in enumerate(segments) if (ci, si) in selected]
+        if kept:
+            compressed.append({**chunk, "content": "\n".join(kept)})
+
+    tokens_after = sum(estimate_tokens(c["content"]) for c in compressed)
+    return compressed, tokens_before, tokens_after
@@ -0,0 +1,109 @@
+"""
+Precomputed answers to the starter questions of each sponsor.
+
+When a hackathon's documentation changes, the first hackers to ask "how do I
+get started with <sponsor>?" would all pay the full search + LLM latency for
+the same answer. The main agent answers a set of template questions per
+sponsor in the background and stores them here, keyed by the documentation
+version they were generated from, so matching questions are answered from
+this store instantly.
+
+- Versioned: docs_version hashes the hackathon and each sponsor's document
+  count and last indexing time, so any upload or re-index starts a new version
+  and answers of older versions are never served
+- Conservative matching: a question matches when it has the same content
+  terms as the template question (word order, casing, punctuation and filler
+  words aside), so "How do I get started with Chainlink?" and "how to get
+  started with chainlink" match but "get started with Chainlink VRF" does not
+- Persistent: answers live in a small SQLite table shared by all worker
+  processes and kept across restarts (":memory:" disables)
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from retrieval_memory import content_terms
+
+def docs_version(docs_status: Dict[str, Any]) -> str:
+    """Fingerprint of the indexed documentation in a get_docs_status() answer"""
+    hackathon = docs_status.get("hackathon") or {}
+    sponsors = sorted(
+        (str(s.get("id", "")), s.get("documentCount", 0), s.get("lastIndexedAt") or "")
+        for s in docs_status.get("sponsorList") or []
+    )
+    payload = json.dumps([hackathon.get("id"), sponsors])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def question_key(question: str) -> str:
+    """Content terms of a question, in a canonical order"""
+    return " ".join(sorted(content_terms(question)))
+
+class FaqStore:
+    """
+    Args:
+        path: SQLite file the answers are persisted to (":memory:" keeps them in memory only)
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS faq (
+                version TEXT NOT NULL,
+                question_key TEXT NOT NULL,
+                sponsor TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (version, question_key)
+            )
+        """)
+        self._db.commit()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, version: str, question: str) -> Optional[str]:
+        """The stored answer to a question for this docs version, if any"""
+        key = question_key(question)
+        row = self._db.execute(
+            "SELECT answer FROM faq WHERE version = ? AND question_key = ?", (version, key)
+        ).fetchone() if key else None
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return row[0]
+
+    def put(self, version: str, sponsor: str, question: str, answer: str):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO faq (version, question_key, sponsor, question, answer, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (version, question_key(question), sponsor, question, answer, time.time()),
+            )
+
+    def missing(self, version: str, questions: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """The (sponsor, question) pairs not answered yet for this docs version"""
+        stored = {
+            key for (key,) in self._db.execute("SELECT question_key FROM faq WHERE version = ?", (version,))
+        }
+        pending = []
+        for sponsor, question in questions:
+            key = question_key(question)
+            if key and key not in stored:
+                stored.add(key)  # Templates that collapse to the same key are answered once
+                pending.append((sponsor, question))
+        return pending
+
+    def prune(self, version: str) -> int:
+        """Drops the answers of every other docs version and returns how many were removed"""
+        with self._db:
+            cursor = self._db.execute("DELETE FROM faq WHERE version != ?", (version,))
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        (answers,) = self._db.execute("SELECT COUNT(*) FROM faq").fetchone()
+        return {"answers": answers, "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,110 @@
+"""
+Conversation history backends for the main agent.
+
+- SQLiteHistoryStore: embedded SQLite database in WAL mode. Each turn is an
+  append of its rows (cost O(turn), independent of how much history is stored)
+  and senders idle for longer than a TTL are swept in the background.
+- StorageHistoryStore: the original uAgents key-value storage layout
+  (`conversation_history_{sender}` lists), kept for hosted runtimes without a
+  writable disk. Every append rewrites the sender's list, and idle senders are
+  not swept.
+"""
+
+import sqlite3
+import time
+from typing import Any, Dict, List
+
+class SQLiteHistoryStore:
+    """Append-only per-turn history in SQLite (WAL mode)"""
+
+    def __init__(self, path: str, max_messages: int):
+        self.max_messages = max_messages
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sender TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS messages_sender_idx ON messages (sender, id);
+            CREATE TABLE IF NOT EXISTS senders (
+                sender TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS senders_last_seen_idx ON senders (last_seen);
+        """)
+        self._db.commit()
+
+    def load(self, sender: str) -> List[Dict[str, Any]]:
+        """Returns the sender's most recent messages, oldest first"""
+        rows = self._db.execute(
+            "SELECT role, content FROM messages WHERE sender = ? ORDER BY id DESC LIMIT ?",
+            (sender, self.max_messages),
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def append(self, sender: str, messages: List[Dict[str, Any]]):
+        """Appends one turn and drops the sender's messages beyond max_messages"""
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO messages (sender, role, content, created_at) VALUES (?, ?, ?, ?)",
+                [(sender, m["role"], m["content"], now) for m in messages],
+            )
+            self._db.execute(
+                """DELETE FROM messages WHERE sender = ? AND id <= (
+                       SELECT id FROM messages WHERE sender = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                   )""",
+                (sender, sender, self.max_messages),
+            )
+            self._db.execute(
+                "INSERT INTO senders (sender, last_seen) VALUES (?, ?) "
+                "ON CONFLICT(sender) DO UPDATE SET last_seen = excluded.last_seen",
+                (sender, now),
+            )
+
+    def clear(self, sender: str):
+        with self._db:
+            self._db.execute("DELETE FROM messages WHERE sender = ?", (sender,))
+            self._db.execute("DELETE FROM senders WHERE sender = ?", (sender,))
+
+    def sweep(self, ttl_seconds: float) -> int:
+        """Deletes the history of senders idle for longer than ttl_seconds, returns how many"""
+        cutoff = time.time() - ttl_seconds
+        with self._db:
+            self._db.execute(
+                "DELETE FROM messages WHERE sender IN (SELECT sender FROM senders WHERE last_seen < ?)",
+                (cutoff,),
+            )
+            return self._db.execute("DELETE FROM senders WHERE last_seen < ?", (cutoff,)).rowcount
+
+class StorageHistoryStore:
+    """History as one list per sender in uAgents storage (legacy layout)"""
+
+    def __init__(self, storage, max_messages: int):
+        self.storage = storage
+        self.max_messages = max_messages
+
+    @staticmethod
+    def _key(sender: str) -> str:
+        return f"conversation_history_{sender}"
+
+    def _last(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return history[-self.max_messages:] if self.max_messages > 0 else []  # [-0:] would keep everything
+
+    def load(self, sender: str) -> List[Dict[str, Any]]:
+        return self._last(self.storage.get(self._key(sender)) or [])
+
+    def append(self, sender: str, messages: List[Dict[str, Any]]):
+        history = (self.storage.get(self._key(sender)) or []) + messages
+        self.storage.set(self._key(sender), self._last(history))
+
+    def clear(self, sender: str):
+        self.storage.set(self._key(sender), [])
+
+    def sweep(self, ttl_seconds: float) -> int:
+        return 0
@@ -0,0 +1,122 @@
+"""
+Local reranking of retrieved chunks.
+
+Smart search returns its top results ranked by relevance only, so near-duplicate
+chunks (the same README section from two sponsors, overlapping windows) can take
+several of the prompt slots. This stage embeds chunks locally with a hashed
+bag-of-words model (no network, no model download), removes near-duplicates
+and picks a diverse top-k with Maximal Marginal Relevance, all in a few
+milliseconds of NumPy.
+
+NumPy is imported by the functions that use it, so it is loaded by the warm-up
+(or the first rerank) instead of at agent startup.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+VECTOR_DIM = 1024
+VECTOR_CACHE_SIZE = 4096
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+# Content hash -> normalized vector
+_vector_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+def _embed(text: str) -> "np.ndarray":
+    """Hashed unigram + bigram term-frequency vector, L2-normalized"""
+    import numpy as np
+
+    tokens = _TOKEN.findall(text.lower())
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if features:
+        # crc32 is stable across processes, unlike hash()
+        indices = np.fromiter((zlib.crc32(f.encode("utf-8")) % VECTOR_DIM for f in features), dtype=np.int64, count=len(features))
+        np.add.at(vector, indices, 1.0)
+        vector = np.sqrt(vector)  # Dampen very frequent terms
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+    return vector
+
+def embed_texts(texts: List[str]) -> "np.ndarray":
+    """
+    Embeds texts into an (n, VECTOR_DIM) matrix of unit vectors, reusing cached vectors
+    """
+    import numpy as np
+
+    rows = []
+    for text in texts:
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        vector = _vector_cache.get(key)
+        if vector is None:
+            vector = _embed(text)
+            _vector_cache[key] = vector
+            while len(_vector_cache) > VECTOR_CACHE_SIZE:
+                _vector_cache.popitem(last=False)
+        else:
+            _vector_cache.move_to_end(key)
+        rows.append(vector)
+    if not rows:
+        return np.zeros((0, VECTOR_DIM), dtype=np.float32)
+    return np.vstack(rows)
+
+def rerank_chunks(
+    query: str,
+    chunks: List[Dict[str, Any]],
+    k: int = 5,
+    diversity: float = 0.3,
+    duplicate_threshold: float = 0.9,
+) -> List[Dict[str, Any]]:
+    """
+    Selects up to k relevant, mutually distinct chunks
+
+    Relevance blends the search score with local query similarity. Chunks whose
+    similarity to an already selected chunk exceeds duplicate_threshold are dropped.
+
+    Args:
+        query: The user's query
+        chunks: Search results (dicts with 'content' and optionally 'score')
+        k: Number of chunks to return
+        diversity: MMR trade-off (0 = relevance only, 1 = diversity only)
+        duplicate_threshold: Cosine similarity above which a chunk counts as a near-duplicate
+
+    Returns:
+        list: Selected chunks, most relevant first
+    """
+    if not chunks:
+        return []
+    import numpy as np
+
+    vectors = embed_texts([c.get("content", "") for c in chunks])
+    query_vector = embed_texts([query])[0]
+
+    # Relevance: search score (scaled to [0, 1]) blended with local query similarity
+    scores = np.array([float(c.get("score") or 0) for c in chunks], dtype=np.float32)
+    if scores.max() > 0:
+        scores = scores / scores.max()
+    relevance = 0.7 * scores + 0.3 * (vectors @ query_vector)
+
+    similarity = vectors @ vectors.T
+    selected: List[int] = []
+    candidates = list(range(len(chunks)))
+    while candidates and len(selected) < k:
+        if selected:
+            redundancy = similarity[np.ix_(candidates, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(candidates), dtype=np.float32)
+        mmr = (1 - diversity) * relevance[candidates] - diversity * redundancy
+        best = int(np.argmax(mmr))
+        index = candidates.pop(best)
+        if redundancy[best] >= duplicate_threshold:
+            continue  # Near-duplicate of a chunk we already kept
+        selected.append(index)
+
+    return [chunks[i] for i in selected]
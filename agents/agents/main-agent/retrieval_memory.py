@@ -0,0 +1,172 @@
+"""
+Per-session retrieval memory for follow-up questions.
+
+Follow-ups such as "and how do I test that?" carry little to search for on
+their own: a fresh smart search on the bare text costs a round trip and often
+retrieves worse chunks than the previous turn did. The main agent therefore
+remembers, per sender, the last turn's search query and its top chunks (ids
+and full content, so compression sees the same code a search would return),
+and a local check decides for each new query:
+
+- reuse: the query follows up on the last turn and its new terms are covered
+  by the remembered chunks, so they are answered from again without searching
+- augment: the query follows up but asks for something the chunks only partly
+  cover, so a search runs with the query rewritten with the previous turn's
+  terms and its results are merged with the remembered chunks
+- fresh: a new topic (or nothing remembered), searched on its own
+
+A query only counts as a follow-up when it opens with a connective ("and ...",
+"what about ...") or points back at the last turn ("that", "it"); a short
+standalone query such as "chainlink vrf" is a new topic. Reused chunks keep
+the age of the turn that retrieved them, so a chain of follow-ups searches
+again once they are older than the TTL.
+
+Relevance uses the same hashed bag-of-words vectors as reranking (rerank.py)
+plus term coverage, so a decision takes about a millisecond.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple
+
+from compression import STOPWORDS
+from rerank import embed_texts
+
+REUSE = "reuse"
+AUGMENT = "augment"
+FRESH = "fresh"
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+# Words that point back at the previous turn ("how do I test that?")
+ANAPHORA = {"that", "this", "it", "its", "those", "these", "them", "they", "there", "same", "above", "previous"}
+# Openers of a continued question ("and what about ...")
+FOLLOW_UP_OPENERS = {"and", "also", "but", "so", "then", "ok", "okay", "now", "what about", "how about", "what if"}
+# Question filler that says nothing about the topic
+FILLER = {
+    "should", "does", "did", "which", "where", "when", "why", "need", "want", "get", "make", "would",
+    "could", "will", "any", "some", "about", "other", "also", "then", "now", "ok", "okay", "please",
+    "tell", "show", "explain", "more", "again", "but", "so", "if", "there", "way",
+}
+# Previous-turn terms carried into a rewritten query
+MAX_CARRIED_TERMS = 8
+
+def content_terms(text: str) -> List[str]:
+    """Lowercased non-stopword tokens, in order of first appearance"""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token not in STOPWORDS and token not in ANAPHORA and token not in FILLER and token not in terms:
+            terms.append(token)
+    return terms
+
+def is_follow_up(query: str) -> bool:
+    """Whether the query leans on the previous turn: it opens with a connective or refers back to it"""
+    tokens = _TOKEN.findall(query.lower())
+    if tokens and (tokens[0] in FOLLOW_UP_OPENERS or " ".join(tokens[:2]) in FOLLOW_UP_OPENERS):
+        return True
+    return bool(ANAPHORA & set(tokens))
+
+def rewrite_query(query: str, previous_query: str) -> str:
+    """Appends the previous turn's terms the query does not mention ("how do I test that? deploy contract hardhat")"""
+    own = set(content_terms(query))
+    carried = [t for t in content_terms(previous_query) if t not in own][:MAX_CARRIED_TERMS]
+    return f"{query} {' '.join(carried)}" if carried else query
+
+class TurnRetrieval(NamedTuple):
+    """What one turn retrieved"""
+    search_query: str
+    chunks: List[Dict[str, Any]]
+    terms: FrozenSet[str]
+    stored_at: float
+
+class RetrievalPlan(NamedTuple):
+    action: str  # REUSE, AUGMENT or FRESH
+    search_query: str  # Query to search (and rerank/compress) with
+    chunks: List[Dict[str, Any]]  # Remembered chunks to answer from (REUSE) or merge (AUGMENT)
+    similarity: float  # Best local similarity of the search query to a remembered chunk
+    coverage: float  # Share of the query's new terms found in the remembered chunks
+
+class RetrievalMemory:
+    """
+    Args:
+        max_sessions: Senders remembered (least recently used are dropped)
+        ttl_seconds: A turn older than this is not reused
+        min_similarity: Local similarity below which the remembered chunks count as unrelated
+        reuse_coverage: Share of new query terms the chunks must contain to be reused as they are
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800,
+        min_similarity: float = 0.15,
+        reuse_coverage: float = 0.75,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.reuse_coverage = reuse_coverage
+        self._turns: "OrderedDict[str, TurnRetrieval]" = OrderedDict()
+        self.decisions = {REUSE: 0, AUGMENT: 0, FRESH: 0}
+
+    def remember(self, sender: str, search_query: str, chunks: List[Dict[str, Any]], reused: bool = False):
+        """
+        Stores the chunks a turn answered from (replacing the sender's previous turn)
+
+        Args:
+            reused: The chunks came from this memory (REUSE), so they keep the age of the turn that retrieved them
+        """
+        if self.max_sessions <= 0 or not chunks:
+            return
+        stored_at = time.time()
+        previous = self._turns.get(sender)
+        if reused and previous is not None:
+            stored_at = previous.stored_at
+        compact = [
+            {
+                "id": chunk.get("id"),
+                "sponsorName": chunk.get("sponsorName", ""),
+                "score": chunk.get("score", 0),
+                "content": chunk.get("content", ""),
+            }
+            for chunk in chunks
+        ]
+        terms = frozenset(t for c in compact for t in _TOKEN.findall(c["content"].lower()))
+        self._turns[sender] = TurnRetrieval(search_query, compact, terms, stored_at)
+        self._turns.move_to_end(sender)
+        while len(self._turns) > self.max_sessions:
+            self._turns.popitem(last=False)
+
+    def forget(self, sender: str):
+        self._turns.pop(sender, None)
+
+    def plan(self, sender: str, query: str) -> RetrievalPlan:
+        """Decides whether the sender's last retrieval answers this query"""
+        plan = self._plan(sender, query)
+        self.decisions[plan.action] += 1
+        return plan
+
+    def _plan(self, sender: str, query: str) -> RetrievalPlan:
+        turn = self._turns.get(sender)
+        if turn is None or time.time() - turn.stored_at > self.ttl_seconds:
+            return RetrievalPlan(FRESH, query, [], 0.0, 0.0)
+
+        if not is_follow_up(query):
+            return RetrievalPlan(FRESH, query, [], 0.0, 0.0)
+
+        search_query = rewrite_query(query, turn.search_query)
+        similarity = float((embed_texts([c["content"] for c in turn.chunks]) @ embed_texts([search_query])[0]).max())
+
+        # Terms the previous turn did not ask about must show up in its chunks
+        new_terms = set(content_terms(query)) - set(content_terms(turn.search_query))
+        coverage = len(new_terms & turn.terms) / len(new_terms) if new_terms else 1.0
+
+        if similarity < self.min_similarity:
+            return RetrievalPlan(FRESH, search_query, [], similarity, coverage)
+        if coverage >= self.reuse_coverage:
+            return RetrievalPlan(REUSE, search_query, [dict(c) for c in turn.chunks], similarity, coverage)
+        return RetrievalPlan(AUGMENT, search_query, [dict(c) for c in turn.chunks], similarity, coverage)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self._turns), "decisions": dict(self.decisions)}
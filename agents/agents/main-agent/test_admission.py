@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", fake)
+    return fake
+
+def test_token_bucket_allows_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+    assert bucket.take() and bucket.take()
+    assert not bucket.take()
+    clock.now += 1
+    assert not bucket.take()
+    clock.now += 1
+    assert bucket.take()
+    clock.now += 100
+    assert bucket.is_full()
+    assert bucket.tokens == 2
+
+def test_rate_limited_sender_is_rejected(clock):
+    controller = AdmissionController(4, 4, sender_rate=0.1, sender_burst=1)
+
+    async def main():
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("a")
+        assert rejected.value.reason == "rate_limited"
+        await controller.acquire("b")  # Other senders have their own bucket
+
+    asyncio.run(main())
+    assert controller.stats()["rejected"] == {"rate_limited": 1, "queue_full": 0}
+
+def test_requests_queue_for_a_slot_and_priority_lane_goes_first():
+    controller = AdmissionController(1, 2, sender_rate=1, sender_burst=10, priority_senders={"vip"})
+    order = []
+
+    async def request(sender: str):
+        await controller.acquire(sender)
+        order.append(sender)
+
+    async def main():
+        await controller.acquire("first")
+        normal = asyncio.ensure_future(request("normal"))
+        vip = asyncio.ensure_future(request("vip"))
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == [1, 1]
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("late")
+        assert rejected.value.reason == "queue_full"
+        controller.release()
+        await vip
+        controller.release()
+        await normal
+        controller.release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(main())
+    assert order == ["vip", "normal"]
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(1, 2, sender_rate=1, sender_burst=10)
+
+    async def main():
+        await controller.acquire("first")
+        waiting = asyncio.ensure_future(controller.acquire("second"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert controller.queued == 0
+        controller.release()
+        assert controller.stats()["active"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+from chunk_index import ChunkIndex
+
+CHUNKS = [
+    {"id": "1", "sponsorName": "Hardhat", "content": "Deploy contracts with hardhat ignition to any network.", "vector": [0.1]},
+    {"id": "2", "sponsorName": "Chainlink", "content": "Request randomness from Chainlink VRF in your consumer contract."},
+    {"id": "3", "sponsorName": "Hardhat", "content": "Run hardhat test to execute the mocha test suite."},
+]
+
+def test_search_ranks_by_bm25_and_filters_by_term_match():
+    index = ChunkIndex(10)
+    index.add(CHUNKS)
+    results = index.search("deploy with hardhat", limit=5)
+    assert [r["id"] for r in results] == ["1", "3"]
+    assert results[0]["matched"] == 1.0
+    assert "vector" not in results[0]  # Only the stored fields are kept
+    assert [r["id"] for r in index.search("deploy with hardhat", min_match=0.8)] == ["1"]
+    assert index.search("solana anchor") == []
+
+def test_least_recently_served_chunks_are_evicted():
+    index = ChunkIndex(2)
+    index.add(CHUNKS[:2])
+    index.add(CHUNKS[:1])  # Served again: moves to the front
+    index.add(CHUNKS[2:])
+    assert len(index) == 2
+    assert index.search("chainlink vrf") == []
+    assert sorted(r["id"] for r in index.search("hardhat")) == ["1", "3"]
+
+def test_index_is_rebuilt_from_disk_and_shared_between_processes(tmp_path):
+    path = str(tmp_path / "chunk_index.db")
+    first = ChunkIndex(10, path)
+    first.add(CHUNKS[:2])
+    assert [r["id"] for r in ChunkIndex(10, path).search("chainlink vrf")] == ["2"]
+
+    other = ChunkIndex(10, path)
+    other.add(CHUNKS[2:])  # Another worker process serves a chunk
+    assert [r["id"] for r in first.search("mocha test suite")] == ["3"]
+
+    first.add(CHUNKS[:1])
+    assert len(ChunkIndex(2, path)) == 2  # A lower limit trims the table on load
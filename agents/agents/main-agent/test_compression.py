@@ -0,0 +1,40 @@
+from compression import compress_chunks, estimate_tokens, split_segments, truncate_segment
+
+def code_fence(lines: int, name: str = "client") -> str:
+    body = "\n".join(f"deploy_step_{i} = {name}.deploy(contract, gas_limit={i}, retries=3)  # step {i}" for i in range(lines))
+    return f"```python\n{body}\n```"
+
+def test_chunks_under_budget_are_unchanged():
+    chunks = [{"content": "Deploy with the CLI."}]
+    assert compress_chunks("how to deploy", chunks, 2000) == (chunks, 5, 5)
+
+def test_compressed_chunks_fit_the_budget():
+    chunks = [{"content": " ".join(f"Sentence {i} about deploy and contracts." for i in range(400))}]
+    compressed, before, after = compress_chunks("how to deploy", chunks, 500)
+    assert before > 500
+    assert 0 < after <= 500
+
+def test_oversized_code_fence_is_cut_not_dropped():
+    fence = code_fence(350)
+    assert estimate_tokens(fence) > 6000
+    compressed, _, after = compress_chunks("how to deploy", [{"content": fence}], 2000)
+    assert len(compressed) == 1
+    assert 0 < after <= 2000
+    content = compressed[0]["content"]
+    assert content.startswith("```python\n")
+    assert content.endswith("\n```")
+    assert content.count("```") == 2
+
+def test_every_chunk_keeps_a_segment_when_best_segments_overrun_the_budget():
+    chunks = [{"content": code_fence(100, f"client{i}"), "sponsorName": str(i)} for i in range(3)]
+    chunks.append({"content": "Deploy contracts with the hardhat plugin.", "sponsorName": "short"})
+    compressed, _, after = compress_chunks("how to deploy", chunks, 1000)
+    assert [c["sponsorName"] for c in compressed] == ["0", "1", "2", "short"]
+    assert after <= 1000
+
+def test_truncate_segment_closes_code_fences():
+    fence = split_segments(code_fence(50))[0][0]
+    cut = truncate_segment(fence, True, 100)
+    assert estimate_tokens(cut) + 1 <= 100
+    assert cut.endswith("\n```")
+    assert truncate_segment(fence, True, 5) == ""
@@ -0,0 +1,52 @@
+import retrieval_memory
+from retrieval_memory import AUGMENT, FRESH, REUSE, RetrievalMemory, is_follow_up, rewrite_query
+
+HARDHAT_CHUNKS = [
+    {"id": "c1", "sponsorName": "Hardhat", "score": 0.9, "content": "Deploy your contract with Hardhat: run npx hardhat run scripts/deploy.js --network sepolia."},
+    {"id": "c2", "sponsorName": "Hardhat", "score": 0.8, "content": "Test the contract deployment with npx hardhat test and the chai matchers.\n```js\n" + "expect(await token.balanceOf(owner)).to.equal(100);\n" * 60 + "```"},
+]
+
+def test_follow_ups_need_a_connective_or_a_reference_back():
+    assert is_follow_up("and how do I test that?")
+    assert is_follow_up("what about testnets")
+    assert is_follow_up("how do I verify it?")
+    assert not is_follow_up("chainlink vrf")
+    assert not is_follow_up("How do I deploy a contract with Hardhat?")
+
+def test_rewrite_query_carries_previous_terms():
+    assert rewrite_query("how do I test that?", "deploy contract hardhat") == "how do I test that? deploy contract hardhat"
+    assert rewrite_query("test the contract", "deploy contract") == "test the contract deploy"
+
+def test_covered_follow_up_reuses_full_chunks():
+    memory = RetrievalMemory()
+    memory.remember("s", "How do I deploy a contract with Hardhat?", HARDHAT_CHUNKS)
+    plan = memory.plan("s", "and how do I test that?")
+    assert plan.action == REUSE
+    assert [c["content"] for c in plan.chunks] == [c["content"] for c in HARDHAT_CHUNKS]
+    assert plan.chunks[1]["content"].endswith("```")
+
+def test_partly_covered_follow_up_augments():
+    memory = RetrievalMemory()
+    memory.remember("s", "How do I deploy a contract with Hardhat?", HARDHAT_CHUNKS)
+    plan = memory.plan("s", "and what about gas reporting for that contract on mainnet forks?")
+    assert plan.action == AUGMENT
+    assert "hardhat" in plan.search_query
+
+def test_short_standalone_query_is_a_new_topic():
+    memory = RetrievalMemory()
+    memory.remember("s", "How do I deploy a contract with Hardhat?", HARDHAT_CHUNKS)
+    plan = memory.plan("s", "chainlink vrf")
+    assert plan.action == FRESH
+    assert plan.search_query == "chainlink vrf"
+
+def test_reused_chunks_keep_their_original_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(retrieval_memory.time, "time", lambda: now[0])
+    memory = RetrievalMemory(ttl_seconds=60)
+    memory.remember("s", "How do I deploy a contract with Hardhat?", HARDHAT_CHUNKS)
+    now[0] += 40
+    plan = memory.plan("s", "and how do I test that?")
+    assert plan.action == REUSE
+    memory.remember("s", plan.search_query, plan.chunks, reused=True)
+    now[0] += 40
+    assert memory.plan("s", "and how do I test that?").action == FRESH
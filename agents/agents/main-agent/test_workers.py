@@ -0,0 +1,41 @@
+import asyncio
+import queue
+import threading
+
+from workers import WorkerPool
+
+class FakeProcess:
+    def __init__(self, alive: bool):
+        self.alive = alive
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+def test_crashed_worker_is_respawned_off_the_loop_and_held_messages_delivered():
+    pool = WorkerPool(1, {})
+    old_inbox, new_inbox = queue.Queue(), queue.Queue()
+    pool._inboxes, pool._processes = [old_inbox], [FakeProcess(alive=False)]
+    spawning = threading.Event()
+    release = threading.Event()
+
+    def spawn(index):
+        spawning.set()
+        release.wait(5)  # A spawn start that takes a while
+        return new_inbox, FakeProcess(alive=True)
+
+    pool._spawn = spawn
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        pool.dispatch("a", "first")
+        await loop.run_in_executor(None, spawning.wait, 5)
+        pool.dispatch("a", "second")  # The loop is not blocked while the replacement starts
+        assert new_inbox.empty()
+        release.set()
+        await asyncio.gather(*pool._respawn_tasks)
+        pool.dispatch("a", "third")
+
+    asyncio.run(main())
+    assert old_inbox.empty()
+    assert [new_inbox.get_nowait() for _ in range(3)] == [("a", "first"), ("a", "second"), ("a", "third")]
+    assert not pool._respawning and not pool._respawn_tasks
@@ -0,0 +1,220 @@
+"""
+Multi-worker mode for the main agent.
+
+The supervisor process runs the public uAgent (one address, one endpoint) and
+owns all network I/O with other agents. Incoming chat messages are handed to
+worker processes, each sender always to the same worker (crc32 of the address),
+so a conversation's turns stay ordered and its per-process caches stay warm.
+
+Workers run the normal message handlers with a WorkerContext whose `send`
+goes back to the supervisor over a queue. The supervisor remembers which
+worker sent each reasoning request (by session_id), so MeTTa replies are routed
+to the worker that is waiting for them. Conversation history is shared through
+the SQLite history store.
+
+Spawned workers re-import the agent module. Its import-time side effects check
+worker_name(): each worker writes its own capture and trace files, and only
+the processes that answer chats warm up their upstream connections.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_TRACKED_SESSIONS = 4096
+
+def worker_name() -> Optional[str]:
+    """'worker-<index>' inside a worker process, else None"""
+    # The process name is set before spawn re-imports the agent module (parent_process() only after)
+    name = multiprocessing.current_process().name
+    return name if name.startswith("worker-") else None
+
+class WorkerContext:
+    """The subset of uAgents Context the message handlers use, backed by the supervisor"""
+
+    def __init__(self, index: int, outbox):
+        self.index = index
+        self.logger = logging.getLogger(f"main-agent.worker-{index}")
+        self._outbox = outbox
+
+    async def send(self, destination: str, message: Any):
+        self._outbox.put((self.index, destination, message))
+
+    def report(self, metrics: Dict[str, Any]):
+        """Publishes this worker's metrics to the supervisor"""
+        self._outbox.put((self.index, None, metrics))
+
+def _worker_main(index: int, inbox, outbox, handlers: Dict[str, Callable], intervals: List[Tuple[float, Callable]]):
+    logging.basicConfig(level=logging.INFO, format=f"%(levelname)s: [worker-{index}]: %(message)s")
+    asyncio.run(_serve(index, inbox, outbox, handlers, intervals))
+
+async def _every(period: float, func: Callable, ctx: WorkerContext):
+    while True:
+        await asyncio.sleep(period)
+        try:
+            await func(ctx)
+        except Exception as e:
+            ctx.logger.error(f"Interval task {func.__name__} failed: {e}")
+
+async def _serve(index: int, inbox, outbox, handlers: Dict[str, Callable], intervals: List[Tuple[float, Callable]]):
+    """Worker loop: run a handler task for each message until told to stop"""
+    ctx = WorkerContext(index, outbox)
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    interval_tasks = [asyncio.create_task(_every(period, func, ctx)) for period, func in intervals]
+    while True:
+        item = await loop.run_in_executor(None, inbox.get)
+        if item is None:
+            break
+        sender, msg = item
+        handler = handlers.get(type(msg).__name__)
+        if handler is None:
+            ctx.logger.warning(f"No handler for {type(msg).__name__}")
+            continue
+        task = asyncio.create_task(handler(ctx, sender, msg))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    for task in interval_tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks)
+
+class WorkerPool:
+    """
+    Supervisor side of multi-worker mode
+
+    Args:
+        size: Number of worker processes
+        handlers: Message type name -> handler coroutine (must be module-level functions)
+        intervals: (period, coroutine) pairs run periodically in every worker with its WorkerContext
+    """
+
+    def __init__(self, size: int, handlers: Dict[str, Callable], intervals: List[Tuple[float, Callable]] = ()):
+        self.size = size
+        self.handlers = handlers
+        self.intervals = list(intervals)
+        # spawn: workers must not inherit the supervisor's event loop or sockets
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._outbox = self._mp_context.Queue()
+        self._inboxes: List[Any] = []
+        self._processes: List[Any] = []
+        # index -> messages held while a crashed worker's replacement is being spawned
+        self._respawning: Dict[int, List[Tuple[str, Any]]] = {}
+        self._respawn_tasks = set()
+        # session_id -> index of the worker waiting for its reasoning reply
+        self._session_owners: "OrderedDict[str, int]" = OrderedDict()
+        # Latest metrics published by each worker
+        self.worker_metrics: Dict[int, Dict[str, Any]] = {}
+
+    def _spawn(self, index: int):
+        inbox = self._mp_context.Queue()
+        process = self._mp_context.Process(
+            target=_worker_main, args=(index, inbox, self._outbox, self.handlers, self.intervals),
+            name=f"worker-{index}", daemon=True,
+        )
+        process.start()
+        return inbox, process
+
+    def start(self):
+        for index in range(self.size):
+            inbox, process = self._spawn(index)
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+
+    def shutdown(self):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+        self._outbox.put(None)  # Stops pump()
+
+    def worker_for(self, sender: str) -> int:
+        # crc32 is stable across restarts, unlike hash()
+        return zlib.crc32(sender.encode("utf-8")) % self.size
+
+    def _deliver(self, index: int, sender: str, msg: Any):
+        if index in self._respawning:
+            self._respawning[index].append((sender, msg))
+            return
+        if not self._processes[index].is_alive():
+            # Replace a crashed worker (messages it had in flight are lost). Starting a spawn
+            # process blocks until it is launched, so it runs off the supervisor's event loop
+            # and messages for this worker are held until the replacement's inbox exists
+            self._respawning[index] = [(sender, msg)]
+            task = asyncio.ensure_future(self._respawn(index))
+            self._respawn_tasks.add(task)
+            task.add_done_callback(self._respawn_tasks.discard)
+            return
+        self._inboxes[index].put((sender, msg))
+
+    async def _respawn(self, index: int):
+        loop = asyncio.get_running_loop()
+        try:
+            self._inboxes[index], self._processes[index] = await loop.run_in_executor(None, self._spawn, index)
+        except Exception as e:
+            logging.getLogger("main-agent.supervisor").error(f"Failed to respawn worker {index}: {e}")
+            # The next message retries; the held ones are lost like the crashed worker's
+            self._respawning.pop(index)
+            return
+        for item in self._respawning.pop(index):
+            self._inboxes[index].put(item)
+
+    def dispatch(self, sender: str, msg: Any):
+        """Hands a message to the worker assigned to its sender"""
+        self._deliver(self.worker_for(sender), sender, msg)
+
+    def dispatch_session(self, session_id: str, sender: str, msg: Any, release: bool = False) -> bool:
+        """
+        Hands a reasoning reply to the worker that sent the request
+
+        Args:
+            release: Forget the session afterwards (final reply)
+
+        Returns:
+            bool: False if no worker is waiting for this session
+        """
+        index = self._session_owners.pop(session_id, None) if release else self._session_owners.get(session_id)
+        if index is None:
+            return False
+        self._deliver(index, sender, msg)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.size,
+            "alive": sum(p.is_alive() for p in self._processes),
+            "pending_sessions": len(self._session_owners),
+            "worker_metrics": {str(i): m for i, m in sorted(self.worker_metrics.items())},
+        }
+
+    async def pump(self, send: Callable):
+        """
+        Forwards messages sent by workers (runs on the supervisor's event loop until shutdown)
+
+        Args:
+            send: Coroutine (destination, message) that sends from the agent's address
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._outbox.get)
+            if item is None:
+                break
+            index, destination, message = item
+            if destination is None:
+                self.worker_metrics[index] = message
+                continue
+            session_id: Optional[str] = getattr(message, "session_id", None)
+            if session_id:
+                self._session_owners[session_id] = index
+                self._session_owners.move_to_end(session_id)
+                while len(self._session_owners) > MAX_TRACKED_SESSIONS:
+                    self._session_owners.popitem(last=False)
+            try:
+                await send(destination, message)
+            except Exception as e:
+                logging.getLogger("main-agent.supervisor").error(f"Failed to forward message from worker {index}: {e}")
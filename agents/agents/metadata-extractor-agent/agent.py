@@ -3,16 +3,26 @@ Metadata Extractor Agent - ASI1 Powered
 Analyzes markdown documentation and extracts technical metadata automatically.
 Uses ASI1 API for intelligent content analysis.
 
-REST Endpoint: POST /analyze
+REST Endpoints:
+    POST /analyze                 Whole document in one request
+    POST /analyze/stream          Document in ordered parts, analyzed section by section as they arrive
+    POST /analyze/stream/close    Ends a stream and returns the merged metadata
 """
 
+import time
+_import_start = time.perf_counter()  # Module import time is logged at the end of the module
+import asyncio
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from uagents import Agent, Context, Model
-from openai import OpenAI
 from pydantic import Field
+from capture import NULL_RECORDING, TrafficCapture
+from sections import SectionBatch, SectionBatcher, merge_metadata
+from tracing import Tracer
+from warmup import Lazy, log_import_time, open_api_connection, start_warm_up
 
 # Load .env from the agent's directory
 agent_dir = Path(__file__).parent
@@ -20,10 +30,15 @@ dotenv_path = agent_dir / '.env'
 load_dotenv(dotenv_path=dotenv_path)
 
 # ASI1 Configuration (using OpenAI-compatible interface)
-client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key=os.getenv("ASI1_API_KEY")
-)
+def build_asi1_client():
+    # The openai SDK takes ~0.5s to import: it is loaded by the startup warm-up or on first use
+    from openai import OpenAI
+    return OpenAI(
+        base_url=os.getenv("ASI1_BASE_URL", "https://api.asi1.ai/v1"),
+        api_key=os.getenv("ASI1_API_KEY")
+    )
+
+asi1_client = Lazy(build_asi1_client)
 
 # Agent Configuration
 AGENT_NAME = "MetadataExtractorAgent"
@@ -33,6 +48,18 @@ agent = Agent(
     #endpoint=['http://localhost:8001/submit']
 )
 
+# Request/upstream capture for replay (enabled by TRAFFIC_CAPTURE_PATH)
+traffic = TrafficCapture.from_env("metadata-extractor")
+
+# Spans of each analysis (continuing the caller's trace when it sends a traceparent)
+tracer = Tracer.from_env("metadata-extractor")
+
+# Streamed documents (POST /analyze/stream): memory per stream stays below ~(STREAM_MAX_INFLIGHT + 1) x 2 x STREAM_BATCH_CHARS
+STREAM_BATCH_CHARS = int(os.getenv("STREAM_BATCH_CHARS", "48000"))  # Target characters per analyzed batch of sections (~12k tokens)
+STREAM_MAX_INFLIGHT = int(os.getenv("STREAM_MAX_INFLIGHT", "8"))  # ASI1 calls for batches at once (all streams); a stream's parts wait beyond this
+STREAM_MAX_OPEN = int(os.getenv("STREAM_MAX_OPEN", "16"))  # Streams open at once
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "300"))  # Seconds without a part before a stream is dropped
+
 class MarkdownAnalysisRequest(Model):
     """Request model for markdown analysis"""
     markdown_content: str = Field(
@@ -42,6 +69,28 @@ class MarkdownAnalysisRequest(Model):
         description="Original filename for context",
         default="unknown.md"
     )
+    traceparent: str = ""  # W3C trace context of the calling request
+
+class MarkdownStreamPart(Model):
+    """One part of a streamed document (parts are sent in order, seq 0, 1, 2, ...)"""
+    stream_id: str = Field(description="Client-chosen id of the stream (e.g. a UUID)")
+    seq: int = Field(description="Part number, starting at 0")
+    content: str = Field(description="The next characters of the markdown document")
+    file_name: str = "unknown.md"  # Original filename for context (read from the first part)
+    traceparent: str = ""  # W3C trace context of the calling request
+
+class MarkdownStreamProgress(Model):
+    """Response to each streamed part"""
+    stream_id: str = Field(description="Id of the stream")
+    received_chars: int = 0  # Characters received so far
+    sections: int = 0  # Markdown sections seen so far
+    batches_started: int = 0  # Batches of sections sent for analysis
+    batches_done: int = 0  # Batches analyzed
+    error: str = ""  # Why the part was rejected (empty if accepted)
+
+class MarkdownStreamClose(Model):
+    """Ends a stream"""
+    stream_id: str = Field(description="Id of the stream")
 
 class CodeSnippet(Model):
     """Extracted code snippet with context"""
@@ -77,6 +126,13 @@ class ExtractedMetadata(Model):
         default=[]
     )
 
+class StreamedMetadata(ExtractedMetadata):
+    """Merged metadata of a streamed document"""
+    stream_id: str = ""  # Id of the stream
+    sections: int = 0  # Markdown sections analyzed
+    batches: int = 0  # Batches the sections were analyzed in
+    error: str = ""  # Why the stream could not be closed (empty on success)
+
 METADATA_EXTRACTION_PROMPT = """Extract metadata from the markdown documentation as JSON.
 
 Return ONLY valid JSON (no markdown, no explanations) with these fields:
@@ -109,7 +165,38 @@ def estimate_tokens(text: str) -> int:
     """Estimate token count (rough: 1 token ≈ 4 chars)"""
     return len(text) // 4
 
-def analyze_markdown(markdown_content: str, file_name: str) -> dict:
+def parse_metadata_response(raw_content: str) -> dict:
+    """
+    Parses and normalizes the JSON metadata returned by ASI1
+
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+    """
+    content = raw_content.strip()
+
+    # Remove the markdown code block around the JSON if present (only the outer
+    # fence: code snippets inside the JSON may contain fences of their own)
+    if content.startswith("```"):
+        content = content[3:]
+        if content.startswith("json"):
+            content = content[4:]
+        end = content.rfind("```")
+        if end != -1:
+            content = content[:end]
+
+    metadata = json.loads(content)
+
+    # Validate and normalize
+    return {
+        "tech_stack": metadata.get("tech_stack", [])[:30],  # Max 30
+        "domain": metadata.get("domain", "Other"),
+        "keywords": metadata.get("keywords", [])[:20],  # Max 20
+        "languages": metadata.get("languages", []),
+        "description": metadata.get("description", "")[:300],  # Max 300 chars
+        "code_snippets": metadata.get("code_snippets", [])[:10]  # Max 10 snippets
+    }
+
+def analyze_markdown(markdown_content: str, file_name: str, recording=NULL_RECORDING) -> dict:
     """
     Analyzes markdown content using ASI1 API
 
@@ -118,6 +205,7 @@ def analyze_markdown(markdown_content: str, file_name: str) -> dict:
     Args:
         markdown_content: The markdown text to analyze
         file_name: Original filename for logging
+        recording: Traffic capture recording the ASI1 call is added to
 
     Returns:
         dict: Extracted metadata
@@ -145,48 +233,33 @@ def analyze_markdown(markdown_content: str, file_name: str) -> dict:
 
         # Call ASI1 API
         print(f"🔍 Calling ASI1 API (asi1-extended)...")
-        response = client.chat.completions.create(
-            model="asi1-extended",
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"{METADATA_EXTRACTION_PROMPT}\n\nFile: {file_name}\n\nMarkdown Content:\n{markdown_content}"
-                }
-            ],
-            max_tokens=8000  # ASI1 extended max generation limit is 8192
-        )
+        llm_start = time.time()
+        with tracer.span("asi1", model="asi1-extended", content_chars=len(markdown_content)) as llm_span:
+            response = asi1_client.get().chat.completions.create(
+                model="asi1-extended",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"{METADATA_EXTRACTION_PROMPT}\n\nFile: {file_name}\n\nMarkdown Content:\n{markdown_content}"
+                    }
+                ],
+                max_tokens=8000  # ASI1 extended max generation limit is 8192
+            )
+            if response.usage is not None:
+                llm_span.set(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
 
         # Parse JSON response
         raw_content = response.choices[0].message.content
+        recording.upstream("asi1", time.time() - llm_start, raw_content)
 
         if not raw_content:
             raise ValueError("ASI1 returned empty response")
 
-        content = raw_content.strip()
-
-        # Remove markdown code blocks if present
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-
-        metadata = json.loads(content)
-
-        # Validate and normalize
-        result = {
-            "tech_stack": metadata.get("tech_stack", [])[:30],  # Max 30
-            "domain": metadata.get("domain", "Other"),
-            "keywords": metadata.get("keywords", [])[:20],  # Max 20
-            "languages": metadata.get("languages", []),
-            "description": metadata.get("description", "")[:300],  # Max 300 chars
-            "code_snippets": metadata.get("code_snippets", [])[:10]  # Max 10 snippets
-        }
-
-        return result
+        return parse_metadata_response(raw_content)
 
     except json.JSONDecodeError as e:
         print(f"❌ JSON parsing error: {e}")
-        print(f"Response content: {content[:500]}")
+        print(f"Response content: {raw_content[:500]}")
         # Return empty metadata
         return {
             "tech_stack": [],
@@ -227,7 +300,10 @@ async def handle_analysis_request(ctx: Context, req: MarkdownAnalysisRequest) ->
     ctx.logger.info(f"📄 File: {req.file_name} ({len(req.markdown_content)} chars)")
 
     # Analyze the markdown
-    metadata = analyze_markdown(req.markdown_content, req.file_name)
+    recording = traffic.begin("analyze", req.dict())
+    with tracer.span("analyze", traceparent=req.traceparent, file_name=req.file_name):
+        metadata = analyze_markdown(req.markdown_content, req.file_name, recording)
+    recording.finish(metadata)
 
     ctx.logger.info(f"✅ Analysis complete!")
     ctx.logger.info(f"   - Tech Stack: {len(metadata['tech_stack'])} items")
@@ -239,13 +315,152 @@ async def handle_analysis_request(ctx: Context, req: MarkdownAnalysisRequest) ->
     # Return response directly (REST endpoint)
     return ExtractedMetadata(**metadata)
 
+# ============================================================================
+# Streaming ingestion
+# ============================================================================
+
+class IngestStream:
+    """
+    A document arriving in parts: complete batches of sections are analyzed
+    (in stream_executor) while later parts are still being uploaded
+    """
+
+    def __init__(self, stream_id: str, file_name: str, traceparent: str):
+        self.stream_id = stream_id
+        self.file_name = file_name
+        self.traceparent = traceparent
+        self.batcher = SectionBatcher(STREAM_BATCH_CHARS)
+        self.next_seq = 0
+        self.tasks = []  # One future per batch, in document order, resolving to (metadata, batch chars)
+        self.updated_at = time.time()
+        # Held while a part is fed and its batches started, and while the stream is finished, so
+        # batches are started in document order and a close waits for the parts already received
+        self.lock = asyncio.Lock()
+        self.closed = False
+
+    def progress(self, error: str = "") -> MarkdownStreamProgress:
+        return MarkdownStreamProgress(
+            stream_id=self.stream_id,
+            received_chars=self.batcher.received_chars,
+            sections=self.batcher.sections,
+            batches_started=len(self.tasks),
+            batches_done=sum(1 for t in self.tasks if t.done()),
+            error=error,
+        )
+
+    async def start(self, batches: list[SectionBatch]):
+        """Starts analyzing the batches, first waiting for a slot when STREAM_MAX_INFLIGHT are running"""
+        loop = asyncio.get_running_loop()
+        for batch in batches:
+            running = [t for t in self.tasks if not t.done()]
+            if len(running) >= STREAM_MAX_INFLIGHT:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            self.tasks.append(loop.run_in_executor(stream_executor, self.analyze, batch))
+
+    def analyze(self, batch: SectionBatch) -> tuple[dict, int]:
+        # Each batch is captured as an analyze request of its own, so streamed uploads replay like /analyze
+        name = f"{self.file_name} (part {batch.index + 1})"
+        recording = traffic.begin("analyze", {"markdown_content": batch.text, "file_name": name})
+        with tracer.span("analyze", traceparent=self.traceparent, file_name=name, sections=batch.sections):
+            metadata = analyze_markdown(batch.text, name, recording)
+        recording.finish(metadata)
+        return metadata, len(batch.text)
+
+    async def finish(self) -> dict:
+        """Analyzes the last batch and merges all results (called with the lock held)"""
+        self.closed = True
+        await self.start(self.batcher.close())
+        results = await asyncio.gather(*self.tasks)
+        return merge_metadata([metadata for metadata, _ in results], [chars for _, chars in results])
+
+def rejected_part(stream_id: str, error: str) -> MarkdownStreamProgress:
+    return MarkdownStreamProgress(stream_id=stream_id, error=error)
+
+# Open streams by id, and the threads their batches are analyzed in
+streams: dict[str, IngestStream] = {}
+stream_executor = ThreadPoolExecutor(max_workers=STREAM_MAX_INFLIGHT, thread_name_prefix="stream-analysis")
+
+@agent.on_rest_post("/analyze/stream", MarkdownStreamPart, MarkdownStreamProgress)
+async def handle_stream_part(ctx: Context, req: MarkdownStreamPart) -> MarkdownStreamProgress:
+    """
+    REST endpoint receiving one part of a streamed document
+
+    POST /analyze/stream
+    Body: { "stream_id": "...", "seq": 0, "content": "...", "file_name": "..." }
+    Returns: MarkdownStreamProgress JSON (error set if the part was rejected)
+
+    The response is delayed while STREAM_MAX_INFLIGHT batches of the stream
+    are being analyzed, which keeps a fast uploader from buffering the document.
+    A part resent with an already accepted seq is acknowledged without being
+    processed again.
+    """
+    stream = streams.get(req.stream_id)
+    if stream is None:
+        if req.seq != 0:
+            return rejected_part(req.stream_id, "unknown stream (expired or never started)")
+        if len(streams) >= STREAM_MAX_OPEN:
+            return rejected_part(req.stream_id, "too many open streams, retry shortly")
+        stream = streams[req.stream_id] = IngestStream(req.stream_id, req.file_name, req.traceparent)
+        ctx.logger.info(f"📥 Stream {req.stream_id} opened for {req.file_name}")
+    async with stream.lock:
+        if stream.closed:
+            return rejected_part(req.stream_id, "stream already closed")
+        if req.seq < stream.next_seq:
+            return stream.progress()
+        if req.seq > stream.next_seq:
+            return stream.progress(error=f"expected part {stream.next_seq}, got {req.seq}")
+        stream.next_seq += 1
+        stream.updated_at = time.time()
+        await stream.start(stream.batcher.feed(req.content))
+        return stream.progress()
+
+@agent.on_rest_post("/analyze/stream/close", MarkdownStreamClose, StreamedMetadata)
+async def handle_stream_close(ctx: Context, req: MarkdownStreamClose) -> StreamedMetadata:
+    """
+    REST endpoint ending a stream: analyzes the last batch and returns the merged metadata
+
+    POST /analyze/stream/close
+    Body: { "stream_id": "..." }
+    Returns: StreamedMetadata JSON (ExtractedMetadata plus stream counters)
+    """
+    stream = streams.pop(req.stream_id, None)
+    if stream is None:
+        return StreamedMetadata(**merge_metadata([], []), stream_id=req.stream_id, error="unknown stream (expired or never started)")
+    with tracer.span("analyze-stream", traceparent=stream.traceparent, file_name=stream.file_name) as span:
+        async with stream.lock:  # Parts received before the close are fed first
+            metadata = await stream.finish()
+        span.set(chars=stream.batcher.received_chars, sections=stream.batcher.sections, batches=len(stream.tasks))
+
+    ctx.logger.info(f"✅ Stream {req.stream_id} analyzed: {stream.batcher.received_chars:,} chars, {stream.batcher.sections} sections in {len(stream.tasks)} batches")
+    ctx.logger.info(f"   - Tech Stack: {len(metadata['tech_stack'])} items")
+    ctx.logger.info(f"   - Domain: {metadata['domain']}")
+    ctx.logger.info(f"   - Keywords: {len(metadata['keywords'])} items")
+    return StreamedMetadata(
+        **metadata,
+        stream_id=req.stream_id,
+        sections=stream.batcher.sections,
+        batches=len(stream.tasks),
+    )
+
+@agent.on_interval(period=60)
+async def drop_idle_streams(ctx: Context):
+    now = time.time()
+    for stream_id in [s for s, stream in streams.items() if now - stream.updated_at > STREAM_IDLE_TIMEOUT]:
+        del streams[stream_id]  # Batches still being analyzed finish and are discarded
+        ctx.logger.warning(f"⚠️ Dropped idle stream {stream_id}")
+
 @agent.on_event("startup")
 async def on_startup(ctx: Context):
     ctx.logger.info(f"🤖 {AGENT_NAME} started!")
     ctx.logger.info(f"📍 Agent address: {agent.address}")
-    ctx.logger.info(f"🌐 REST endpoint: POST /analyze")
+    ctx.logger.info(f"🌐 REST endpoints: POST /analyze, POST /analyze/stream, POST /analyze/stream/close")
     ctx.logger.info(f"🧠 Using ASI1 model: asi1-extended")
     ctx.logger.info(f"📝 Ready to analyze markdown documentation!")
 
+log_import_time(AGENT_NAME, _import_start)
+
+# Load the openai SDK and open the ASI1 connection before the first request
+start_warm_up(AGENT_NAME, [("ASI1 client", lambda: open_api_connection(asi1_client.get()))])
+
 if __name__ == "__main__":
     agent.run()
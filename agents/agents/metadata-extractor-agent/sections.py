@@ -0,0 +1,143 @@
+"""
+Section-incremental splitting and metadata merging for streamed documents.
+
+A document streamed in parts (POST /analyze/stream) is never assembled in
+memory: SectionBatcher consumes the parts as they arrive and emits batches of
+whole markdown sections as soon as enough of them are complete, so each batch
+can be analyzed while the rest of the document is still uploading.
+merge_metadata combines the per-batch results into one ExtractedMetadata.
+
+- A batch ends before a heading (levels 1-3, outside code fences) once it
+  holds batch_chars
+- Longer sections are cut at a line boundary outside code fences past 1.5x
+  batch_chars, or at any line past 2x, so no batch exceeds ~2x batch_chars
+- Only the current batch and the trailing partial line are buffered
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+_HEADING = re.compile(r"^#{1,3}\s")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+IMPORTANCE_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+class SectionBatch(NamedTuple):
+    index: int
+    text: str
+    sections: int  # Sections starting in this batch
+
+class SectionBatcher:
+    """
+    Args:
+        batch_chars: Target batch size in characters
+    """
+
+    def __init__(self, batch_chars: int):
+        self.batch_chars = batch_chars
+        self.received_chars = 0
+        self.sections = 0
+        self.batches = 0
+        self._tail = ""  # Partial last line of the parts received so far
+        self._lines: List[str] = []
+        self._chars = 0
+        self._batch_sections = 0
+        self._in_fence = False
+
+    def feed(self, text: str) -> List[SectionBatch]:
+        """Consumes the next part of the document and returns the batches it completed"""
+        self.received_chars += len(text)
+        ready = []
+        lines = (self._tail + text).split("\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self._add(line + "\n", ready)
+        while len(self._tail) > self.batch_chars:
+            # A line longer than a batch (minified or generated content) is cut as it is
+            line, self._tail = self._tail[:self.batch_chars], self._tail[self.batch_chars:]
+            self._add(line, ready)
+        return ready
+
+    def close(self) -> List[SectionBatch]:
+        """Returns the last batch, with whatever followed the final newline"""
+        ready = []
+        if self._tail:
+            self._add(self._tail, ready)
+            self._tail = ""
+        if self._chars:
+            ready.append(self._emit())
+        return ready
+
+    def _add(self, line: str, ready: List[SectionBatch]):
+        heading = not self._in_fence and _HEADING.match(line) is not None
+        if self._chars and (
+            (heading and self._chars >= self.batch_chars)
+            or (self._chars >= 1.5 * self.batch_chars and not self._in_fence)
+            or self._chars >= 2 * self.batch_chars
+        ):
+            ready.append(self._emit())
+        if heading or (self.sections == 0 and line.strip()):  # Text before the first heading is a section too
+            self.sections += 1
+            self._batch_sections += 1
+        if _FENCE.match(line):
+            self._in_fence = not self._in_fence
+        self._lines.append(line)
+        self._chars += len(line)
+
+    def _emit(self) -> SectionBatch:
+        batch = SectionBatch(self.batches, "".join(self._lines), self._batch_sections)
+        self.batches += 1
+        self._lines = []
+        self._chars = 0
+        self._batch_sections = 0
+        return batch
+
+def _ranked(values: List[List[str]], limit: Optional[int] = None) -> List[str]:
+    """Case-insensitive union, most frequent first (ties in order of first appearance)"""
+    counts: Counter = Counter()
+    first: Dict[str, str] = {}
+    for items in values:
+        for item in items:
+            if not isinstance(item, str) or not item.strip():
+                continue
+            key = item.strip().lower()
+            counts[key] += 1
+            first.setdefault(key, item.strip())
+    order = {key: i for i, key in enumerate(first)}
+    return [first[key] for key in sorted(first, key=lambda k: (-counts[k], order[k]))][:limit]
+
+def merge_metadata(results: List[Dict[str, Any]], weights: List[int]) -> Dict[str, Any]:
+    """
+    Merges the metadata of a document's batches (in document order)
+
+    Args:
+        results: Metadata of each batch (parse_metadata_response output)
+        weights: Characters of each batch, used to vote on the domain
+
+    Returns:
+        dict: Metadata with the same fields and limits as a single analysis
+    """
+    domains: Counter = Counter()
+    for metadata, weight in zip(results, weights):
+        domain = metadata.get("domain") or "Other"
+        if domain != "Other":
+            domains[domain] += weight
+    snippets = []
+    seen_code = set()
+    for metadata in results:
+        for snippet in metadata.get("code_snippets", []):
+            code = snippet.get("code", "") if isinstance(snippet, dict) else ""
+            if code and code not in seen_code:
+                seen_code.add(code)
+                snippets.append(snippet)
+    snippets.sort(key=lambda s: IMPORTANCE_ORDER.get(str(s.get("importance", "")).lower(), len(IMPORTANCE_ORDER)))
+    return {
+        "tech_stack": _ranked([m.get("tech_stack", []) for m in results], 30),
+        "domain": domains.most_common(1)[0][0] if domains else "Other",
+        "keywords": _ranked([m.get("keywords", []) for m in results], 20),
+        "languages": _ranked([m.get("languages", []) for m in results]),
+        # The opening section usually introduces the document
+        "description": next((m["description"] for m in results if m.get("description")), "")[:300],
+        "code_snippets": snippets[:10],
+    }
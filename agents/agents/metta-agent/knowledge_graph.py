@@ -0,0 +1,138 @@
+"""
+Index-time knowledge graph of the documentation catalog.
+
+Built once per catalog version from the indexed projects/sponsors and their
+docs: which technologies each entity uses, which packages its setup requires,
+and its ordered setup steps. Relations are triples `(relation subject object)`,
+snapshotted to disk as JSON. The reasoning pool loads them into each MeTTa
+interpreter as `(relation <rel> "<subject>" "<object>")` atoms, where the
+`catalog-insight` rules of the rule base query them per request instead of
+re-deriving the same relations from text (see reasoning.py).
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_SETUP_STEPS = 10
+
+# Numbered list items ("1. Install ...", "2) Deploy ...") and shell commands inside code fences
+_NUMBERED_STEP = re.compile(r"^\s*\d+[.)]\s+(.+)$")
+_SHELL_COMMAND = re.compile(r"^\s*\$?\s*((?:npm|npx|yarn|pnpm|pip|pip3|forge|cargo|go|brew|curl|git)\s+.+)$")
+
+# Package installs that become `requires` relations
+_INSTALL_COMMAND = re.compile(
+    r"\b(?:npm\s+(?:install|i|add)|yarn\s+add|pnpm\s+add|pip3?\s+install|forge\s+install|cargo\s+add|go\s+get)\s+([^\n`]+)"
+)
+
+def catalog_version(projects: List[Dict[str, Any]], sponsors: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint of the catalog: changes whenever an entity is added, removed or re-indexed
+    """
+    entries = []
+    for entity in projects + sponsors:
+        entries.append("|".join(str(entity.get(key) or "") for key in (
+            "id", "updated_at", "updatedAt", "last_indexed_at", "lastIndexedAt", "document_count", "documentCount",
+        )))
+    return hashlib.sha256("\n".join(sorted(entries)).encode("utf-8")).hexdigest()[:16]
+
+def extract_setup_steps(chunks: List[Dict[str, Any]]) -> List[str]:
+    """
+    Extracts ordered setup steps (numbered items and shell commands) from doc chunks in retrieval order
+    """
+    steps = []
+    seen = set()
+    for chunk in chunks:
+        in_fence = False
+        for line in chunk.get("content", "").splitlines():
+            if line.lstrip().startswith("```"):
+                in_fence = not in_fence
+                continue
+            match = (_SHELL_COMMAND if in_fence else _NUMBERED_STEP).match(line)
+            if not match:
+                continue
+            step = match.group(1).strip()[:200]
+            if step not in seen:
+                seen.add(step)
+                steps.append(step)
+            if len(steps) >= MAX_SETUP_STEPS:
+                return steps
+    return steps
+
+def extract_requirements(steps: List[str]) -> List[str]:
+    """
+    Packages installed by the setup steps (flags such as --save-dev are dropped)
+    """
+    requirements = []
+    for step in steps:
+        for match in _INSTALL_COMMAND.finditer(step):
+            for package in match.group(1).split():
+                if not package.startswith("-") and package not in requirements:
+                    requirements.append(package)
+    return requirements
+
+def build_graph(
+    version: str,
+    projects: List[Dict[str, Any]],
+    sponsors: List[Dict[str, Any]],
+    docs_by_entity: Dict[str, List[Dict[str, Any]]],
+) -> "KnowledgeGraph":
+    """
+    Builds the relation triples for every catalog entity
+
+    Args:
+        version: Catalog version the graph is built for
+        projects: Rows from GET /projects (snake_case)
+        sponsors: Rows from GET /sponsors (camelCase)
+        docs_by_entity: Entity name -> doc chunks retrieved for its setup
+    """
+    relations: List[Tuple[str, str, str]] = []
+    entities = [
+        (p.get("name", ""), "project", p.get("domain"), p.get("tech_stack") or [])
+        for p in projects
+    ] + [
+        (s.get("name", ""), "sponsor", s.get("category"), s.get("techStack") or [])
+        for s in sponsors
+    ]
+    for name, kind, domain, tech_stack in entities:
+        if not name:
+            continue
+        relations.append(("is-a", name, kind))
+        if domain:
+            relations.append(("domain", name, domain))
+        for tech in tech_stack:
+            relations.append(("uses", name, tech))
+        steps = extract_setup_steps(docs_by_entity.get(name, []))
+        for idx, step in enumerate(steps, start=1):
+            relations.append(("setup-step", name, f"{idx}. {step}"))
+        for package in extract_requirements(steps):
+            relations.append(("requires", name, package))
+    return KnowledgeGraph(version, relations)
+
+class KnowledgeGraph:
+    """A catalog version and its relation triples"""
+
+    def __init__(self, version: str, relations: List[Tuple[str, str, str]]):
+        self.version = version
+        self.relations = relations
+
+    def __len__(self) -> int:
+        return len(self.relations)
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "relations": self.relations}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["KnowledgeGraph"]:
+        """Loads a snapshot, or returns None if there is no usable snapshot"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            return cls(data["version"], [tuple(r) for r in data["relations"]])
+        except (OSError, ValueError, KeyError):
+            return None
@@ -1,11 +1,13 @@
+import time
+_import_start = time.perf_counter()  # Module import time is logged at the end of the module
 from datetime import datetime, timezone
+import asyncio
 import os
+import sys
 import requests
-import json
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from uuid import uuid4
-from hyperon import MeTTa
-from uagents import Agent, Context, Protocol
+from uagents import Agent, Context, Model, Protocol
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement,
     ChatMessage,
@@ -13,12 +15,66 @@ from uagents_core.contrib.protocols.chat import (
     TextContent,
     chat_protocol_spec,
 )
+from capture import TrafficCapture
+from tracing import Tracer
+from reasoning import REASONING_ERROR_PREFIX, LRUCache, reasoning_fingerprint, resolve_chunks
+from knowledge_graph import KnowledgeGraph, build_graph, catalog_version
+from micro_batcher import MicroBatcher
+from reasoning_pool import PoolBusyError, ReasoningPool, ReasoningTimeoutError
+from warmup import log_import_time, warm_up
 
 # API Configuration
 NEXT_API_BASE = os.getenv("NEXT_API_BASE_URL", "https://agent-eth-global.vercel.app/api")
 PROJECTS_URL = f"{NEXT_API_BASE}/projects"
+SPONSORS_URL = f"{NEXT_API_BASE}/sponsors"
 DOCS_SEARCH_URL = f"{NEXT_API_BASE}/docs/smart-search"  # Smart search with ASI1-powered query understanding
 
+# Reasoning pool settings
+METTA_WORKERS = int(os.getenv("METTA_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 = reason inline in the agent process
+METTA_MAX_PENDING = int(os.getenv("METTA_MAX_PENDING", "32"))  # Queued + running jobs before rejecting new ones
+METTA_JOB_TIMEOUT = float(os.getenv("METTA_JOB_TIMEOUT", "10"))  # Seconds before a runaway evaluation is killed
+METTA_CHUNK_CACHE_SIZE = int(os.getenv("METTA_CHUNK_CACHE_SIZE", "2048"))  # Pre-scanned chunks kept by content hash
+METTA_RESULT_CACHE_SIZE = int(os.getenv("METTA_RESULT_CACHE_SIZE", "512"))  # Memoized reasoning results
+METTA_METRICS_INTERVAL = float(os.getenv("METTA_METRICS_INTERVAL", "60"))  # Seconds between cache metric logs
+
+# Micro-batching settings
+METTA_BATCH_WINDOW_MS = float(os.getenv("METTA_BATCH_WINDOW_MS", "20"))  # Max latency added while gathering a batch (0 = no batching)
+METTA_BATCH_MAX_SIZE = int(os.getenv("METTA_BATCH_MAX_SIZE", "16"))  # Flush as soon as this many requests are waiting
+
+# Knowledge graph settings
+METTA_GRAPH_PATH = os.getenv("METTA_GRAPH_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_graph.json"))
+METTA_GRAPH_REFRESH = float(os.getenv("METTA_GRAPH_REFRESH", "3600"))  # Seconds between catalog version checks
+
+# Reasoning wire protocol (must match the models in main-agent/agent.py)
+class ChunkRef(Model):
+    chunk_id: str
+    content_hash: str
+    content: Optional[str] = None  # Omitted when the sender believes we already have this chunk
+    source: str = ""  # Sponsor/project the chunk belongs to (knowledge graph subject)
+
+class ReasoningRequest(Model):
+    session_id: str
+    query: str
+    chunks: List[ChunkRef]
+    traceparent: str = ""
+
+class ChunkBodiesRequest(Model):
+    session_id: str
+    missing_hashes: List[str]
+
+class ReasoningResponse(Model):
+    session_id: str
+    reasoning: str = ""
+    error: str = ""
+
+class CacheMetrics(Model):
+    chunk_cache: Dict[str, Any]
+    result_cache: Dict[str, Any]
+    batching: Dict[str, Any]
+    pending_jobs: int
+    graph_version: str
+    graph_relations: int
+
 
 # Initialize agent
 AGENT_NAME = "MeTTaReasoningAgent"
@@ -44,51 +100,88 @@ def get_projects():
         print(f"Error fetching projects: {e}")
         return []
 
-def text_to_metta_facts(chunks):
-    """
-    Converts documentation chunks into MeTTa facts
-    """
-    facts = []
-    for idx, chunk in enumerate(chunks):
-        content = chunk.get("content", "")
-        # Clean text and truncate to avoid overflow
-        snippet = content.replace("\n", " ").replace('"', "'")[:400]
-        facts.append(f'!(doc chunk-{idx} "{snippet}")')
-    return "\n".join(facts)
-
-def metta_reasoning(query: str, chunks: List[Dict[str, Any]]) -> str:
-    """
-    Generates symbolic reasoning using MeTTa
-    """
+def get_sponsors():
+    """Gets the list of sponsors from the API"""
     try:
-        base_facts = text_to_metta_facts(chunks)
-        reasoning_template = f"""
-    (bind $q "{query}")
-
-    ; Add facts
-    {base_facts}
-
-    ; Search for symbolic relationships and dependencies
-    (match &self
-        (doc $id $content)
-        (if (and (find $content "import") (find $content "deploy"))
-            (print "This section likely involves both import and deployment steps"))
-        (if (find $content "API")
-            (print "This section mentions API integration"))
-        (if (find $content "contract")
-            (print "This section involves smart contracts"))
-    )
-    """
-        result = metta.run(reasoning_template)
-        return "\n".join(str(r) for r in result)
+        response = requests.get(SPONSORS_URL, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        # The endpoint returns {"sponsors": [...]}
+        if isinstance(data, dict) and "sponsors" in data:
+            return data["sponsors"]
+        return []
+    except Exception as e:
+        print(f"Error fetching sponsors: {e}")
+        return []
+
+def search_setup_docs(name: str) -> List[Dict[str, Any]]:
+    """Retrieves the indexed doc chunks describing how to set up a sponsor"""
+    try:
+        response = requests.post(
+            DOCS_SEARCH_URL,
+            json={"query": f"How do I install and set up {name}?", "limit": 10},
+            timeout=30,
+        )
+        response.raise_for_status()
+        results = response.json().get("results", [])
+        return [r for r in results if r.get("sponsorName") == name]
     except Exception as e:
-        return f"Error in MeTTa reasoning: {str(e)}"
+        print(f"Error searching setup docs for {name}: {e}")
+        return []
+
+def ingest_knowledge_graph(current_version: Optional[str] = None) -> Optional[KnowledgeGraph]:
+    """
+    Builds and snapshots the knowledge graph if the catalog version changed
+
+    Returns:
+        KnowledgeGraph: The new graph, or None if the catalog is unchanged or unavailable
+    """
+    projects = get_projects()
+    sponsors = get_sponsors()
+    if not projects and not sponsors:
+        return None
+    version = catalog_version(projects, sponsors)
+    if version == current_version:
+        return None
+    docs_by_entity = {s["name"]: search_setup_docs(s["name"]) for s in sponsors if s.get("name")}
+    graph = build_graph(version, projects, sponsors, docs_by_entity)
+    graph.save(METTA_GRAPH_PATH)
+    return graph
+
+# Worker processes each hold a MeTTa interpreter with the rule base preloaded
+reasoning_pool = ReasoningPool(
+    size=METTA_WORKERS,
+    max_pending=METTA_MAX_PENDING,
+    job_timeout=METTA_JOB_TIMEOUT,
+)
+
+# Requests arriving within the batch window share one interpreter run
+reasoning_batcher = MicroBatcher(
+    reasoning_pool.run,
+    window=METTA_BATCH_WINDOW_MS / 1000,
+    max_size=METTA_BATCH_MAX_SIZE,
+)
+
+# Content-addressed cache: chunk content hash -> features detected by the pre-scan
+chunk_cache = LRUCache(METTA_CHUNK_CACHE_SIZE)
+
+# Precomputed catalog relations, loaded from the last snapshot (rebuilt when the catalog changes)
+# and queried as atoms in every interpreter of the reasoning pool
+knowledge_graph = KnowledgeGraph.load(METTA_GRAPH_PATH) or KnowledgeGraph("", [])
+reasoning_pool.set_graph(knowledge_graph.version, knowledge_graph.relations)
 
-# Initialize MeTTa
-metta = MeTTa()
+# Memoized reasoning: fingerprint of query features + chunk hashes -> reasoning text
+result_cache = LRUCache(METTA_RESULT_CACHE_SIZE)
+
+# Request capture for replay (enabled by TRAFFIC_CAPTURE_PATH); chunks are recorded as their features
+traffic = TrafficCapture.from_env("metta")
+
+# Spans continue the main agent's trace (traceparent of the ReasoningRequest)
+tracer = Tracer.from_env("metta")
 
 # Protocol setup
 chat_proto = Protocol(spec=chat_protocol_spec)
+reasoning_proto = Protocol(name="MeTTaReasoning", version="0.1.0")
 
 def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
     """Create a text chat message."""
@@ -103,7 +196,7 @@ def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
 
 @chat_proto.on_message(ChatMessage)
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
-    """Handle incoming chat messages and process reasoning queries."""
+    """Handle incoming chat messages (reasoning requests use the MeTTaReasoning protocol)."""
     ctx.logger.info(f"📩 New message from {sender}")
     ctx.storage.set(str(ctx.session), sender)
     await ctx.send(
@@ -113,60 +206,105 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 
     for item in msg.content:
         if isinstance(item, TextContent):
-            text = item.text.strip()
-            ctx.logger.info(f"🔎 Message received from {sender}: {text[:100]}...")
-
-            # Check if this is a reasoning request
-            if text.startswith("REASONING_REQUEST:"):
-                # Parse: REASONING_REQUEST:session_id:json_data
-                parts = text.split(":", 2)
-                if len(parts) != 3:
-                    ctx.logger.error("Invalid REASONING_REQUEST format")
-                    return
-
-                session_id = parts[1]
-                json_data = parts[2]
-
-                ctx.logger.info(f"🧠 Processing reasoning request for session {session_id}")
-
-                try:
-                    # Parse JSON data
-                    data = json.loads(json_data)
-                    query = data.get("query", "")
-                    chunks = data.get("chunks", [])
-
-                    ctx.logger.info(f"📝 Query: {query}")
-                    ctx.logger.info(f"📚 Analyzing {len(chunks)} chunks")
-
-                    # Perform MeTTa reasoning
-                    reasoning = metta_reasoning(query, chunks)
-                    ctx.logger.info(f"✅ Reasoning completed")
-
-                    # Send response back with same session_id
-                    response_text = f"REASONING_RESPONSE:{session_id}:{reasoning}"
-                    response_msg = ChatMessage(
-                        timestamp=datetime.now(timezone.utc),
-                        msg_id=uuid4(),
-                        content=[TextContent(text=response_text)]
-                    )
-
-                    await ctx.send(sender, response_msg)
-                    ctx.logger.info(f"📤 Sent reasoning response for session {session_id}")
-
-                except json.JSONDecodeError as e:
-                    ctx.logger.error(f"❌ Invalid JSON in reasoning request: {e}")
-                except Exception as e:
-                    ctx.logger.error(f"❌ Error processing reasoning: {e}")
-                    # Send error response
-                    error_text = f"REASONING_RESPONSE:{session_id}:Error: {str(e)}"
-                    error_msg = ChatMessage(
-                        timestamp=datetime.now(timezone.utc),
-                        msg_id=uuid4(),
-                        content=[TextContent(text=error_text)]
-                    )
-                    await ctx.send(sender, error_msg)
-            else:
-                ctx.logger.info(f"ℹ️ Non-reasoning message from {sender}: {text[:50]}...")
+            ctx.logger.info(f"ℹ️ Non-reasoning message from {sender}: {item.text.strip()[:50]}...")
+
+@reasoning_proto.on_message(ReasoningRequest)
+async def handle_reasoning_request(ctx: Context, sender: str, msg: ReasoningRequest):
+    """Handle a reasoning request, asking for the bodies of any chunks not in the cache."""
+    with tracer.span("reasoning", traceparent=msg.traceparent, session_id=msg.session_id, chunks=len(msg.chunks)) as span:
+        session_id = msg.session_id
+        ctx.logger.info(f"🧠 Processing reasoning request for session {session_id}")
+        ctx.logger.info(f"📝 Query: {msg.query}")
+
+        # Reasoning is deterministic for a given chunk set and graph version: answer repeats from the memo
+        entities = list(dict.fromkeys(ref.source for ref in msg.chunks if ref.source))
+        fingerprint = reasoning_fingerprint(
+            msg.query, [(ref.chunk_id, ref.content_hash) for ref in msg.chunks], entities, knowledge_graph.version
+        )
+        cached = result_cache.get(fingerprint)
+        if cached is not None:
+            ctx.logger.info(f"⚡ Reasoning cache hit for session {session_id}")
+            span.set(cache_hit=True)
+            await ctx.send(sender, ReasoningResponse(session_id=session_id, reasoning=cached))
+            return
+
+        # Resolve every chunk to its pre-scanned features, scanning (verified) bodies we were sent
+        try:
+            chunks, missing_hashes = resolve_chunks(
+                chunk_cache, [(ref.chunk_id, ref.content_hash, ref.content) for ref in msg.chunks]
+            )
+        except ValueError as e:
+            ctx.logger.warning(f"⚠️ Rejected reasoning request for session {session_id}: {e}")
+            span.set(error=str(e))
+            await ctx.send(sender, ReasoningResponse(session_id=session_id, error=str(e)))
+            return
+
+        if missing_hashes:
+            ctx.logger.info(f"📥 Requesting {len(missing_hashes)} unknown chunk bodies for session {session_id}")
+            span.set(missing_chunks=len(missing_hashes))
+            await ctx.send(sender, ChunkBodiesRequest(session_id=session_id, missing_hashes=missing_hashes))
+            return
+
+        ctx.logger.info(f"📚 Analyzing {len(chunks)} chunks ({len(chunk_cache)} cached)")
+        recording = traffic.begin("reasoning", {
+            "query": msg.query,
+            "chunks": [[chunk_id, content_hash, sorted(features)] for chunk_id, content_hash, features in chunks],
+            "entities": entities,
+        })
+
+        try:
+            # Perform MeTTa reasoning in the worker pool, batched with concurrent requests
+            with tracer.span("metta-run", chunks=len(chunks)):
+                reasoning = await reasoning_batcher.submit(msg.query, chunks, entities)
+            if not reasoning.startswith(REASONING_ERROR_PREFIX):
+                result_cache.put(fingerprint, reasoning)
+            recording.finish(reasoning)
+            ctx.logger.info(f"✅ Reasoning completed")
+            await ctx.send(sender, ReasoningResponse(session_id=session_id, reasoning=reasoning))
+            ctx.logger.info(f"📤 Sent reasoning response for session {session_id}")
+        except (PoolBusyError, ReasoningTimeoutError) as e:
+            # Overload or runaway evaluation: tell the caller right away
+            ctx.logger.warning(f"⚠️ Reasoning not completed for session {session_id}: {e}")
+            recording.finish({"error": str(e)})
+            span.set(error=str(e))
+            await ctx.send(sender, ReasoningResponse(session_id=session_id, error=str(e)))
+        except Exception as e:
+            ctx.logger.error(f"❌ Error processing reasoning: {e}")
+            recording.finish({"error": str(e)})
+            span.set(error=str(e))
+            await ctx.send(sender, ReasoningResponse(session_id=session_id, error=str(e)))
+
+def cache_metrics() -> CacheMetrics:
+    return CacheMetrics(
+        chunk_cache=chunk_cache.stats(),
+        result_cache=result_cache.stats(),
+        batching=reasoning_batcher.stats(),
+        pending_jobs=reasoning_pool.pending,
+        graph_version=knowledge_graph.version,
+        graph_relations=len(knowledge_graph),
+    )
+
+@agent.on_rest_get("/metrics", CacheMetrics)
+async def handle_metrics(ctx: Context) -> CacheMetrics:
+    return cache_metrics()
+
+@agent.on_interval(period=METTA_METRICS_INTERVAL)
+async def log_cache_metrics(ctx: Context):
+    metrics = cache_metrics()
+    ctx.logger.info(f"📊 Result cache: {metrics.result_cache}")
+    ctx.logger.info(f"📊 Chunk cache: {metrics.chunk_cache}")
+    ctx.logger.info(f"📊 Batching: {metrics.batching}")
+
+@agent.on_interval(period=METTA_GRAPH_REFRESH)
+async def refresh_knowledge_graph(ctx: Context):
+    """Rebuilds the knowledge graph in the background when the catalog version changes"""
+    global knowledge_graph
+    loop = asyncio.get_running_loop()
+    graph = await loop.run_in_executor(None, ingest_knowledge_graph, knowledge_graph.version)
+    if graph is not None:
+        knowledge_graph = graph
+        reasoning_pool.set_graph(graph.version, graph.relations)
+        ctx.logger.info(f"🕸️ Knowledge graph rebuilt: version {graph.version}, {len(graph)} relations")
 
 @chat_proto.on_message(ChatAcknowledgement)
 async def handle_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
@@ -180,9 +318,30 @@ async def on_startup(ctx: Context):
     ctx.logger.info(f"📚 Conectado a Next.js API: {NEXT_API_BASE}")
     ctx.logger.info(f"🔍 Projects URL: {PROJECTS_URL}")
     ctx.logger.info(f"📖 Docs Search URL: {DOCS_SEARCH_URL}")
+    ctx.logger.info(f"🕸️ Knowledge graph: version {knowledge_graph.version or 'none'}, {len(knowledge_graph)} relations")
+    reasoning_pool.start()
+    ctx.logger.info(f"⚙️ Reasoning pool: {METTA_WORKERS} worker(s), max {METTA_MAX_PENDING} pending, {METTA_JOB_TIMEOUT}s timeout")
+    ctx.logger.info(f"⚙️ Micro-batching: {METTA_BATCH_WINDOW_MS}ms window, up to {METTA_BATCH_MAX_SIZE} requests per batch")
+    # Build the interpreters and run the rule base once before the first request
+    await warm_up(ctx.logger, [("MeTTa interpreters", reasoning_pool.warm_up)])
+
+@agent.on_event("shutdown")
+async def on_shutdown(ctx: Context):
+    reasoning_pool.shutdown()
 
-# Register the protocol
+# Register the protocols
 agent.include(chat_proto, publish_manifest=True)
+agent.include(reasoning_proto)
+
+log_import_time(AGENT_NAME, _import_start)
 
 if __name__ == "__main__":
-    agent.run()
+    if "--ingest" in sys.argv:
+        # Ingestion mode: build the knowledge graph snapshot for the current catalog and exit
+        graph = ingest_knowledge_graph(knowledge_graph.version)
+        if graph is None:
+            print(f"Knowledge graph up to date (version {knowledge_graph.version or 'none'})")
+        else:
+            print(f"Knowledge graph written to {METTA_GRAPH_PATH}: version {graph.version}, {len(graph)} relations")
+    else:
+        agent.run()
@@ -0,0 +1,76 @@
+"""
+Micro-batching of reasoning requests.
+
+Requests arriving within a short window are gathered and evaluated together in
+one interpreter run (shared chunks are deduplicated by the reasoner), then the
+results are handed back to each waiting request. A batch is flushed when its
+window expires or it reaches its maximum size, so the added latency never
+exceeds the window.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from reasoning import ChunkFeatures, ReasoningJob
+
+class MicroBatcher:
+    """
+    Gathers reasoning jobs into batches
+
+    Args:
+        run_batch: Coroutine that evaluates a list of jobs and returns one result per job
+        window: Seconds to wait for more jobs after the first one arrives (0 disables batching)
+        max_size: Flush as soon as this many jobs are waiting
+    """
+
+    def __init__(self, run_batch: Callable[[List[ReasoningJob]], Awaitable[List[str]]], window: float, max_size: int):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_size = max_size
+        self._waiting: List[Tuple[ReasoningJob, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()  # Running batches (the loop only keeps weak references to tasks)
+        self.batches = 0
+        self.jobs = 0
+
+    async def submit(self, query: str, chunks: List[ChunkFeatures], entities: List[str] = ()) -> str:
+        """Queues a job for the next batch and waits for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append(((query, chunks, list(entities)), future))
+        if len(self._waiting) >= self.max_size or self.window <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._waiting = self._waiting, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[ReasoningJob, asyncio.Future]]):
+        self.batches += 1
+        self.jobs += len(batch)
+        try:
+            results = await self.run_batch([job for job, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "avg_batch_size": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "waiting": len(self._waiting),
+        }
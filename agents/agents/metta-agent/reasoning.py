@@ -0,0 +1,329 @@
+"""
+MeTTa reasoning core for the MeTTa Reasoning Agent.
+
+The rule base is parsed once, when the interpreter is built. Each run
+only inserts compact feature facts such as `(mentions chunk-<hash> deploy)` as atoms
+through the hyperon API and removes them again once the insights have been
+collected. The features come from a single-pass Python pre-scan over the full
+chunk text, so MeTTa never has to scan raw documentation.
+
+The catalog knowledge graph lives in the same space as
+`(relation <rel> "<subject>" "<object>")` atoms, loaded once per graph version,
+and the catalog insights for the entities a request cites are derived from it
+by the `catalog-insight` rules.
+
+hyperon is imported by the functions that build and use interpreters, so the
+agent process (which reasons in worker processes) never loads it at startup.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from hyperon import MeTTa
+    from hyperon.atoms import Atom
+
+# Feature vocabulary: feature symbol -> terms that signal it in a chunk
+FEATURE_TERMS = {
+    "import": ("import",),
+    "deploy": ("deploy",),
+    "api": ("API",),
+    "contract": ("contract",),
+}
+
+# One alternation over every term, scanned in a single pass by the regex engine
+_TERM_TO_FEATURE = {term: feature for feature, terms in FEATURE_TERMS.items() for term in terms}
+_FEATURE_PATTERN = re.compile(
+    "|".join(re.escape(term) for term in sorted(_TERM_TO_FEATURE, key=len, reverse=True))
+)
+
+# Prefix of results produced when reasoning failed (never memoized)
+REASONING_ERROR_PREFIX = "Error in MeTTa reasoning"
+
+# Rule base - parsed a single time per interpreter
+RULE_BASE = """
+; Symbolic relationships between a documentation chunk and its detected features
+(= (insight $id)
+   (match &self (, (mentions $id import) (mentions $id deploy))
+      "This section likely involves both import and deployment steps"))
+
+(= (insight $id)
+   (match &self (mentions $id api)
+      "This section mentions API integration"))
+
+(= (insight $id)
+   (match &self (mentions $id contract)
+      "This section involves smart contracts"))
+
+; Catalog insights about a project/sponsor, derived from the knowledge graph relations
+(= (catalog-insight $entity)
+   (match &self (relation uses $entity $tech) (uses $tech)))
+
+(= (catalog-insight $entity)
+   (match &self (relation requires $entity $package) (requires $package)))
+
+(= (catalog-insight $entity)
+   (match &self (relation setup-step $entity $step) (setup-step $step)))
+
+(= (catalog-insight $entity)
+   (match &self (, (relation uses $entity $tech) (relation is-a $other sponsor) (relation uses $other $tech))
+      (if (== $entity $other) (empty) (shares-tech $other $tech))))
+"""
+
+def build_metta() -> "MeTTa":
+    """
+    Creates a MeTTa interpreter with the rule base loaded
+    """
+    from hyperon import MeTTa
+    metta = MeTTa()
+    metta.run(RULE_BASE)
+    return metta
+
+# A chunk as seen by the reasoner: its id in the request, its content hash and its detected features
+ChunkFeatures = Tuple[str, str, FrozenSet[str]]
+
+# A knowledge graph relation: (relation, subject, object)
+Relation = Tuple[str, str, str]
+
+# One reasoning job: the query, its chunks and the catalog entities (sponsors/projects) they come from
+ReasoningJob = Tuple[str, List[ChunkFeatures], List[str]]
+
+class LRUCache:
+    """Bounded least-recently-used mapping with hit/miss/eviction counters"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self._data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+def scan_features(text: str) -> FrozenSet[str]:
+    """
+    Detects which vocabulary features a text mentions in one pass over the full text
+    """
+    found = set()
+    for match in _FEATURE_PATTERN.finditer(text):
+        found.add(_TERM_TO_FEATURE[match.group(0)])
+        if len(found) == len(FEATURE_TERMS):
+            break
+    return frozenset(found)
+
+def content_hash(content: str) -> str:
+    """Content address of a chunk (must match chunk_hash() in main-agent/agent.py)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def resolve_chunks(cache: LRUCache, refs: List[Tuple[str, str, Optional[str]]]) -> Tuple[List[ChunkFeatures], List[str]]:
+    """
+    Resolves chunk references to their pre-scanned features
+
+    Bodies are only scanned and cached after they are checked against the hash
+    they were sent with, so a request cannot bind a hash to another chunk's
+    features (the cache and the reasoning memo are keyed by that hash).
+
+    Args:
+        cache: Content hash -> detected features
+        refs: (chunk_id, content_hash, content) triples; content is None when the sender believes it is cached
+
+    Returns:
+        tuple: The resolved chunks and the hashes whose bodies are unknown
+
+    Raises:
+        ValueError: A body does not match its content hash
+    """
+    chunks = []
+    missing_hashes = []
+    for chunk_id, chunk_hash, content in refs:
+        features = cache.get(chunk_hash)
+        if features is None and content is not None:
+            if content_hash(content) != chunk_hash:
+                raise ValueError(f"Content of {chunk_id} does not match its hash")
+            features = scan_features(content)
+            cache.put(chunk_hash, features)
+        if features is None:
+            missing_hashes.append(chunk_hash)
+        else:
+            chunks.append((chunk_id, chunk_hash, features))
+    return chunks, missing_hashes
+
+def reasoning_fingerprint(query: str, chunk_hashes: List[Tuple[str, str]], entities: List[str] = (), graph_version: str = "") -> str:
+    """
+    Fingerprint of everything a reasoning result depends on
+
+    Args:
+        query: The user's query (only its detected features are relevant)
+        chunk_hashes: (chunk_id, content_hash) pairs in request order
+        entities: Catalog entities the chunks come from, in request order
+        graph_version: Version of the knowledge graph the catalog insights come from
+    """
+    parts = [",".join(sorted(scan_features(query))), graph_version, *entities]
+    parts.extend(f"{chunk_id}={content_hash}" for chunk_id, content_hash in chunk_hashes)
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def feature_facts(chunks: Dict[str, FrozenSet[str]]) -> List[Tuple[str, List["Atom"]]]:
+    """
+    Converts pre-scanned chunks into MeTTa feature facts
+
+    Args:
+        chunks: Content hash -> detected features (each distinct chunk appears once)
+
+    Returns:
+        list: (content_hash, atoms) pairs with one `(mentions <chunk> feature)` atom per detected feature
+    """
+    from hyperon import E, S
+    return [
+        (content_hash, [E(S("mentions"), S(f"chunk-{content_hash}"), S(feature)) for feature in sorted(features)])
+        for content_hash, features in chunks.items()
+    ]
+
+def relation_atoms(relations: List[Relation]) -> List["Atom"]:
+    """
+    Converts knowledge graph relations into `(relation <rel> "<subject>" "<object>")` atoms
+
+    Entity kinds of `is-a` relations are symbols (`sponsor`, `project`) so rules can match them.
+    """
+    from hyperon import E, S, ValueAtom
+    return [
+        E(S("relation"), S(relation), ValueAtom(subject), S(obj) if relation == "is-a" else ValueAtom(obj))
+        for relation, subject, obj in relations
+    ]
+
+def load_relations(metta: "MeTTa", loaded: List["Atom"], relations: List[Relation]) -> List["Atom"]:
+    """
+    Replaces the relation atoms of a previous graph version in the interpreter space
+
+    Returns:
+        list: The atoms now loaded (pass them back in on the next update)
+    """
+    space = metta.space()
+    for atom in loaded:
+        space.remove_atom(atom)
+    atoms = relation_atoms(relations)
+    for atom in atoms:
+        space.add_atom(atom)
+    return atoms
+
+def _setup_step_number(step: str) -> int:
+    number = step.split(".", 1)[0]
+    return int(number) if number.isdigit() else 0
+
+def catalog_insights(metta: "MeTTa", entity: str) -> List[str]:
+    """
+    Reasoning lines for one catalog entity, from its `catalog-insight` results (empty if it is not in the graph)
+    """
+    from hyperon import E, S, ValueAtom
+    found: Dict[str, List[Tuple[str, ...]]] = {}
+    for result in metta.evaluate_atom(E(S("catalog-insight"), ValueAtom(entity))):
+        kind, *values = result.get_children()
+        found.setdefault(str(kind), []).append(tuple(value.get_object().value for value in values))
+
+    lines = []
+    uses = sorted(tech for (tech,) in found.get("uses", []))
+    if uses:
+        lines.append(f"{entity} uses: {', '.join(uses)}")
+    requires = sorted(package for (package,) in found.get("requires", []))
+    if requires:
+        lines.append(f"{entity} setup requires: {', '.join(requires)}")
+    steps = sorted((step for (step,) in found.get("setup-step", [])), key=_setup_step_number)
+    if steps:
+        lines.append(f"{entity} setup order: " + " → ".join(steps))
+    shared: Dict[str, List[str]] = {}
+    for other, tech in found.get("shares-tech", []):
+        shared.setdefault(other, []).append(tech)
+    if shared:
+        lines.append(f"{entity} shares technologies with: " + ", ".join(
+            f"{other} ({', '.join(sorted(techs))})" for other, techs in sorted(shared.items())
+        ))
+    return lines
+
+def batch_reasoning(metta: "MeTTa", jobs: List[ReasoningJob]) -> List[str]:
+    """
+    Generates symbolic reasoning for several requests in one interpreter run
+
+    Chunks and entities shared between jobs are evaluated once. Chunk facts are
+    added to the interpreter space for the duration of the call only, so the
+    preloaded rule base (and knowledge graph) is shared safely between runs.
+
+    Returns:
+        list: One reasoning text per job, in job order
+    """
+    from hyperon import E, S
+    unique_chunks = {
+        content_hash: features
+        for _, chunks, _ in jobs
+        for _, content_hash, features in chunks
+    }
+    space = metta.space()
+    facts = feature_facts(unique_chunks)
+    try:
+        for _, atoms in facts:
+            for atom in atoms:
+                space.add_atom(atom)
+
+        insights = {}
+        for content_hash, atoms in facts:
+            insights[content_hash] = [
+                result.get_object().value
+                for result in (metta.evaluate_atom(E(S("insight"), S(f"chunk-{content_hash}"))) if atoms else [])
+            ]
+
+        catalog = {
+            entity: catalog_insights(metta, entity)
+            for entity in dict.fromkeys(entity for _, _, entities in jobs for entity in entities)
+        }
+
+        results = []
+        for _, chunks, entities in jobs:
+            lines = [
+                f"{chunk_id}: {insight}"
+                for chunk_id, content_hash, _ in chunks
+                for insight in insights[content_hash]
+            ]
+            graph_lines = [line for entity in entities for line in catalog[entity]]
+            if graph_lines:
+                lines += ["Knowledge graph:", *graph_lines]
+            results.append("\n".join(lines))
+        return results
+    except Exception as e:
+        return [f"{REASONING_ERROR_PREFIX}: {str(e)}"] * len(jobs)
+    finally:
+        for _, atoms in facts:
+            for atom in atoms:
+                space.remove_atom(atom)
+
+def metta_reasoning(metta: "MeTTa", query: str, chunks: List[ChunkFeatures], entities: List[str] = ()) -> str:
+    """
+    Generates symbolic reasoning using MeTTa for a single request
+    """
+    return batch_reasoning(metta, [(query, chunks, list(entities))])[0]
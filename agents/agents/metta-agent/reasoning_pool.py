@@ -0,0 +1,193 @@
+"""
+Process pool for MeTTa reasoning jobs.
+
+Each worker process owns a warmed-up MeTTa interpreter with the rule base
+preloaded, so reasoning runs off the agent's event loop and across cores.
+The knowledge graph is loaded into each interpreter's space and sent to a
+worker again only when its version changes.
+The pool bounds how many jobs may be pending at once and kills (and replaces)
+any worker whose job exceeds the per-job timeout.
+"""
+
+import asyncio
+import multiprocessing
+from typing import List, Optional, Tuple
+from reasoning import FEATURE_TERMS, ReasoningJob, Relation, batch_reasoning, build_metta, load_relations
+
+# Exercises every rule once, so warm-up pays the interpreter's first-evaluation costs
+WARMUP_JOB: ReasoningJob = ("warm up", [("chunk-0", "warm-up", frozenset(FEATURE_TERMS))], ["warm-up"])
+
+# A knowledge graph version and its relations
+Graph = Tuple[str, List[Relation]]
+
+class PoolBusyError(Exception):
+    """Raised when the pending-job limit is reached"""
+
+class ReasoningTimeoutError(Exception):
+    """Raised when a job exceeds the per-job timeout (its worker is killed)"""
+
+def _worker_main(conn):
+    """Worker process loop: build the interpreter once, then serve batches (with any graph update) until told to stop"""
+    metta = build_metta()
+    graph_atoms = []
+    conn.send("ready")
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        graph, jobs = message
+        if graph is not None:
+            graph_atoms = load_relations(metta, graph_atoms, graph[1])
+        conn.send(batch_reasoning(metta, jobs))
+
+class _Worker:
+    """A worker process and the parent end of its pipe"""
+
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.graph_version: Optional[str] = None  # Knowledge graph version loaded in its interpreter
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.kill()
+
+class ReasoningPool:
+    """
+    Runs MeTTa reasoning in worker processes
+
+    Args:
+        size: Number of worker processes (0 runs reasoning inline in the agent process)
+        max_pending: Maximum number of queued + running jobs before new jobs are rejected
+        job_timeout: Seconds a single job may run before its worker is killed
+        warmup_timeout: Seconds a new worker may take to build its interpreter
+    """
+
+    def __init__(self, size: int, max_pending: int, job_timeout: float, warmup_timeout: float = 60.0):
+        self.size = size
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.warmup_timeout = warmup_timeout
+        # spawn: the agent process already runs threads (uAgents, warm-up), which fork would copy mid-state
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._metta = None
+        self._metta_graph_atoms = []
+        self._metta_graph_version: Optional[str] = None
+        self._graph: Graph = ("", [])
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def set_graph(self, version: str, relations: List[Relation]):
+        """Sets the knowledge graph; each interpreter loads it before its next batch"""
+        self._graph = (version, relations)
+
+    def start(self):
+        """Starts the workers (must be called from the agent's event loop)"""
+        if self.size <= 0:
+            return  # The inline interpreter is built by warm_up() or the first run()
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            worker = _Worker(self._mp_context)
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+    async def warm_up(self):
+        """Waits for every interpreter to be built and runs a small batch through it"""
+        if self.size <= 0:
+            await self.run([WARMUP_JOB])
+            return
+        loop = asyncio.get_running_loop()
+        workers = [await self._idle.get() for _ in self._workers]
+
+        async def warm(worker: _Worker):
+            try:
+                await loop.run_in_executor(None, self._roundtrip, worker, [WARMUP_JOB])
+                return worker
+            except (ReasoningTimeoutError, EOFError, OSError):
+                return await loop.run_in_executor(None, self._replace, worker)
+
+        for worker in await asyncio.gather(*(warm(worker) for worker in workers)):
+            self._idle.put_nowait(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Kills a worker and starts a fresh one in its place (blocking: runs in a thread)"""
+        worker.kill()
+        replacement = _Worker(self._mp_context)
+        self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+    def _roundtrip(self, worker: _Worker, jobs: List[ReasoningJob]) -> List[str]:
+        """Sends a batch to a worker and waits for the results (runs in a thread)"""
+        if not worker.ready:
+            if not worker.conn.poll(self.warmup_timeout):
+                raise ReasoningTimeoutError(f"MeTTa worker not ready after {self.warmup_timeout}s")
+            worker.conn.recv()
+            worker.ready = True
+        graph = self._graph
+        worker.conn.send((graph if worker.graph_version != graph[0] else None, jobs))
+        if not worker.conn.poll(self.job_timeout):
+            raise ReasoningTimeoutError(f"MeTTa reasoning exceeded {self.job_timeout}s")
+        results = worker.conn.recv()
+        worker.graph_version = graph[0]
+        return results
+
+    async def run(self, jobs: List[ReasoningJob]) -> List[str]:
+        """
+        Runs a batch of reasoning jobs in one interpreter run and returns one result per job
+
+        Raises:
+            PoolBusyError: If the batch would take the queued + running jobs past max_pending
+            ReasoningTimeoutError: If the batch exceeded job_timeout
+        """
+        if self._pending + len(jobs) > self.max_pending:
+            raise PoolBusyError(f"MeTTa reasoning queue is full ({self._pending} of {self.max_pending} jobs pending)")
+
+        self._pending += len(jobs)
+        try:
+            if self.size <= 0:
+                if self._metta is None:
+                    self._metta = build_metta()
+                version, relations = self._graph
+                if self._metta_graph_version != version:
+                    self._metta_graph_atoms = load_relations(self._metta, self._metta_graph_atoms, relations)
+                    self._metta_graph_version = version
+                return batch_reasoning(self._metta, jobs)
+
+            worker = await self._idle.get()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, self._roundtrip, worker, jobs)
+            except (ReasoningTimeoutError, EOFError, OSError):
+                # Runaway evaluation or dead worker: kill it and put a fresh one in its place
+                worker = await loop.run_in_executor(None, self._replace, worker)
+                raise
+            finally:
+                self._idle.put_nowait(worker)
+        finally:
+            self._pending -= len(jobs)
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+import pytest
+
+from micro_batcher import MicroBatcher
+from reasoning_pool import PoolBusyError, ReasoningPool
+
+def test_batches_are_split_at_max_size():
+    batches = []
+
+    async def run_batch(jobs):
+        batches.append([query for query, *_ in jobs])
+        return [f"result {query}" for query, *_ in jobs]
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window=0.05, max_size=3)
+        return await asyncio.gather(*(batcher.submit(str(i), []) for i in range(7))), batcher
+
+    results, batcher = asyncio.run(main())
+    assert results == [f"result {i}" for i in range(7)]
+    assert batches == [["0", "1", "2"], ["3", "4", "5"], ["6"]]
+    assert batcher.stats()["batches"] == 3
+
+def test_batch_failure_reaches_every_waiting_request():
+    async def run_batch(jobs):
+        raise PoolBusyError("full")
+
+    async def main():
+        batcher = MicroBatcher(run_batch, window=0.01, max_size=4)
+        return await asyncio.gather(*(batcher.submit(str(i), []) for i in range(2)), return_exceptions=True)
+
+    assert all(isinstance(result, PoolBusyError) for result in asyncio.run(main()))
+
+def test_running_batches_are_referenced_until_done():
+    release = None
+
+    async def run_batch(jobs):
+        await release.wait()
+        return ["done"] * len(jobs)
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        batcher = MicroBatcher(run_batch, window=0, max_size=4)
+        submitted = asyncio.ensure_future(batcher.submit("q", []))
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        release.set()
+        assert await submitted == "done"
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+
+    asyncio.run(main())
+
+def test_pending_limit_counts_jobs_not_batches():
+    pool = ReasoningPool(size=1, max_pending=4, job_timeout=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def roundtrip(worker, jobs):
+        started.set()
+        release.wait(5)
+        return ["ok"] * len(jobs)
+
+    pool._roundtrip = roundtrip
+
+    async def main():
+        pool._idle = asyncio.Queue()
+        pool._idle.put_nowait(object())
+        loop = asyncio.get_running_loop()
+        first = asyncio.ensure_future(pool.run([("q", [], [])] * 3))
+        await loop.run_in_executor(None, started.wait, 5)
+        assert pool.pending == 3
+        with pytest.raises(PoolBusyError):
+            await pool.run([("q", [], [])] * 2)
+        release.set()
+        assert await first == ["ok"] * 3
+        assert pool.pending == 0
+
+    asyncio.run(main())
+
+def test_inline_pool_enforces_the_pending_limit():
+    pool = ReasoningPool(size=0, max_pending=2, job_timeout=1)
+    with pytest.raises(PoolBusyError):
+        asyncio.run(pool.run([("q", [], [])] * 3))
@@ -0,0 +1,56 @@
+import asyncio
+
+from knowledge_graph import build_graph
+from reasoning import batch_reasoning, build_metta, catalog_insights, load_relations
+from reasoning_pool import ReasoningPool
+
+SPONSORS = [
+    {"name": "Chainlink", "techStack": ["Solidity", "JavaScript"]},
+    {"name": "Pyth", "techStack": ["Solidity"]},
+]
+PROJECTS = [{"name": "Swapper", "tech_stack": ["Solidity"]}]
+DOCS = {"Chainlink": [{"content": "1. Create a subscription\n```bash\nnpm install @chainlink/contracts\n```\n2. Deploy the consumer"}]}
+
+def test_catalog_insights_are_derived_from_relation_atoms():
+    graph = build_graph("v1", PROJECTS, SPONSORS, DOCS)
+    metta = build_metta()
+    load_relations(metta, [], graph.relations)
+    assert catalog_insights(metta, "Chainlink") == [
+        "Chainlink uses: JavaScript, Solidity",
+        "Chainlink setup requires: @chainlink/contracts",
+        "Chainlink setup order: 1. Create a subscription → 2. npm install @chainlink/contracts → 3. Deploy the consumer",
+        "Chainlink shares technologies with: Pyth (Solidity)",
+    ]
+    # Projects are not offered as sponsors sharing a technology
+    assert catalog_insights(metta, "Pyth") == [
+        "Pyth uses: Solidity",
+        "Pyth shares technologies with: Chainlink (Solidity)",
+    ]
+    assert catalog_insights(metta, "Unknown") == []
+
+def test_reloading_relations_replaces_the_previous_graph():
+    metta = build_metta()
+    loaded = load_relations(metta, [], build_graph("v1", [], SPONSORS, {}).relations)
+    load_relations(metta, loaded, build_graph("v2", [], SPONSORS[1:], {}).relations)
+    assert catalog_insights(metta, "Chainlink") == []
+    assert catalog_insights(metta, "Pyth") == ["Pyth uses: Solidity"]
+
+def test_batch_reasoning_appends_catalog_insights_of_each_job():
+    metta = build_metta()
+    load_relations(metta, [], build_graph("v1", [], SPONSORS, {}).relations)
+    chunks = [("chunk-0", "h0", frozenset({"api"}))]
+    with_entity, without_entity = batch_reasoning(metta, [("q", chunks, ["Pyth"]), ("q", chunks, [])])
+    assert with_entity == "\n".join([
+        "chunk-0: This section mentions API integration",
+        "Knowledge graph:",
+        "Pyth uses: Solidity",
+        "Pyth shares technologies with: Chainlink (Solidity)",
+    ])
+    assert without_entity == "chunk-0: This section mentions API integration"
+
+def test_inline_pool_loads_each_graph_version():
+    pool = ReasoningPool(size=0, max_pending=4, job_timeout=1)
+    pool.set_graph("v1", build_graph("v1", [], SPONSORS[:1], {}).relations)
+    assert asyncio.run(pool.run([("q", [], ["Chainlink"])])) == ["Knowledge graph:\nChainlink uses: JavaScript, Solidity"]
+    pool.set_graph("v2", [])
+    assert asyncio.run(pool.run([("q", [], ["Chainlink"])])) == [""]
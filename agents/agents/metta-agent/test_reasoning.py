@@ -0,0 +1,44 @@
+import pytest
+
+from reasoning import LRUCache, content_hash, reasoning_fingerprint, resolve_chunks
+
+def test_resolve_chunks_scans_and_caches_verified_bodies():
+    cache = LRUCache(8)
+    body = "deploy the contract with the API key"
+    chunks, missing = resolve_chunks(cache, [("chunk-0", content_hash(body), body)])
+    assert missing == []
+    assert chunks == [("chunk-0", content_hash(body), frozenset({"deploy", "contract", "api"}))]
+    assert cache.get(content_hash(body)) == frozenset({"deploy", "contract", "api"})
+
+def test_resolve_chunks_reports_unknown_hashes():
+    chunks, missing = resolve_chunks(LRUCache(8), [("chunk-0", "abc", None)])
+    assert chunks == []
+    assert missing == ["abc"]
+
+def test_resolve_chunks_rejects_body_that_does_not_match_its_hash():
+    cache = LRUCache(8)
+    victim = content_hash("import the SDK")
+    with pytest.raises(ValueError):
+        resolve_chunks(cache, [("chunk-0", victim, "Deploy the contract")])
+    assert len(cache) == 0
+
+def test_fingerprint_changes_with_everything_the_result_depends_on():
+    chunks = [("chunk-0", "h0"), ("chunk-1", "h1")]
+    base = reasoning_fingerprint("how do I deploy?", chunks, ["Hardhat"], "v1")
+    # Only the query's features matter
+    assert reasoning_fingerprint("deploy steps please", chunks, ["Hardhat"], "v1") == base
+    assert reasoning_fingerprint("how do I import it?", chunks, ["Hardhat"], "v1") != base
+    assert reasoning_fingerprint("how do I deploy?", chunks[::-1], ["Hardhat"], "v1") != base
+    assert reasoning_fingerprint("how do I deploy?", [("chunk-0", "h0"), ("chunk-1", "h2")], ["Hardhat"], "v1") != base
+    assert reasoning_fingerprint("how do I deploy?", chunks, ["Pyth"], "v1") != base
+    assert reasoning_fingerprint("how do I deploy?", chunks, ["Hardhat"], "v2") != base
+
+def test_lru_cache_evicts_least_recently_used_and_counts():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_rate": 0.667}
@@ -6,13 +6,17 @@ Uses ASI1 API for intelligent query interpretation.
 REST Endpoint: POST /understand
 """
 
+import time
+_import_start = time.perf_counter()  # Module import time is logged at the end of the module
 import os
 import json
 from pathlib import Path
 from dotenv import load_dotenv
 from uagents import Agent, Context, Model
-from openai import OpenAI
 from pydantic import Field
+from capture import NULL_RECORDING, TrafficCapture
+from tracing import Tracer
+from warmup import Lazy, log_import_time, open_api_connection, start_warm_up
 
 # Load .env from the agent's directory
 agent_dir = Path(__file__).parent
@@ -20,10 +24,15 @@ dotenv_path = agent_dir / '.env'
 load_dotenv(dotenv_path=dotenv_path)
 
 # ASI1 Configuration (using OpenAI-compatible interface)
-client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key=os.getenv("ASI1_API_KEY")
-)
+def build_asi1_client():
+    # The openai SDK takes ~0.5s to import: it is loaded by the startup warm-up or on first use
+    from openai import OpenAI
+    return OpenAI(
+        base_url=os.getenv("ASI1_BASE_URL", "https://api.asi1.ai/v1"),
+        api_key=os.getenv("ASI1_API_KEY")
+    )
+
+asi1_client = Lazy(build_asi1_client)
 
 # Agent Configuration
 AGENT_NAME = "QueryUnderstandingAgent"
@@ -35,6 +44,12 @@ agent = Agent(
     mailbox=True
 )
 
+# Request/upstream capture for replay (enabled by TRAFFIC_CAPTURE_PATH)
+traffic = TrafficCapture.from_env("query-understanding")
+
+# Spans continue the main agent's trace (traceparent forwarded by the smart search route)
+tracer = Tracer.from_env("query-understanding")
+
 class ProjectContext(Model):
     """Context about available projects"""
     id: str = Field(description="Project UUID")
@@ -52,6 +67,7 @@ class QueryAnalysisRequest(Model):
         description="List of available projects with metadata",
         default=[]
     )
+    traceparent: str = ""  # W3C trace context of the calling request
 
 class QueryIntent(Model):
     """Response model with extracted query intent and filters"""
@@ -138,7 +154,7 @@ Analyze the user's query and extract search intent and filters.
 - Empty arrays/strings are valid when nothing is detected
 
 **JSON Schema:**
-{
+{{
   "wants_code": true/false,
   "languages": ["..."],
   "technologies": ["..."],
@@ -146,84 +162,110 @@ Analyze the user's query and extract search intent and filters.
   "domain": "...",
   "relevant_project_ids": ["uuid1", "uuid2"],
   "search_focus": "code|concepts|procedures|api"
-}
+}}
 """
 
 # ============================================================================
 # Analysis Function
 # ============================================================================
 
-def analyze_query(query: str, available_projects: list[dict]) -> dict:
+def build_query_prompt(query: str, available_projects: list[dict]) -> str:
+    """
+    Builds the query understanding prompt with a compact summary of the available projects
+    """
+    projects_summary = []
+    for p in available_projects:
+        projects_summary.append({
+            "id": p.get("id", ""),
+            "name": p.get("name", ""),
+            "domain": p.get("domain", ""),
+            "tech_stack": p.get("tech_stack", [])[:5],  # Limit to 5 for context
+            "keywords": p.get("keywords", [])[:5]  # Limit to 5 for context
+        })
+
+    projects_json = json.dumps(projects_summary, indent=2)
+
+    return QUERY_UNDERSTANDING_PROMPT.format(
+        projects_json=projects_json,
+        query=query
+    )
+
+def parse_intent_response(content: str, available_projects: list[dict]) -> dict:
+    """
+    Parses and normalizes the JSON intent returned by ASI1
+
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON
+    """
+    content = content.strip()
+
+    # Remove the markdown code block around the JSON if present (only the outer
+    # fence: code snippets inside the JSON may contain fences of their own)
+    if content.startswith("```"):
+        content = content[3:]
+        if content.startswith("json"):
+            content = content[4:]
+        end = content.rfind("```")
+        if end != -1:
+            content = content[:end]
+
+    intent = json.loads(content)
+
+    # Validate and normalize
+    result = {
+        "wants_code": bool(intent.get("wants_code", False)),
+        "languages": intent.get("languages", [])[:3],  # Max 3 languages
+        "technologies": intent.get("technologies", [])[:5],  # Max 5 techs
+        "action": intent.get("action", "")[:50],  # Max 50 chars
+        "domain": intent.get("domain", "")[:50],  # Max 50 chars
+        "relevant_project_ids": intent.get("relevant_project_ids", [])[:5],  # Max 5 projects
+        "search_focus": intent.get("search_focus", "concepts")
+    }
+
+    # If no projects matched, include all (generic query)
+    if not result["relevant_project_ids"] and available_projects:
+        result["relevant_project_ids"] = [p.get("id") for p in available_projects[:5]]
+
+    return result
+
+def analyze_query(query: str, available_projects: list[dict], recording=NULL_RECORDING) -> dict:
     """
     Analyzes user query using ASI1 API
 
     Args:
         query: User's search query
         available_projects: List of project metadata dicts
+        recording: Traffic capture recording the ASI1 call is added to
 
     Returns:
         dict: Extracted query intent and filters
     """
+    content = ""
     try:
-        # Build projects context
-        projects_summary = []
-        for p in available_projects:
-            projects_summary.append({
-                "id": p.get("id", ""),
-                "name": p.get("name", ""),
-                "domain": p.get("domain", ""),
-                "tech_stack": p.get("tech_stack", [])[:5],  # Limit to 5 for context
-                "keywords": p.get("keywords", [])[:5]  # Limit to 5 for context
-            })
-
-        projects_json = json.dumps(projects_summary, indent=2)
-
-        # Build prompt
-        prompt = QUERY_UNDERSTANDING_PROMPT.format(
-            projects_json=projects_json,
-            query=query
-        )
+        # Build prompt with the projects context
+        prompt = build_query_prompt(query, available_projects)
 
         # Call ASI1 API (asi1-extended for better analysis)
         print(f"🔍 Calling ASI1 API (asi1-extended) for query understanding...")
-        response = client.chat.completions.create(
-            model="asi1-extended",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            max_tokens=2000  # Sufficient for query analysis
-        )
+        llm_start = time.time()
+        with tracer.span("asi1", model="asi1-extended") as llm_span:
+            response = asi1_client.get().chat.completions.create(
+                model="asi1-extended",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                max_tokens=2000  # Sufficient for query analysis
+            )
+            if response.usage is not None:
+                llm_span.set(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
 
         # Parse JSON response
-        content = response.choices[0].message.content.strip()
-
-        # Remove markdown code blocks if present
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-
-        intent = json.loads(content)
-
-        # Validate and normalize
-        result = {
-            "wants_code": bool(intent.get("wants_code", False)),
-            "languages": intent.get("languages", [])[:3],  # Max 3 languages
-            "technologies": intent.get("technologies", [])[:5],  # Max 5 techs
-            "action": intent.get("action", "")[:50],  # Max 50 chars
-            "domain": intent.get("domain", "")[:50],  # Max 50 chars
-            "relevant_project_ids": intent.get("relevant_project_ids", [])[:5],  # Max 5 projects
-            "search_focus": intent.get("search_focus", "concepts")
-        }
-
-        # If no projects matched, include all (generic query)
-        if not result["relevant_project_ids"] and available_projects:
-            result["relevant_project_ids"] = [p.get("id") for p in available_projects[:5]]
-
-        return result
+        content = response.choices[0].message.content
+        recording.upstream("asi1", time.time() - llm_start, content)
+        return parse_intent_response(content, available_projects)
 
     except json.JSONDecodeError as e:
         print(f"❌ JSON parsing error: {e}")
@@ -275,7 +317,10 @@ async def handle_query_analysis(ctx: Context, req: QueryAnalysisRequest) -> Quer
     ctx.logger.info(f"📚 Available projects: {len(req.available_projects)}")
 
     # Analyze the query
-    intent = analyze_query(req.query, req.available_projects)
+    recording = traffic.begin("understand", req.dict())
+    with tracer.span("understand", traceparent=req.traceparent, projects=len(req.available_projects)):
+        intent = analyze_query(req.query, req.available_projects, recording)
+    recording.finish(intent)
 
     ctx.logger.info(f"✅ Query analysis complete!")
     ctx.logger.info(f"   - Wants code: {intent['wants_code']}")
@@ -301,5 +346,10 @@ async def on_startup(ctx: Context):
     ctx.logger.info(f"🧠 Using ASI1 model: asi1-extended")
     ctx.logger.info(f"🔍 Ready to analyze search queries!")
 
+log_import_time(AGENT_NAME, _import_start)
+
+# Load the openai SDK and open the ASI1 connection before the first request
+start_warm_up(AGENT_NAME, [("ASI1 client", lambda: open_api_connection(asi1_client.get()))])
+
 if __name__ == "__main__":
     agent.run()
@@ -0,0 +1,105 @@
+# Generated from agents/common/capture.py by common/sync.py: edit that file, then re-run it.
+"""
+Traffic capture.
+
+When TRAFFIC_CAPTURE_PATH is set, each request an agent serves is appended to
+a JSON Lines log, one minified object per request:
+
+    {"ts": 1700000000.0, "agent": "main", "kind": "chat", "req": {...},
+     "up": [["smart-search", 812.4, {...}], ...], "res": ..., "ms": 5321.7}
+
+`up` lists the upstream calls in order with their latency (ms) and response,
+which is what the replay tool (agents/traffic/replay.py) serves back from its
+local stand-ins. The log is append-only and stops growing at
+TRAFFIC_CAPTURE_MAX_MB; TRAFFIC_CAPTURE_SAMPLE captures a fraction of requests.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Optional
+
+class Recording:
+    """One captured request; upstream calls are added as they complete"""
+
+    def __init__(self, capture: "TrafficCapture", kind: str, request: Any):
+        self._capture = capture
+        self._start = time.perf_counter()
+        self._done = False
+        self.record = {"ts": round(time.time(), 3), "agent": capture.agent, "kind": kind, "req": request, "up": []}
+
+    def upstream(self, name: str, seconds: float, response: Any):
+        """Adds an upstream call (its latency in seconds and its response)"""
+        self.record["up"].append([name, round(seconds * 1000, 1), response])
+
+    def finish(self, response: Any = None):
+        if self._done:
+            return
+        self._done = True
+        self.record["res"] = response
+        self.record["ms"] = round((time.perf_counter() - self._start) * 1000, 1)
+        self._capture.write(self.record)
+
+class _NullRecording:
+    """Stands in for Recording when capture is off or the request is not sampled"""
+
+    def upstream(self, name: str, seconds: float, response: Any):
+        pass
+
+    def finish(self, response: Any = None):
+        pass
+
+NULL_RECORDING = _NullRecording()
+
+class TrafficCapture:
+    """
+    Args:
+        agent: Agent name written into every record
+        path: Log file (None disables capture)
+        sample_rate: Fraction of requests captured
+        max_bytes: Capture stops once the log reaches this size
+    """
+
+    def __init__(self, agent: str, path: Optional[str], sample_rate: float = 1.0, max_bytes: int = 512 * 1024 * 1024):
+        self.agent = agent
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._size = os.path.getsize(path) if path else 0
+
+    @classmethod
+    def from_env(cls, agent: str, process: str = "") -> "TrafficCapture":
+        """process: Name inserted before the file extension, so that processes sharing the settings write separate files"""
+        path = os.getenv("TRAFFIC_CAPTURE_PATH") or None
+        if path and process:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{process}{ext}"
+        return cls(
+            agent,
+            path,
+            float(os.getenv("TRAFFIC_CAPTURE_SAMPLE", "1.0")),
+            int(float(os.getenv("TRAFFIC_CAPTURE_MAX_MB", "512")) * 1024 * 1024),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def begin(self, kind: str, request: Any):
+        """Starts a recording (a no-op recording when capture is off or not sampled)"""
+        if self._file is None or self._size >= self.max_bytes or random.random() >= self.sample_rate:
+            return NULL_RECORDING
+        return Recording(self, kind, request)
+
+    def write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._size >= self.max_bytes:
+                return
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line.encode("utf-8"))
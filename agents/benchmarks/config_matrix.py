@@ -0,0 +1,435 @@
+"""
+Configuration matrix for the main agent: latency against answer quality.
+
+Runs a fixed question set through the main agent's chat handler (in-process,
+as traffic/replay.py does) once per combination of the settings that trade
+latency for quality: ENABLE_METTA_REASONING, ASI1_MODEL, SEARCH_LIMIT,
+TOP_K_CHUNKS and MAX_HISTORY_MESSAGES.
+
+Questions and upstreams come from capture logs (TRAFFIC_CAPTURE_PATH):
+
+- smart search: the question's recorded results, cut to SEARCH_LIMIT and topped
+  up with BM25 over every chunk in the captures (questions from --questions
+  that were never searched get BM25 results only)
+- ASI-1: replies with the question's recorded answer (or, for new questions, a
+  reference answer made of the best-matching sentences of the captured chunks);
+  its latency is modeled per model from the prompt and answer token counts
+  (first token + prefill + decode, see MODEL_LATENCY and --calibrate)
+- MeTTa: the real reasoning code (metta-agent/reasoning.py) run in-process, plus
+  a network hop, rounded up to the main agent's 0.5s polling of the reply
+
+For each configuration it reports:
+
+- latency: local processing measured in-process plus the upstream latencies (p50, p90)
+- prompt tokens: mean estimated tokens of the ASI-1 prompt
+- grounding: mean share of the reference answer's content terms found in the
+  documentation context of the prompt (how much of a good answer the
+  configuration gives the model to work from)
+
+and marks the Pareto frontier (*): configurations no other configuration beats
+on all three at once.
+
+Usage (from agents/):
+    python benchmarks/config_matrix.py capture.jsonl
+    python benchmarks/config_matrix.py capture.jsonl --metta false --top-k 3,5,8 --history 0,20
+    python benchmarks/config_matrix.py capture.jsonl --questions questions.txt --calibrate spans.jsonl --json matrix.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import itertools
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+
+# Stand-in and in-process agent loading are shared with the replay tool
+_spec = importlib.util.spec_from_file_location("replay", Path(__file__).resolve().parent.parent / "traffic" / "replay.py")
+replay = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(replay)
+
+# model -> (first token ms, ms per prompt token, ms per answer token). Rough figures:
+# calibrate them from the main agent's traces with --calibrate
+MODEL_LATENCY = {
+    "asi1-mini": (400.0, 0.1, 10.0),
+    "asi1-extended": (800.0, 0.25, 20.0),
+}
+
+METTA_STAND_IN = "agent1q-metta-stand-in"
+METTA_POLL_INTERVAL = 0.5  # The main agent checks for the MeTTa reply this often
+
+CONTEXT_START = "📚 **Available Documentation Context:**"
+CONTEXT_END = ("🧠 **Symbolic Analysis (MeTTa):**", "✅ **Response Guidelines:**")
+
+REFERENCE_SENTENCES = 4  # Sentences in a reference answer made from the captured chunks
+
+class Config(NamedTuple):
+    metta: bool
+    model: str
+    search_limit: int
+    top_k: int
+    history: int
+
+    def label(self) -> str:
+        return f"metta={'on' if self.metta else 'off'} {self.model} limit={self.search_limit} top_k={self.top_k} history={self.history}"
+
+def parse_list(value: str, cast) -> list:
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("true", "on", "1", "yes")
+
+def calibrate(paths: List[str]) -> Dict[str, Tuple[float, float, float]]:
+    """Fits ms = first token + prefill * prompt tokens + decode * answer tokens per model from asi1 spans"""
+    import numpy as np
+    samples: Dict[str, List[Tuple[int, int, float]]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                span = json.loads(line) if line.strip() else None
+                if not span or span.get("name") != "asi1":
+                    continue
+                attrs = span.get("attrs", {})
+                if attrs.get("model") and attrs.get("prompt_tokens"):
+                    samples.setdefault(attrs["model"], []).append((attrs["prompt_tokens"], attrs.get("completion_tokens", 0), span["ms"]))
+    fitted = {}
+    for model, rows in samples.items():
+        if len(rows) < 3:
+            continue
+        x = np.array([[1.0, p, c] for p, c, _ in rows])
+        y = np.array([ms for _, _, ms in rows])
+        coefficients = np.linalg.lstsq(x, y, rcond=None)[0]
+        fitted[model] = tuple(max(0.0, float(v)) for v in coefficients)
+    return fitted
+
+def pareto_frontier(rows: List[Dict[str, Any]]) -> List[int]:
+    """Indexes of rows no other row matches or beats on latency, prompt tokens and grounding (and beats on one)"""
+    def dominates(a, b):
+        no_worse = a["p50_ms"] <= b["p50_ms"] and a["prompt_tokens"] <= b["prompt_tokens"] and a["grounding"] >= b["grounding"]
+        better = a["p50_ms"] < b["p50_ms"] or a["prompt_tokens"] < b["prompt_tokens"] or a["grounding"] > b["grounding"]
+        return no_worse and better
+    return [i for i, row in enumerate(rows) if not any(dominates(other, row) for other in rows)]
+
+# ============================================================================
+# Stand-in and target
+# ============================================================================
+
+class MatrixStandIn(replay.UpstreamStandIn):
+    """
+    Recorded upstreams adapted to the configuration under test
+
+    Accounts the upstream latency, prompt tokens and grounding of the
+    question being asked (questions are asked one at a time).
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], model_latency: Dict[str, Tuple[float, float, float]]):
+        super().__init__(replay_latency=False)
+        self.model_latency = model_latency
+        self.answers: Dict[str, str] = {}  # query -> recorded answer
+        self.corpus: List[Dict[str, Any]] = []
+        search_ms = []
+        seen = set()
+        for record in records:
+            self.register(record)
+            for name, ms, response in record.get("up", []):
+                if name == "smart-search" and isinstance(response, dict):
+                    search_ms.append(ms)
+                    for chunk in response.get("results", []):
+                        if chunk.get("content") and chunk["content"] not in seen:
+                            seen.add(chunk["content"])
+                            self.corpus.append(chunk)
+                elif name == "asi1" and isinstance(response, str):
+                    self.answers[record["req"]["query"]] = response
+        self.stub_search_ms = statistics.median(search_ms) if search_ms else 0.0
+        if self.docs_status is None:
+            self.docs_status = (0.0, {"hasDocumentation": True, "sources": {"sponsors": 1, "projects": 1}})
+        self.reset()
+
+    def attach(self, main):
+        """Indexes the corpus with the main agent's own BM25 and token helpers"""
+        import chunk_index
+        import compression
+        import retrieval_memory
+        self.compression = compression
+        self.content_terms = retrieval_memory.content_terms
+        self.index = chunk_index.ChunkIndex(len(self.corpus))
+        self.index.add(self.corpus)
+        self._references: Dict[str, str] = {}
+
+    def reset(self):
+        self.upstream_ms = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.grounding: Optional[float] = None
+
+    def docs_status_response(self):
+        self.upstream_ms += self.docs_status[0]
+        return self.docs_status
+
+    def search_response(self, body: Dict[str, Any]):
+        query = body.get("query", "")
+        limit = body.get("limit", 10)
+        recorded = self.search.get(query)
+        ms, response = recorded if recorded else (self.stub_search_ms, {"query": query})
+        if set(response) == {"error"}:
+            self.upstream_ms += ms
+            return recorded
+        results = list(response.get("results", []))[:limit]
+        contents = {c.get("content") for c in results}
+        for chunk in self.index.search(query, limit=limit):
+            if len(results) >= limit:
+                break
+            if chunk["content"] not in contents:
+                results.append({**chunk, "similarity": 0.0, "score": 0.0})
+        self.upstream_ms += ms
+        return ms, {**response, "results": results, "totalResults": len(results)}
+
+    def reference_answer(self, query: str) -> str:
+        if query in self.answers:
+            return self.answers[query]
+        if query not in self._references:
+            terms = set(self.content_terms(query))
+            sentences = []
+            for chunk in self.index.search(query, limit=10):
+                for segment, _ in self.compression.split_segments(chunk["content"]):
+                    overlap = len(terms & set(self.content_terms(segment)))
+                    if overlap:
+                        sentences.append((overlap, segment))
+            sentences.sort(key=lambda s: s[0], reverse=True)
+            self._references[query] = "\n".join(s for _, s in sentences[:REFERENCE_SENTENCES])
+        return self._references[query]
+
+    def completion_response(self, body: Dict[str, Any]):
+        messages = body.get("messages", [])
+        query = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        answer = self.reference_answer(query)
+        self.prompt_tokens = sum(self.compression.estimate_tokens(m.get("content", "")) for m in messages)
+        self.completion_tokens = self.compression.estimate_tokens(answer)
+        self.grounding = self.grounding_of(answer, messages[0].get("content", "") if messages else "")
+        first, prefill, decode = self.model_latency[body.get("model", "")]
+        ms = first + prefill * self.prompt_tokens + decode * self.completion_tokens
+        self.upstream_ms += ms
+        return ms, answer
+
+    def completion_usage(self, body: Dict[str, Any], content: str) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+        }
+
+    def grounding_of(self, answer: str, system_prompt: str) -> Optional[float]:
+        """Share of the answer's content terms found in the prompt's documentation context"""
+        terms = set(self.content_terms(answer))
+        if not terms:
+            return None
+        start = system_prompt.find(CONTEXT_START)
+        context = system_prompt[start + len(CONTEXT_START):] if start != -1 else ""
+        ends = [i for i in (context.find(marker) for marker in CONTEXT_END) if i != -1]
+        context = context[:min(ends)] if ends else context
+        return len(terms & set(self.content_terms(context))) / len(terms)
+
+class MatrixTargets(replay.Targets):
+    """The main agent with MeTTa reasoning answered in-process"""
+
+    def __init__(self, stand_in: MatrixStandIn, metta_hop_ms: float):
+        super().__init__(["chat"], stand_in, metta_workers=0, threads=1)
+        self.stand_in = stand_in
+        self.metta_hop_ms = metta_hop_ms
+        self.reasoning = None
+
+    def load_reasoning(self):
+        self.reasoning = replay.load_module("reasoning", AGENTS_DIR / "metta-agent" / "reasoning.py")
+        self.metta = self.reasoning.build_metta()
+        self.features: Dict[str, Any] = {}  # content hash -> features (the MeTTa agent's chunk cache)
+
+    def context(self):
+        targets = self
+
+        class Context(replay.ReplayContext):
+            async def send(self, destination: str, message: Any):
+                if destination == METTA_STAND_IN:
+                    targets.answer_reasoning(message)
+
+        return Context()
+
+    def answer_reasoning(self, request):
+        """Runs the MeTTa reasoning and stores the reply where the waiting handler looks for it"""
+        start = time.perf_counter()
+        chunks = []
+        for ref in request.chunks:
+            if ref.content is not None and ref.content_hash not in self.features:
+                self.features[ref.content_hash] = self.reasoning.scan_features(ref.content)
+            chunks.append((ref.chunk_id, ref.content_hash, self.features.get(ref.content_hash, frozenset())))
+        self.main.metta_reasoning_cache[request.session_id] = self.reasoning.metta_reasoning(self.metta, request.query, chunks)
+        compute_ms = (time.perf_counter() - start) * 1000
+        # The reply is seen at the first poll after it arrives; the computation itself is already in the measured time
+        arrival = compute_ms + self.metta_hop_ms
+        self.stand_in.upstream_ms += math.ceil(arrival / (METTA_POLL_INTERVAL * 1000)) * METTA_POLL_INTERVAL * 1000 - compute_ms
+
+    def configure(self, config: Config):
+        """Applies a configuration to the main agent, with empty history, retrieval memory and index"""
+        main = self.main
+        main.ENABLE_METTA_REASONING = config.metta
+        main.METTA_AGENT_ADDRESS = METTA_STAND_IN if config.metta else ""
+        main.USE_METTA_REASONING = config.metta
+        main.ASI1_MODEL = config.model
+        main.SEARCH_LIMIT = config.search_limit
+        main.TOP_K_CHUNKS = config.top_k
+        main.MAX_HISTORY_MESSAGES = config.history
+        main.history_store = main.SQLiteHistoryStore(":memory:", config.history)
+        main.retrieval_memory = main.RetrievalMemory(main.RETRIEVAL_MEMORY_SESSIONS, main.RETRIEVAL_MEMORY_TTL)
+        main.chunk_index = main.ChunkIndex(main.SERVED_CHUNKS_CACHE)
+        main.metta_known_hashes.clear()
+        main.metta_reasoning_cache.clear()
+        sys.modules["rerank"]._vector_cache.clear()
+        if self.reasoning is not None:
+            self.features.clear()
+
+    async def ask(self, config: Config, questions: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        async def configure():
+            self.configure(config)  # On the agent's loop thread, which owns the SQLite history connection
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(configure(), self.chat_loop))
+        results = []
+        for sender, query in questions:
+            self.stand_in.reset()
+            start = time.perf_counter()
+            await self.run({"kind": "chat", "req": {"sender": sender, "query": query}})
+            local_ms = (time.perf_counter() - start) * 1000
+            results.append({
+                "ms": local_ms + self.stand_in.upstream_ms,
+                "prompt_tokens": self.stand_in.prompt_tokens,
+                "grounding": self.stand_in.grounding,
+            })
+        return results
+
+# ============================================================================
+# Driver
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare main agent configurations on latency, prompt size and grounding")
+    parser.add_argument("captures", nargs="+", help="Capture logs (JSON Lines) with chat records")
+    parser.add_argument("--questions", help="Questions to ask instead of the captured ones (one per line, or JSON Lines with query and sender)")
+    parser.add_argument("--metta", default="false,true", help="ENABLE_METTA_REASONING values")
+    parser.add_argument("--model", default="asi1-mini,asi1-extended", help="ASI1_MODEL values")
+    parser.add_argument("--search-limit", default="5,10", help="SEARCH_LIMIT values")
+    parser.add_argument("--top-k", default="3,5", help="TOP_K_CHUNKS values")
+    parser.add_argument("--history", default="4,20", help="MAX_HISTORY_MESSAGES values")
+    parser.add_argument("--metta-hop-ms", type=float, default=100.0, help="Network round trip to the MeTTa agent")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=FIRST,PREFILL,DECODE",
+                        help="Latency model of a model (ms, ms per prompt token, ms per answer token)")
+    parser.add_argument("--calibrate", nargs="+", default=[], metavar="SPANS", help="Fit the latency models from asi1 spans (traffic/traces.py output)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's own output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    logging.getLogger("asyncio").setLevel(logging.CRITICAL)
+
+    model_latency = dict(MODEL_LATENCY)
+    if args.calibrate:
+        fitted = calibrate(args.calibrate)
+        for model, (first, prefill, decode) in fitted.items():
+            print(f"Calibrated {model}: {first:.0f}ms + {prefill:.3f}ms/prompt token + {decode:.2f}ms/answer token")
+        model_latency.update(fitted)
+    for spec in args.model_latency:
+        model, values = spec.split("=", 1)
+        model_latency[model] = tuple(float(v) for v in values.split(","))
+
+    configs = [
+        Config(*values) for values in itertools.product(
+            parse_list(args.metta, parse_bool),
+            parse_list(args.model, str),
+            parse_list(args.search_limit, int),
+            parse_list(args.top_k, int),
+            parse_list(args.history, int),
+        )
+    ]
+    unknown = sorted({c.model for c in configs} - set(model_latency))
+    if unknown:
+        parser.error(f"No latency model for {', '.join(unknown)} (add --model-latency)")
+
+    records = replay.load_capture(args.captures, ["chat"])
+    if not records:
+        print("No chat records in the captures")
+        return
+    if args.questions:
+        questions = []
+        with open(args.questions, encoding="utf-8") as f:
+            for i, line in enumerate(l.strip() for l in f):
+                if not line:
+                    continue
+                entry = json.loads(line) if line.startswith("{") else {"query": line}
+                questions.append((entry.get("sender", f"agent1q-matrix-{i}"), entry["query"]))
+    else:
+        questions = [(r["req"]["sender"], r["req"]["query"]) for r in records]
+
+    # Agents write key/storage files to the working directory; keep them out of the repo
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(tempfile.mkdtemp(prefix="agent-matrix-"))
+
+    stand_in = MatrixStandIn(records, model_latency)
+    stand_in.start()
+    targets = MatrixTargets(stand_in, args.metta_hop_ms)
+    if any(c.metta for c in configs):
+        targets.load_reasoning()
+    stand_in.attach(targets.main)
+    print(f"{len(questions)} questions x {len(configs)} configurations")
+
+    async def run():
+        targets.start()
+        try:
+            # One untimed question first: lazy clients and first-use imports are not part of any configuration
+            await targets.ask(configs[0], [questions[0]])
+            return [await targets.ask(config, questions) for config in configs]
+        finally:
+            targets.shutdown()
+
+    if args.verbose:
+        measured = asyncio.run(run())
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            measured = asyncio.run(run())
+    stand_in.stop()
+
+    rows = []
+    for config, results in zip(configs, measured):
+        latency = [r["ms"] for r in results]
+        grounding = [r["grounding"] for r in results if r["grounding"] is not None]
+        rows.append({
+            "config": config._asdict(),
+            "p50_ms": round(replay.percentile(latency, 50), 1),
+            "p90_ms": round(replay.percentile(latency, 90), 1),
+            "prompt_tokens": round(statistics.mean(r["prompt_tokens"] for r in results), 1),
+            "grounding": round(statistics.mean(grounding), 3) if grounding else 0.0,
+            "answered": sum(1 for r in results if r["prompt_tokens"]),
+        })
+    frontier = set(pareto_frontier(rows))
+    for i, row in enumerate(rows):
+        row["pareto"] = i in frontier
+
+    print(f"\n{'':<2}{'configuration':<62} {'p50':>9} {'p90':>9} {'prompt tok':>11} {'grounding':>10} {'answered':>9}")
+    for row in sorted(rows, key=lambda r: r["p50_ms"]):
+        config = Config(**row["config"])
+        print(
+            f"{'*' if row['pareto'] else ' ':<2}{config.label():<62} {row['p50_ms']:>7}ms {row['p90_ms']:>7}ms "
+            f"{row['prompt_tokens']:>11} {row['grounding']:>10} {row['answered']:>5}/{len(questions)}"
+        )
+    print(f"\n* Pareto frontier: {len(frontier)} of {len(rows)} configurations")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"questions": len(questions), "model_latency": model_latency, "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+Micro-benchmarks for the agents' CPU hot paths.
+
+Covers the pure functions that run on every request: prompt assembly and
+history loading in the main agent (plus local reranking and context
+compression), feature scanning and batched reasoning in the MeTTa agent, prompt
+building and response parsing in the query understanding agent, and response
+parsing in the metadata extractor. Inputs are synthetic and seeded, at
+realistic and extreme sizes (1k projects, 200KB docs, 100-turn histories).
+
+Each case reports the median time per call and the peak memory allocated
+during one call (tracemalloc), and is compared against baseline.json.
+
+Usage (from agents/):
+    python benchmarks/hot_paths.py                   # run and compare with the baseline
+    python benchmarks/hot_paths.py --save-baseline   # record a new baseline
+    python benchmarks/hot_paths.py --filter metta    # only cases whose name contains "metta"
+
+Exits with status 1 when a case is slower or allocates more than the baseline
+allows (--time-tolerance / --memory-tolerance). Timings are machine-specific:
+record the baseline on the machine you compare on.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Agent modules build API clients at import time; no calls are made
+os.environ.setdefault("ASI1_API_KEY", "benchmark")
+os.environ["HISTORY_DB_PATH"] = ":memory:"
+os.environ["CHUNK_INDEX_PATH"] = ":memory:"
+os.environ["FAQ_DB_PATH"] = ":memory:"
+os.environ["METTA_AGENT_ADDRESS"] = ""
+
+def load_module(name: str, path: Path):
+    """Imports a module from a file, with its directory on sys.path for sibling imports"""
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# ============================================================================
+# Synthetic inputs
+# ============================================================================
+
+WORDS = (
+    "the contract deploy import API wallet token chain bridge oracle swap liquidity "
+    "install configure network testnet mainnet signer provider transaction gas fee "
+    "event listener callback function module package account address balance verify"
+).split()
+
+TECHS = ["Solidity", "Hardhat", "Foundry", "ethers.js", "viem", "wagmi", "React", "Next.js", "TypeScript", "Rust", "Python"]
+
+def make_sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def make_markdown(rng: random.Random, size: int) -> str:
+    """Markdown doc of about `size` chars: headings, prose, numbered steps and code fences"""
+    parts = []
+    total = 0
+    section = 0
+    while total < size:
+        section += 1
+        block = [f"## Section {section}", make_sentence(rng), make_sentence(rng)]
+        block += [f"{i}. {make_sentence(rng, 6)}" for i in range(1, 4)]
+        block += ["```bash", f"npm install @sponsor/sdk-{section} ethers", "npx hardhat deploy --network sepolia", "```"]
+        block += [make_sentence(rng) for _ in range(3)]
+        text = "\n".join(block)
+        parts.append(text)
+        total += len(text) + 2
+    return "\n\n".join(parts)[:size]
+
+def make_chunks(rng: random.Random, count: int, size: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "content": make_markdown(rng, size),
+            "score": rng.random(),
+            "sponsorName": f"Sponsor {i % 7}",
+        }
+        for i in range(count)
+    ]
+
+def make_history(rng: random.Random, turns: int) -> List[Dict[str, Any]]:
+    history = []
+    for _ in range(turns):
+        history.append({"role": "user", "content": make_sentence(rng, 12)})
+        history.append({"role": "assistant", "content": "\n".join(make_sentence(rng) for _ in range(8))})
+    return history
+
+def make_projects(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"project-{i}",
+            "name": f"Project {i}",
+            "domain": rng.choice(["DeFi", "NFT", "Infrastructure", "Gaming", "Identity"]),
+            "tech_stack": rng.sample(TECHS, 7),
+            "keywords": [rng.choice(WORDS) for _ in range(10)],
+            "description": make_sentence(rng, 30),
+        }
+        for i in range(count)
+    ]
+
+def make_metadata_response(rng: random.Random, snippets: int) -> str:
+    """ASI1-style response: JSON wrapped in a markdown code fence"""
+    metadata = {
+        "tech_stack": rng.sample(TECHS, 8),
+        "domain": "DeFi",
+        "keywords": [rng.choice(WORDS) for _ in range(25)],
+        "languages": ["typescript", "solidity"],
+        "description": make_sentence(rng, 60),
+        "code_snippets": [
+            {"language": "typescript", "code": make_markdown(rng, 1500), "description": make_sentence(rng)}
+            for _ in range(snippets)
+        ],
+    }
+    return "```json\n" + json.dumps(metadata, indent=2) + "\n```"
+
+# ============================================================================
+# Cases
+# ============================================================================
+
+def build_cases() -> List[Tuple[str, Callable[[], Callable[[], Any]]]]:
+    """
+    (name, setup) pairs; setup builds the inputs and returns the callable to measure
+    """
+    # Agents write key/storage files to the working directory; keep them out of the repo
+    os.chdir(tempfile.mkdtemp(prefix="agent-bench-"))
+    # No background upstream calls while measuring
+    os.environ["STARTUP_WARMUP"] = "off"
+
+    main = load_module("main_agent", AGENTS_DIR / "main-agent" / "agent.py")
+    import chunk_index
+    import compression
+    import faq_store
+    import history_store
+    import rerank
+    import retrieval_memory
+    reasoning = load_module("reasoning", AGENTS_DIR / "metta-agent" / "reasoning.py")
+    query_agent = load_module("query_understanding_agent", AGENTS_DIR / "query-understanding-agent" / "agent.py")
+    metadata_agent = load_module("metadata_extractor_agent", AGENTS_DIR / "metadata-extractor-agent" / "agent.py")
+    import sections
+
+    def prompt_assembly(turns: int, chunk_count: int):
+        def setup():
+            rng = random.Random(1)
+            context_docs = "\n\n".join(
+                f"[{c['sponsorName']}]\n{c['content']}" for c in make_chunks(rng, chunk_count, 1600)
+            )
+            history = make_history(rng, turns)
+            reasoning_text = "\n".join(f"chunk-{i}: This section mentions API integration" for i in range(chunk_count))
+            return lambda: main.build_llm_messages("How do I deploy with Hardhat?", context_docs, reasoning_text, history)
+        return setup
+
+    def history_load(turns: int):
+        def setup():
+            rng = random.Random(2)
+            store = history_store.SQLiteHistoryStore(":memory:", main.MAX_HISTORY_MESSAGES)
+            history = make_history(rng, turns)
+            for i in range(0, len(history), 2):
+                store.append("agent1qsender", history[i:i + 2])
+            return lambda: store.load("agent1qsender")
+        return setup
+
+    def history_append():
+        def setup():
+            rng = random.Random(3)
+            store = history_store.SQLiteHistoryStore(":memory:", main.MAX_HISTORY_MESSAGES)
+            turn = make_history(rng, 1)
+            return lambda: store.append("agent1qsender", turn)
+        return setup
+
+    def rerank_case(chunk_count: int):
+        def setup():
+            chunks = make_chunks(random.Random(4), chunk_count, 1600)
+
+            def run():
+                rerank._vector_cache.clear()  # Measure fresh search results, not cache hits
+                return rerank.rerank_chunks("How do I deploy a contract with Hardhat?", chunks, k=5)
+            return run
+        return setup
+
+    def retrieval_plan(chunk_count: int):
+        def setup():
+            memory = retrieval_memory.RetrievalMemory()
+            memory.remember("agent1qsender", "How do I deploy a contract with Hardhat?", make_chunks(random.Random(11), chunk_count, 1600))
+
+            def run():
+                rerank._vector_cache.clear()  # The remembered chunks are embedded once per follow-up
+                return memory.plan("agent1qsender", "and how do I test that?")
+            return run
+        return setup
+
+    def local_search(chunk_count: int):
+        def setup():
+            index = chunk_index.ChunkIndex(chunk_count)
+            index.add(make_chunks(random.Random(12), chunk_count, 1600))
+            return lambda: index.search("How do I deploy a contract with Hardhat?", limit=10, min_match=0.5)
+        return setup
+
+    def faq_lookup(sponsor_count: int):
+        def setup():
+            store = faq_store.FaqStore()
+            templates = ["How do I get started with {}?", "Show me a code example for {}", "What are the requirements for {}?"]
+            for i in range(sponsor_count):
+                for template in templates:
+                    store.put("v1", f"Sponsor{i}", template.format(f"Sponsor{i}"), make_markdown(random.Random(i), 2000))
+            return lambda: store.get("v1", "How do I deploy a contract with Hardhat?")
+        return setup
+
+    def compression_case(chunk_count: int, size: int):
+        def setup():
+            chunks = make_chunks(random.Random(5), chunk_count, size)
+            return lambda: compression.compress_chunks("deploy contract hardhat network", chunks, 2000)
+        return setup
+
+    def scan_features(size: int):
+        def setup():
+            text = make_markdown(random.Random(6), size)
+            return lambda: reasoning.scan_features(text)
+        return setup
+
+    def metta_batch(chunk_count: int):
+        def setup():
+            metta = reasoning.build_metta()
+            chunks = make_chunks(random.Random(7), chunk_count, 1600)
+            features = [
+                (f"chunk-{i}", str(i), reasoning.scan_features(c["content"]))
+                for i, c in enumerate(chunks)
+            ]
+            jobs = [("How do I deploy a contract?", features, [])]
+            return lambda: reasoning.batch_reasoning(metta, jobs)
+        return setup
+
+    def query_prompt(project_count: int):
+        def setup():
+            projects = make_projects(random.Random(8), project_count)
+            return lambda: query_agent.build_query_prompt("How do I swap tokens with wagmi?", projects)
+        return setup
+
+    def intent_parse():
+        def setup():
+            projects = make_projects(random.Random(9), 50)
+            content = "```json\n" + json.dumps({
+                "wants_code": True,
+                "languages": ["typescript"],
+                "technologies": ["wagmi", "viem"],
+                "action": "swap tokens",
+                "domain": "DeFi",
+                "relevant_project_ids": [],
+                "search_focus": "code",
+            }, indent=2) + "\n```"
+            return lambda: query_agent.parse_intent_response(content, projects)
+        return setup
+
+    def metadata_parse(snippets: int):
+        def setup():
+            content = make_metadata_response(random.Random(10), snippets)
+            return lambda: metadata_agent.parse_metadata_response(content)
+        return setup
+
+    def section_batching(size: int, part_chars: int):
+        def setup():
+            document = make_markdown(random.Random(11), size)
+            parts = [document[i:i + part_chars] for i in range(0, len(document), part_chars)]
+
+            def run():
+                batcher = sections.SectionBatcher(48000)
+                batches = []
+                for part in parts:
+                    batches += batcher.feed(part)
+                return batches + batcher.close()
+            return run
+        return setup
+
+    def metadata_merge(batches: int):
+        def setup():
+            rng = random.Random(12)
+            results = [
+                metadata_agent.parse_metadata_response(make_metadata_response(rng, 5))
+                for _ in range(batches)
+            ]
+            return lambda: sections.merge_metadata(results, [48000] * batches)
+        return setup
+
+    return [
+        ("main.build_llm_messages[5 chunks, 10 turns]", prompt_assembly(10, 5)),
+        ("main.build_llm_messages[5 chunks, 100 turns]", prompt_assembly(100, 5)),
+        ("main.history_load[100 turns]", history_load(100)),
+        ("main.history_append[1 turn]", history_append()),
+        ("main.rerank_chunks[10 chunks]", rerank_case(10)),
+        ("main.rerank_chunks[100 chunks]", rerank_case(100)),
+        ("main.retrieval_plan[5 chunks]", retrieval_plan(5)),
+        ("main.chunk_index_search[500 chunks]", local_search(500)),
+        ("main.faq_lookup[100 sponsors]", faq_lookup(100)),
+        ("main.compress_chunks[5 x 2KB]", compression_case(5, 2000)),
+        ("main.compress_chunks[5 x 40KB]", compression_case(5, 40000)),
+        ("metta.scan_features[20KB]", scan_features(20000)),
+        ("metta.scan_features[200KB]", scan_features(200000)),
+        ("metta.batch_reasoning[5 chunks]", metta_batch(5)),
+        ("metta.batch_reasoning[50 chunks]", metta_batch(50)),
+        ("query.build_query_prompt[50 projects]", query_prompt(50)),
+        ("query.build_query_prompt[1k projects]", query_prompt(1000)),
+        ("query.parse_intent_response", intent_parse()),
+        ("metadata.parse_metadata_response[5 snippets]", metadata_parse(5)),
+        ("metadata.parse_metadata_response[100 snippets]", metadata_parse(100)),
+        ("metadata.section_batcher[2MB in 64KB parts]", section_batching(2_000_000, 65536)),
+        ("metadata.merge_metadata[40 batches]", metadata_merge(40)),
+    ]
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def measure(func: Callable[[], Any], rounds: int, min_round_time: float) -> Dict[str, float]:
+    """
+    Median seconds per call over `rounds` rounds, and peak bytes allocated by one call
+    """
+    func()  # Warm up
+
+    # Calibrate calls per round so each round lasts at least min_round_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time or number >= 100000:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_bytes": max(0, peak - before),
+    }
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the agents' CPU hot paths")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results to baseline.json")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this string")
+    parser.add_argument("--rounds", type=int, default=7, help="Timed rounds per case")
+    parser.add_argument("--min-round-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="Allowed slowdown vs baseline (0.5 = +50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed peak memory growth vs baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if BASELINE_PATH.exists() and not args.save_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text())
+
+    results = {}
+    regressions = []
+    print(f"{'case':<50} {'median':>10} {'peak mem':>10} {'vs baseline':>22}")
+    for name, setup in build_cases():
+        if args.filter not in name:
+            continue
+        result = measure(setup(), args.rounds, args.min_round_time)
+        results[name] = result
+
+        comparison = ""
+        base = baseline.get(name)
+        if base:
+            time_ratio = result["median_s"] / base["median_s"] if base["median_s"] else 1.0
+            memory_ratio = result["peak_bytes"] / base["peak_bytes"] if base["peak_bytes"] else 1.0
+            comparison = f"{time_ratio:5.2f}x time {memory_ratio:5.2f}x mem"
+            if time_ratio > 1 + args.time_tolerance or memory_ratio > 1 + args.memory_tolerance:
+                comparison += "  REGRESSION"
+                regressions.append(name)
+        print(f"{name:<50} {format_time(result['median_s']):>10} {result['peak_bytes'] / 1024:>8.1f}KB {comparison:>22}")
+
+    if args.save_baseline:
+        existing = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        existing.update(results)
+        BASELINE_PATH.write_text(json.dumps(existing, indent=2, sort_keys=True) + "\n")
+        print(f"\n💾 Baseline saved to {BASELINE_PATH}")
+    elif not baseline:
+        print("\nNo baseline yet: run with --save-baseline to record one")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Cold start benchmark for the agents.
+
+For each agent it reports:
+
+- import time: wall time to import the agent module, plus the heaviest
+  top-level packages from `python -X importtime`
+- time to ready: from process start until the agent's HTTP port accepts connections
+- first request: latency of the first REST request sent as soon as the agent
+  is ready (query understanding and metadata extractor, with ASI1 served by the
+  local stand-in from traffic/replay.py), i.e. what a user hitting a freshly
+  restarted agent waits
+
+Each agent is started once per STARTUP_WARMUP mode (background, blocking, off;
+see common/warmup.py).
+
+Usage (from agents/):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --agent query --modes background,off --runs 3
+    python benchmarks/startup.py --imports-only
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+
+# name -> (script, port, first request (method, path, body) or None)
+AGENTS = {
+    "main": ("main-agent/agent.py", 8000, None),
+    "metta": ("metta-agent/metta-agent.py", 8000, None),
+    "query": ("query-understanding-agent/agent.py", 8002, ("POST", "/understand", {"query": "startup check", "available_projects": []})),
+    "metadata": ("metadata-extractor-agent/agent.py", 8001, ("POST", "/analyze", {"markdown_content": "# Startup check", "file_name": "startup.md"})),
+}
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_LOAD_MODULE = """
+import importlib.util, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {dir!r})
+spec = importlib.util.spec_from_file_location("agent_module", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print("MODULE_IMPORT_SECONDS", time.perf_counter() - start)
+"""
+
+def agent_env(stand_in_url: str, mode: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "ASI1_API_KEY": env.get("ASI1_API_KEY", "startup-benchmark"),
+        "ASI1_BASE_URL": f"{stand_in_url}/v1",
+        "NEXT_API_BASE_URL": f"{stand_in_url}/api",
+        "METTA_AGENT_ADDRESS": "",
+        "HISTORY_DB_PATH": ":memory:",
+        "CHUNK_INDEX_PATH": ":memory:",
+        "FAQ_DB_PATH": ":memory:",
+        "STARTUP_WARMUP": mode,
+        "PYTHONUNBUFFERED": "1",
+    })
+    env.pop("TRAFFIC_CAPTURE_PATH", None)
+    env.pop("TRACE_EXPORT_PATH", None)
+    return env
+
+def import_report(name: str, env: Dict[str, str], workdir: str, top: int) -> Tuple[float, List[Tuple[str, float]]]:
+    """Module import seconds and the heaviest top-level imports (name, cumulative ms)"""
+    script, _, _ = AGENTS[name]
+    path = AGENTS_DIR / script
+    code = _LOAD_MODULE.format(dir=str(path.parent), path=str(path))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], env=env, cwd=workdir, capture_output=True, text=True, timeout=120
+    )
+    seconds = float(re.search(r"MODULE_IMPORT_SECONDS (\S+)", result.stdout).group(1))
+    packages = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match and len(match.group(3)) == 1:  # Top-level imports only
+            packages.append((match.group(4), int(match.group(2)) / 1000))
+    packages.sort(key=lambda p: p[1], reverse=True)
+    return seconds, packages[:top]
+
+def port_open(port: int) -> bool:
+    with socket.socket() as sock:
+        sock.settimeout(0.2)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+def wait_port_free(port: int, timeout: float = 10):
+    deadline = time.time() + timeout
+    while port_open(port) and time.time() < deadline:
+        time.sleep(0.1)
+
+def http_request(port: int, method: str, path: str, body: Optional[dict]) -> float:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}",
+        data=json.dumps(body).encode("utf-8") if body is not None else None,
+        headers={"Content-Type": "application/json"},
+        method=method,
+    )
+    start = time.perf_counter()
+    urllib.request.urlopen(request, timeout=60).read()
+    return time.perf_counter() - start
+
+def cold_start(name: str, env: Dict[str, str], workdir: str, delay: float) -> Tuple[float, Optional[float]]:
+    """Starts the agent and returns (seconds to ready, first request seconds)"""
+    script, port, first_request = AGENTS[name]
+    wait_port_free(port)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(AGENTS_DIR / script)], env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while not port_open(port):
+            if process.poll() is not None:
+                raise RuntimeError(f"{name} agent exited with code {process.returncode}")
+            if time.perf_counter() - start > 120:
+                raise RuntimeError(f"{name} agent not ready after 120s")
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+        latency = None
+        if first_request is not None:
+            time.sleep(delay)
+            method, path, body = first_request
+            latency = http_request(port, method, path, body)
+        return ready, latency
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def load_stand_in():
+    spec = importlib.util.spec_from_file_location("replay", Path(__file__).resolve().parent.parent / "traffic" / "replay.py")
+    replay = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(replay)
+    stand_in = replay.UpstreamStandIn(replay_latency=False)
+    stand_in.register({"kind": "chat", "req": {}, "up": [["docs-status", 0, {"success": True, "data": {"projects": []}}]]})
+    for _, _, first_request in AGENTS.values():
+        if first_request is None:
+            continue
+        _, path, body = first_request
+        kind = "understand" if path == "/understand" else "analyze"
+        stand_in.register({"kind": kind, "req": body, "up": [["asi1", 0, "{}"]]})
+    stand_in.start()
+    return stand_in
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agent import time, time to ready and first request latency")
+    parser.add_argument("--agent", action="append", choices=sorted(AGENTS), help="Agents to measure (default: all)")
+    parser.add_argument("--modes", default="background,blocking,off", help="STARTUP_WARMUP modes to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per agent and mode (medians are reported)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds between ready and the first request")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports listed per agent")
+    parser.add_argument("--imports-only", action="store_true", help="Only report import times")
+    args = parser.parse_args()
+
+    stand_in = load_stand_in()
+    names = args.agent or list(AGENTS)
+    modes = [m for m in args.modes.split(",") if m]
+
+    # Agents write keys and storage files to the working directory; keep them out of the repo
+    workdir = tempfile.mkdtemp(prefix="agent-startup-")
+
+    rows = []
+    for name in names:
+        env = agent_env(stand_in.base_url, modes[0])
+        seconds, packages = import_report(name, env, workdir, args.top)
+        print(f"\n{name}: module import {seconds * 1000:.0f}ms")
+        for package, ms in packages:
+            print(f"    {package:<40} {ms:>8.1f}ms")
+        if args.imports_only:
+            continue
+        for mode in modes:
+            env = agent_env(stand_in.base_url, mode)
+            results = [cold_start(name, env, workdir, args.delay) for _ in range(args.runs)]
+            ready = statistics.median(r[0] for r in results)
+            firsts = [r[1] for r in results if r[1] is not None]
+            rows.append((name, mode, ready, statistics.median(firsts) if firsts else None))
+
+    if rows:
+        print(f"\n{'agent':<10} {'mode':<12} {'time to ready':>14} {'first request':>14}")
+        for name, mode, ready, first in rows:
+            first_text = f"{first * 1000:.0f}ms" if first is not None else "-"
+            print(f"{name:<10} {mode:<12} {ready * 1000:>12.0f}ms {first_text:>14}")
+    stand_in.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Vendors the shared agent modules into each agent directory.
+
+Agents deploy independently (an Agentverse agent is the files uploaded next
+to its script), so every agent directory carries its own copy of the modules
+in agents/common/. Those copies are generated: edit the module here, then
+re-run this script. `--check` only compares and exits 1 if a copy is missing
+or differs (common/test_sync.py runs it with the tests).
+
+Usage (from agents/):
+    python common/sync.py
+    python common/sync.py --check
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+COMMON_DIR = Path(__file__).resolve().parent
+AGENTS_DIR = COMMON_DIR.parent / "agents"
+
+AGENTS = ["main-agent", "metta-agent", "query-understanding-agent", "metadata-extractor-agent"]
+
+def shared_modules() -> List[Path]:
+    return sorted(p for p in COMMON_DIR.glob("*.py") if p.name != "sync.py" and not p.name.startswith("test_"))
+
+def vendored(module: Path) -> str:
+    """Contents of an agent's copy of a shared module"""
+    header = f"# Generated from agents/common/{module.name} by common/sync.py: edit that file, then re-run it.\n"
+    return header + module.read_text(encoding="utf-8")
+
+def stale_copies() -> List[Path]:
+    """Agent copies that are missing or differ from their shared module"""
+    stale = []
+    for module in shared_modules():
+        expected = vendored(module)
+        for agent in AGENTS:
+            copy = AGENTS_DIR / agent / module.name
+            if not copy.exists() or copy.read_text(encoding="utf-8") != expected:
+                stale.append(copy)
+    return stale
+
+def main():
+    parser = argparse.ArgumentParser(description="Vendor agents/common/ modules into each agent directory")
+    parser.add_argument("--check", action="store_true", help="Only report stale copies (exit 1 if any)")
+    args = parser.parse_args()
+
+    stale = stale_copies()
+    if args.check:
+        for copy in stale:
+            print(f"Stale: {copy.relative_to(AGENTS_DIR.parent)} (run python common/sync.py)")
+        sys.exit(1 if stale else 0)
+    for copy in stale:
+        copy.write_text(vendored(COMMON_DIR / copy.name), encoding="utf-8")
+        print(f"Updated {copy.relative_to(AGENTS_DIR.parent)}")
+
+if __name__ == "__main__":
+    main()
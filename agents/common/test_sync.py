@@ -0,0 +1,5 @@
+from sync import stale_copies
+
+def test_agent_copies_match_the_shared_modules():
+    stale = [str(path) for path in stale_copies()]
+    assert not stale, "Re-run python common/sync.py"
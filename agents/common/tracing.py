@@ -0,0 +1,184 @@
+"""
+Request tracing.
+
+The main agent starts a trace for every chat message. The trace id travels with
+the request as a W3C `traceparent` value: an HTTP header on the docs status and
+smart search calls (forwarded by the Next.js route to the query understanding
+agent), and a `traceparent` field on the REST request models and
+ReasoningRequest messages. Each agent records spans and exports them, one
+minified JSON object per span:
+
+    {"trace": "4bf9...", "span": "00f0...", "parent": "a3ce...", "service": "main",
+     "name": "asi1", "start": 1700000000.123456, "ms": 2310.4, "attrs": {...}}
+
+to TRACE_EXPORT_PATH (JSON Lines, append-only) and/or TRACE_COLLECTOR_URL
+(POSTed in batches as a JSON array, e.g. to `agents/traffic/traces.py serve`).
+`agents/traffic/traces.py show` prints the waterfall and critical path of a trace.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, Optional, Tuple
+
+# Span the running code belongs to (per asyncio task / thread)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Returns (trace_id, parent_span_id) from a traceparent value, or None if it is malformed"""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+class Span:
+    """A timed operation; ends (and is exported) once, on end() or when its with block exits"""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        self._ended = False
+
+    @property
+    def traceparent(self) -> str:
+        """Context to hand to the next hop; its spans become children of this one"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set(self, **attrs: Any):
+        self.attrs.update(attrs)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self._ended:
+            return
+        self._ended = True
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # Ended from another task or thread: that context was never changed
+        record = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "service": self.tracer.service,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "ms": round((time.perf_counter() - self._start) * 1000, 1),
+            "attrs": self.attrs,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        self.tracer.export(record)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+        return False
+
+class Tracer:
+    """
+    Args:
+        service: Agent name written into every span
+        path: JSON Lines file spans are appended to (None disables)
+        collector_url: Collector spans are POSTed to in batches (None disables)
+        batch_size: Spans per collector request
+    """
+
+    def __init__(self, service: str, path: Optional[str] = None, collector_url: Optional[str] = None, batch_size: int = 64):
+        self.service = service
+        self.collector_url = collector_url
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=10000)
+        self._sender: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, service: str, process: str = "") -> "Tracer":
+        """process: Name inserted before the file extension, so that processes sharing the settings write separate files"""
+        path = os.getenv("TRACE_EXPORT_PATH") or None
+        if path and process:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{process}{ext}"
+        return cls(
+            service,
+            path,
+            os.getenv("TRACE_COLLECTOR_URL") or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None or self.collector_url is not None
+
+    def span(self, name: str, traceparent: Optional[str] = None, **attrs: Any) -> Span:
+        """
+        Starts a span and makes it current
+
+        The span continues the trace of `traceparent` (a request from another hop),
+        else is a child of the current span, else starts a new trace.
+        """
+        remote = parse_traceparent(traceparent)
+        parent = _current_span.get()
+        if remote is not None:
+            trace_id, parent_id = remote
+        elif parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(self, name, trace_id, parent_id, attrs)
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def headers(self) -> Dict[str, str]:
+        """HTTP headers propagating the current span (empty outside a trace)"""
+        span = _current_span.get()
+        return {"traceparent": span.traceparent} if span is not None else {}
+
+    def export(self, record: dict):
+        if self._file is not None:
+            line = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+        if self.collector_url is not None:
+            if self._sender is None:
+                # Started lazily so worker processes each get their own sender thread
+                self._sender = threading.Thread(target=self._send_batches, daemon=True)
+                self._sender.start()
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                pass  # Collector unreachable or slow: drop spans rather than grow without bound
+
+    def _send_batches(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=0.5))
+                except queue.Empty:
+                    break
+            request = urllib.request.Request(
+                self.collector_url,
+                data=json.dumps(batch, default=str).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                print(f"Error exporting {len(batch)} spans: {e}")
@@ -0,0 +1,137 @@
+"""
+Cold start helpers.
+
+Hosted runtimes restart agents often, so the agents keep their import path
+short: slow dependencies (the openai SDK, hyperon) and the clients built from
+them are created on first use through `Lazy`. The warm-up then builds them
+before the first real message arrives, together with connection pools and
+interpreters:
+
+- `start_warm_up` is called at the end of the agent module, so it runs in
+  parallel with the uagents startup (registration, Agentverse status) instead
+  of after it. It also runs in each main agent worker process, which imports
+  the module too.
+- `warm_up` is awaited from a startup handler for what only exists once the
+  agent has started (the MeTTa reasoning pool).
+
+STARTUP_WARMUP selects the mode:
+    background  Warm up in the background while the agent starts serving (default)
+    blocking    Warm up before the agent starts serving
+    off         No warm-up: everything is built on first use
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from uagents.utils import get_logger
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background")
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    """A value built by `factory` on first get(), once, from any thread"""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self._factory()
+                    self._built = True
+        return self._value
+
+# Steps are (name, callable); plain callables run in a thread, coroutine functions on the loop
+WarmupStep = Tuple[str, Callable[[], Any]]
+
+_background_tasks = set()
+
+def _logger(agent_name: str) -> logging.Logger:
+    # Reuse the agent's uagents logger when it already exists (get_logger adds a handler per call)
+    logger = logging.getLogger(agent_name)
+    return logger if logger.handlers else get_logger(agent_name)
+
+def _log_step(logger, name: str, step_start: float, error: Optional[Exception] = None):
+    if error is None:
+        logger.info(f"🔥 Warmed up {name} in {(time.perf_counter() - step_start) * 1000:.0f}ms")
+    else:
+        logger.warning(f"🔥 Warm-up of {name} failed: {error}")
+
+def _run_steps_sync(logger, steps: List[WarmupStep]):
+    start = time.perf_counter()
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+            _log_step(logger, name, step_start)
+        except Exception as e:
+            _log_step(logger, name, step_start, e)
+    logger.info(f"🔥 Warm-up complete in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+async def _run_steps(logger, steps: List[WarmupStep]):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step):
+                await step()
+            else:
+                await loop.run_in_executor(None, step)
+            _log_step(logger, name, step_start)
+        except Exception as e:
+            _log_step(logger, name, step_start, e)
+    logger.info(f"🔥 Warm-up complete in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+def start_warm_up(agent_name: str, steps: List[WarmupStep], mode: str = STARTUP_WARMUP):
+    """Runs plain warm-up steps in order according to the startup mode (call at the end of the agent module)"""
+    if mode == "off" or not steps:
+        return
+    logger = _logger(agent_name)
+    if mode == "blocking":
+        _run_steps_sync(logger, steps)
+        return
+    threading.Thread(target=_run_steps_sync, args=(logger, steps), name="warm-up", daemon=True).start()
+
+async def warm_up(logger, steps: List[WarmupStep], mode: str = STARTUP_WARMUP):
+    """Runs the warm-up steps in order according to the startup mode (call from the startup handler)"""
+    if mode == "off" or not steps:
+        return
+    if mode == "blocking":
+        await _run_steps(logger, steps)
+        return
+    task = asyncio.create_task(_run_steps(logger, steps))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def open_api_connection(client: Any):
+    """
+    Opens a pooled connection from an OpenAI-compatible client with a cheap request
+
+    Any HTTP answer (even an error status) leaves the TLS connection in the
+    client's pool; only transport errors are raised. The SDK imports its
+    resource modules on first access, so the chat completions one is loaded too.
+    """
+    client.chat.completions
+    try:
+        client.with_options(timeout=5, max_retries=0).models.list()
+    except Exception as e:
+        if getattr(e, "status_code", None) is None:
+            raise
+
+def log_import_time(agent_name: str, import_start: float):
+    """Logs how long the agent module took to import (call at its end with time.perf_counter() from its first line)"""
+    _logger(agent_name).info(f"⏱️ Module imported in {(time.perf_counter() - import_start) * 1000:.0f}ms (STARTUP_WARMUP={STARTUP_WARMUP})")
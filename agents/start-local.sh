@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # ETH Global Hacker Assistant - Local Development Startup Script
-# This script starts both agents in separate terminal tabs/windows
+# This script starts both agents as child processes of this shell
 
 set -e  # Exit on error
 
@@ -41,77 +41,46 @@ else
     echo "✅ Dependencies OK"
 fi
 
+# Each agent directory carries a copy of the shared modules in common/
+python3 common/sync.py
+
 echo ""
 echo "🤖 Starting agents..."
 echo ""
 
-# Detect terminal and OS
-if [[ "$OSTYPE" == "darwin"* ]]; then
-    # macOS - use Terminal.app
-    echo "📍 Detected macOS - Using Terminal.app"
-
-    # Start MeTTa Agent in new tab
-    osascript -e 'tell application "Terminal"
-        do script "cd \"'"$PWD"'/agents/metta-agent\" && echo \"🧠 Starting MeTTa Reasoning Agent...\" && python3 metta-agent.py"
-    end tell'
-
-    sleep 2
+# Number of main agent worker processes (0 or 1 = single process)
+MAIN_AGENT_WORKERS=${MAIN_AGENT_WORKERS:-$(grep -E '^MAIN_AGENT_WORKERS=' .env | cut -d= -f2)}
+export MAIN_AGENT_WORKERS=${MAIN_AGENT_WORKERS:-0}
 
-    # Start Main Agent in new tab
-    osascript -e 'tell application "Terminal"
-        do script "cd \"'"$PWD"'/agents/main-agent\" && echo \"🤖 Starting Main Agent...\" && python3 agent.py"
-    end tell'
-
-    echo "✅ Agents started in separate Terminal tabs"
+# Both agents run as children of this script: output is prefixed per agent and
+# Ctrl+C (or a crash of either agent) stops everything. PIDS holds the python
+# processes themselves (not the log prefixers), so cleanup frees their ports
+PIDS=()
+cleanup() {
+    trap - INT TERM EXIT
     echo ""
-    echo "📊 Check the new Terminal tabs to see agent logs"
-
-elif [[ "$OSTYPE" == "linux-gnu"* ]]; then
-    # Linux - try gnome-terminal, then xterm
-    if command -v gnome-terminal &> /dev/null; then
-        echo "📍 Detected Linux - Using gnome-terminal"
-
-        gnome-terminal --tab --title="MeTTa Agent" -- bash -c "cd agents/metta-agent && echo '🧠 Starting MeTTa Reasoning Agent...' && python3 metta-agent.py; exec bash"
-        gnome-terminal --tab --title="Main Agent" -- bash -c "cd agents/main-agent && echo '🤖 Starting Main Agent...' && python3 agent.py; exec bash"
-
-        echo "✅ Agents started in separate gnome-terminal tabs"
-    elif command -v tmux &> /dev/null; then
-        echo "📍 Using tmux for terminal management"
-
-        # Create new tmux session with two panes
-        tmux new-session -d -s eth-global-agents
-        tmux send-keys -t eth-global-agents:0 'cd agents/metta-agent && echo "🧠 Starting MeTTa Reasoning Agent..." && python3 metta-agent.py' C-m
-        tmux split-window -h -t eth-global-agents:0
-        tmux send-keys -t eth-global-agents:0.1 'cd agents/main-agent && echo "🤖 Starting Main Agent..." && python3 agent.py' C-m
-        tmux attach-session -t eth-global-agents
-
-        echo "✅ Agents started in tmux session"
-    else
-        echo "⚠️  No suitable terminal emulator found"
-        echo "   Starting agents in background processes..."
-
-        # Fallback: start in background
-        cd agents/metta-agent && python3 metta-agent.py > ../../logs/metta-agent.log 2>&1 &
-        METTA_PID=$!
-        cd ../..
-
-        cd agents/main-agent && python3 agent.py > ../../logs/main-agent.log 2>&1 &
-        MAIN_PID=$!
-        cd ../..
-
-        echo "✅ Agents started in background"
-        echo "   MeTTa Agent PID: $METTA_PID (logs: logs/metta-agent.log)"
-        echo "   Main Agent PID: $MAIN_PID (logs: logs/main-agent.log)"
-        echo ""
-        echo "   To stop agents: kill $METTA_PID $MAIN_PID"
-    fi
+    echo "🛑 Stopping agents..."
+    kill "${PIDS[@]}" 2>/dev/null || true
+    wait 2>/dev/null || true
+}
+trap cleanup INT TERM EXIT
+
+start_agent() {
+    local name=$1 dir=$2 script=$3
+    (cd "$dir" && exec python3 -u "$script") > >(sed -u "s/^/[$name] /") 2>&1 &
+    PIDS+=($!)
+}
+
+echo "🧠 Starting MeTTa Reasoning Agent..."
+start_agent "metta" agents/metta-agent metta-agent.py
+sleep 2
+
+if [ "$MAIN_AGENT_WORKERS" -gt 1 ]; then
+    echo "🤖 Starting Main Agent (supervisor + $MAIN_AGENT_WORKERS workers)..."
 else
-    echo "❌ Unsupported operating system: $OSTYPE"
-    echo "   Please start agents manually:"
-    echo "   Terminal 1: cd agents/metta-agent && python3 metta-agent.py"
-    echo "   Terminal 2: cd agents/main-agent && python3 agent.py"
-    exit 1
+    echo "🤖 Starting Main Agent..."
 fi
+start_agent "main" agents/main-agent agent.py
 
 echo ""
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
@@ -126,9 +95,21 @@ echo "   MeTTa Agent: 8000"
 echo "   Main Agent: 8001"
 echo ""
 echo "💡 Tips:"
-echo "   - Check terminal tabs/windows for agent logs"
+echo "   - Logs of both agents are shown here, prefixed with [metta] / [main]"
+echo "   - Set MAIN_AGENT_WORKERS=N in .env to run the main agent with N worker processes"
 echo "   - Main agent will call MeTTa agent automatically"
 echo "   - Set ENABLE_METTA_REASONING=false in .env for faster responses"
 echo ""
-echo "🛑 To stop agents: Close the terminal tabs or press Ctrl+C in each"
+echo "🛑 To stop agents: press Ctrl+C"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+
+# Exit (and stop the other agent) as soon as either agent exits
+# (polling instead of `wait -n`, which needs bash 5.1 and macOS ships bash 3.2)
+while true; do
+    for pid in "${PIDS[@]}"; do
+        if ! kill -0 "$pid" 2>/dev/null; then
+            exit 0
+        fi
+    done
+    sleep 1
+done
@@ -0,0 +1,437 @@
+"""
+Deterministic replay of captured agent traffic.
+
+Reads capture logs written with TRAFFIC_CAPTURE_PATH (see capture.py in each
+agent) and re-drives the requests in-process against the current agent code,
+with local stand-ins for every upstream:
+
+- chat (main agent): handle_user_message with the Next.js API (docs status,
+  smart search) and ASI-1 served by a local HTTP stand-in that returns the
+  recorded responses after the recorded latency. MeTTa reasoning is disabled
+  (replay MeTTa captures on their own).
+- understand / analyze (query understanding / metadata extractor):
+  analyze_query / analyze_markdown with ASI-1 served by the stand-in.
+- reasoning (MeTTa agent): the recorded chunk features through a local
+  ReasoningPool and MicroBatcher.
+
+Requests are issued at their recorded offsets divided by --speed (1, 10, ...)
+or as fast as --concurrency allows (--speed max), and the report lists
+latency percentiles and throughput per kind next to the captured latencies.
+
+Usage (from agents/):
+    python traffic/replay.py capture.jsonl
+    python traffic/replay.py capture.jsonl --speed 10 --kinds chat,understand
+    python traffic/replay.py metta.jsonl main.jsonl --speed max --upstream-latency none --json report.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent / "agents"
+
+KINDS = ("chat", "understand", "analyze", "reasoning")
+
+# Keys the stand-in uses to find the recorded ASI-1 answer for a prompt
+_ANALYZE_KEY = re.compile(r"\n\nFile: (.+)\n")
+_UNDERSTAND_KEY = re.compile(r"\*\*User Query:\*\*\n\"(.*)\"\n")
+
+def load_module(name: str, path: Path):
+    """Imports a module from a file, with its directory on sys.path for sibling imports"""
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_capture(paths: List[str], kinds: List[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("kind") in kinds:
+                    records.append(record)
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+# ============================================================================
+# Upstream stand-in
+# ============================================================================
+
+class UpstreamStandIn:
+    """
+    Local HTTP server answering the Next.js API and ASI-1 with recorded responses
+
+    Responses are registered per record before it is replayed; latency is the
+    recorded one unless replay_latency is False.
+    """
+
+    def __init__(self, replay_latency: bool):
+        self.replay_latency = replay_latency
+        self.docs_status = None  # (ms, response)
+        self.search: Dict[str, Any] = {}  # query -> (ms, response)
+        self.completions: Dict[str, Any] = {}  # prompt key -> (ms, content)
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+
+    def register(self, record: Dict[str, Any]):
+        """Makes a record's upstream responses available"""
+        request = record["req"]
+        for name, ms, response in record.get("up", []):
+            if name == "docs-status":
+                self.docs_status = (ms, response)
+            elif name == "smart-search":
+                # Follow-ups are searched with a rewritten query, which the search route echoes back
+                query = response.get("query") if isinstance(response, dict) else None
+                self.search[query or request["query"]] = (ms, response)
+            elif name == "asi1":
+                if record["kind"] == "chat":
+                    key = request["query"]
+                elif record["kind"] == "understand":
+                    key = f"understand:{request['query']}"
+                else:
+                    key = f"file:{request['file_name']}"
+                self.completions[key] = (ms, response)
+
+    def docs_status_response(self):
+        """(ms, response) for a docs status request, or None"""
+        return self.docs_status
+
+    def search_response(self, body: Dict[str, Any]):
+        """(ms, response) for a smart search request, or None"""
+        return self.search.get(body.get("query", ""))
+
+    def completion_response(self, body: Dict[str, Any]):
+        """(ms, content) for a chat completion request, or None"""
+        return self._completion_for(body.get("messages", []))
+
+    def completion_usage(self, body: Dict[str, Any], content: str) -> Dict[str, int]:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    def _completion_for(self, messages: List[Dict[str, Any]]):
+        prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        if prompt in self.completions:
+            return self.completions[prompt]
+        match = _ANALYZE_KEY.search(prompt)
+        if match and f"file:{match.group(1)}" in self.completions:
+            return self.completions[f"file:{match.group(1)}"]
+        match = _UNDERSTAND_KEY.search(prompt)
+        if match and f"understand:{match.group(1)}" in self.completions:
+            return self.completions[f"understand:{match.group(1)}"]
+        return None
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, entry, wrap=None):
+                if entry is None:
+                    with stand_in._lock:
+                        stand_in.misses += 1
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                ms, response = entry
+                if stand_in.replay_latency:
+                    time.sleep(ms / 1000)
+                if isinstance(response, dict) and set(response) == {"error"}:
+                    self.send_response(502)
+                    self.end_headers()
+                    return
+                body = json.dumps(wrap(response) if wrap else response).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith("/api/docs/status"):
+                    self._reply(stand_in.docs_status_response())
+                else:
+                    self._reply(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/api/docs/smart-search"):
+                    self._reply(stand_in.search_response(body))
+                elif self.path.startswith("/v1/chat/completions"):
+                    self._reply(stand_in.completion_response(body), wrap=lambda content: {
+                        "id": f"replay-{uuid4()}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", ""),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": stand_in.completion_usage(body, content),
+                    })
+                else:
+                    self._reply(None)
+
+        return Handler
+
+# ============================================================================
+# Replay targets
+# ============================================================================
+
+class ReplayContext:
+    """Context for handlers replayed in-process: quiet logger, sends are dropped"""
+
+    def __init__(self):
+        self.logger = logging.getLogger("replay")
+
+    async def send(self, destination: str, message: Any):
+        pass
+
+class Targets:
+    """Loads the agent code needed by the kinds being replayed"""
+
+    def __init__(self, kinds: List[str], stand_in: UpstreamStandIn, metta_workers: int, threads: int):
+        os.environ["ASI1_BASE_URL"] = f"{stand_in.base_url}/v1"
+        os.environ.setdefault("ASI1_API_KEY", "replay")
+        os.environ["NEXT_API_BASE_URL"] = f"{stand_in.base_url}/api"
+        os.environ["METTA_AGENT_ADDRESS"] = ""
+        os.environ["HISTORY_DB_PATH"] = ":memory:"
+        os.environ["CHUNK_INDEX_PATH"] = ":memory:"
+        os.environ["FAQ_DB_PATH"] = ":memory:"
+        os.environ.pop("TRAFFIC_CAPTURE_PATH", None)
+        os.environ["STARTUP_WARMUP"] = "off"  # Upstream calls come from the replayed records only
+        # Replayed senders arrive faster than real users; admission limits stay configurable through the environment
+        os.environ.setdefault("SENDER_RATE_PER_MINUTE", "1000000")
+        os.environ.setdefault("SENDER_BURST", "1000000")
+        os.environ.setdefault("MAX_QUEUED_REQUESTS", "1000000")
+
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.main = self.query = self.metadata = None
+        self.chat_loop = None
+        self.pool = self.batcher = None
+        if "chat" in kinds:
+            # The main agent makes blocking HTTP calls from its handler, so it gets its own
+            # event loop (as in production) instead of stalling the other kinds' replay. It is
+            # loaded on that loop's thread, which owns its SQLite history connection.
+            self.chat_loop = asyncio.new_event_loop()
+
+            def run_chat_loop():
+                asyncio.set_event_loop(self.chat_loop)
+                self.chat_loop.run_forever()
+
+            threading.Thread(target=run_chat_loop, daemon=True).start()
+
+            async def load_main():
+                return load_module("main_agent", AGENTS_DIR / "main-agent" / "agent.py")
+
+            self.main = asyncio.run_coroutine_threadsafe(load_main(), self.chat_loop).result()
+        if "understand" in kinds:
+            self.query = load_module("query_understanding_agent", AGENTS_DIR / "query-understanding-agent" / "agent.py")
+        if "analyze" in kinds:
+            self.metadata = load_module("metadata_extractor_agent", AGENTS_DIR / "metadata-extractor-agent" / "agent.py")
+        if "reasoning" in kinds:
+            sys.path.insert(0, str(AGENTS_DIR / "metta-agent"))
+            from micro_batcher import MicroBatcher
+            from reasoning import REASONING_ERROR_PREFIX
+            from reasoning_pool import ReasoningPool
+            self.reasoning_error_prefix = REASONING_ERROR_PREFIX
+            self.pool = ReasoningPool(metta_workers, max_pending=10000, job_timeout=float(os.getenv("METTA_JOB_TIMEOUT", "10")))
+            self.batcher = MicroBatcher(
+                self.pool.run,
+                window=float(os.getenv("METTA_BATCH_WINDOW_MS", "20")) / 1000,
+                max_size=int(os.getenv("METTA_BATCH_MAX_SIZE", "16")),
+            )
+
+    def start(self):
+        # Agents build their ASI1 client lazily (see warmup.py); build it before the clock starts
+        for module in (self.main, self.query, self.metadata):
+            if module is not None:
+                module.asi1_client.get().chat.completions
+        if self.pool is not None:
+            self.pool.start()
+
+    def context(self) -> ReplayContext:
+        return ReplayContext()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.chat_loop is not None:
+            self.chat_loop.call_soon_threadsafe(self.chat_loop.stop)
+        self.executor.shutdown(wait=False)
+
+    async def run(self, record: Dict[str, Any]) -> bool:
+        """Replays one record; returns False if the request failed"""
+        kind = record["kind"]
+        request = record["req"]
+        loop = asyncio.get_running_loop()
+        if kind == "chat":
+            from uagents_core.contrib.protocols.chat import ChatMessage, TextContent
+            msg = ChatMessage(timestamp=datetime.now(timezone.utc), msg_id=uuid4(), content=[TextContent(text=request["query"])])
+            handled = self.main.handle_user_message(self.context(), request["sender"], msg)
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(handled, self.chat_loop))
+            return True
+        if kind == "understand":
+            await loop.run_in_executor(self.executor, self.query.analyze_query, request["query"], request.get("available_projects", []))
+            return True
+        if kind == "analyze":
+            await loop.run_in_executor(self.executor, self.metadata.analyze_markdown, request["markdown_content"], request["file_name"])
+            return True
+        chunks = [(chunk_id, content_hash, frozenset(features)) for chunk_id, content_hash, features in request["chunks"]]
+        reasoning = await self.batcher.submit(request["query"], chunks, request.get("entities", []))
+        return not reasoning.startswith(self.reasoning_error_prefix)
+
+# ============================================================================
+# Driver
+# ============================================================================
+
+async def replay(records: List[Dict[str, Any]], targets: Targets, stand_in: UpstreamStandIn, speed: Optional[float], concurrency: int):
+    results: Dict[str, Dict[str, List[float]]] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    t0 = records[0]["ts"]
+    start = time.perf_counter()
+
+    async def issue(record):
+        stats = results.setdefault(record["kind"], {"latency": [], "captured": [], "errors": []})
+        async with semaphore:
+            stand_in.register(record)
+            issued = time.perf_counter()
+            try:
+                ok = await targets.run(record)
+            except Exception as e:
+                logging.getLogger("replay").warning(f"{record['kind']} request failed: {e}")
+                ok = False
+            stats["latency"].append((time.perf_counter() - issued) * 1000)
+            stats["captured"].append(record.get("ms") or 0)
+            if not ok:
+                stats["errors"].append(1)
+
+    tasks = []
+    for record in records:
+        if speed is not None:
+            delay = (record["ts"] - t0) / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(issue(record)))
+    await asyncio.gather(*tasks)
+    return results, time.perf_counter() - start
+
+def build_report(results: Dict[str, Dict[str, List[float]]], wall: float, misses: int, speed: str) -> Dict[str, Any]:
+    report = {"speed": speed, "wall_seconds": round(wall, 3), "upstream_misses": misses, "kinds": {}}
+    for kind, stats in sorted(results.items()):
+        latency = stats["latency"]
+        report["kinds"][kind] = {
+            "requests": len(latency),
+            "errors": len(stats["errors"]),
+            "throughput_rps": round(len(latency) / wall, 2) if wall else None,
+            "p50_ms": round(percentile(latency, 50), 1),
+            "p90_ms": round(percentile(latency, 90), 1),
+            "p99_ms": round(percentile(latency, 99), 1),
+            "max_ms": round(max(latency), 1),
+            "captured_p50_ms": round(statistics.median(stats["captured"]), 1),
+        }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nReplay at {report['speed']} speed: {report['wall_seconds']}s wall, {report['upstream_misses']} upstream misses")
+    print(f"{'kind':<12} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'captured p50':>13}")
+    for kind, row in report["kinds"].items():
+        print(
+            f"{kind:<12} {row['requests']:>8} {row['errors']:>7} {row['throughput_rps']:>8} "
+            f"{row['p50_ms']:>7}ms {row['p90_ms']:>7}ms {row['p99_ms']:>7}ms {row['max_ms']:>7}ms {row['captured_p50_ms']:>11}ms"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured agent traffic against local stand-ins")
+    parser.add_argument("captures", nargs="+", help="Capture logs (JSON Lines)")
+    parser.add_argument("--speed", default="1", help="Time compression: 1, 10, ... or 'max'")
+    parser.add_argument("--kinds", default=",".join(KINDS), help=f"Comma-separated kinds to replay ({', '.join(KINDS)})")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--upstream-latency", choices=("recorded", "none"), default="recorded", help="Stand-in response latency")
+    parser.add_argument("--metta-workers", type=int, default=2, help="MeTTa worker processes for reasoning replay")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    logging.getLogger("asyncio").setLevel(logging.CRITICAL)  # Agents created for replay are never run
+    kinds = [k for k in args.kinds.split(",") if k]
+    records = load_capture(args.captures, kinds)
+    if not records:
+        print("No records to replay")
+        return
+    speed = None if args.speed == "max" else float(args.speed)
+
+    # Agents write key/storage files to the working directory; keep them out of the repo
+    capture_paths = [os.path.abspath(p) for p in args.captures]
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(tempfile.mkdtemp(prefix="agent-replay-"))
+
+    stand_in = UpstreamStandIn(replay_latency=args.upstream_latency == "recorded")
+    stand_in.start()
+    present = sorted({r["kind"] for r in records})
+    targets = Targets(present, stand_in, args.metta_workers, threads=args.concurrency)
+    print(f"Replaying {len(records)} records ({', '.join(present)}) from {', '.join(capture_paths)}")
+
+    async def run():
+        targets.start()
+        if targets.pool is not None:
+            await targets.pool.warm_up()  # As the MeTTa agent does after startup
+        try:
+            return await replay(records, targets, stand_in, speed, args.concurrency)
+        finally:
+            targets.shutdown()
+
+    if args.verbose:
+        results, wall = asyncio.run(run())
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results, wall = asyncio.run(run())
+    stand_in.stop()
+
+    report = build_report(results, wall, stand_in.misses, args.speed if speed is None else f"{args.speed}x")
+    print_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
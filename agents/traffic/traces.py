@@ -0,0 +1,184 @@
+"""
+Trace collector and viewer.
+
+Spans are written by each agent (tracing.py, TRACE_EXPORT_PATH) and by the
+Next.js search route; this tool gathers them and shows where a request spent
+its time.
+
+    serve   Local collector: accepts POSTed JSON arrays of spans (TRACE_COLLECTOR_URL)
+            and appends them to a JSON Lines file
+    list    Slowest traces in one or more span files
+    show    Waterfall of one trace with its critical path marked (*)
+
+Usage (from agents/):
+    python traffic/traces.py serve --port 4318 --out spans.jsonl
+    python traffic/traces.py list spans.jsonl metta-spans.jsonl
+    python traffic/traces.py show spans.jsonl metta-spans.jsonl --trace 4bf92f35...
+    python traffic/traces.py show spans.jsonl                     # slowest trace
+"""
+
+import argparse
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set
+
+def load_spans(paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans grouped by trace id"""
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    span = json.loads(line)
+                    traces[span["trace"]].append(span)
+    return traces
+
+def span_end(span: Dict[str, Any]) -> float:
+    return span["start"] + span["ms"] / 1000
+
+def trace_bounds(spans: List[Dict[str, Any]]):
+    start = min(s["start"] for s in spans)
+    return start, max(span_end(s) for s in spans) - start
+
+def critical_path(children: Dict[Optional[str], List[Dict[str, Any]]]) -> Set[str]:
+    """
+    Span ids on the critical path: walking back from the end of the slowest root,
+    each span waited on the child that finished last, which in turn started
+    after the child finished before it, and so on down the tree
+    """
+    path = set()
+
+    def visit(span):
+        path.add(span["span"])
+        cursor = span_end(span) + 1e-4
+        for child in sorted(children.get(span["span"], []), key=span_end, reverse=True):
+            if span_end(child) <= cursor:
+                visit(child)
+                cursor = child["start"] + 1e-4
+
+    roots = children.get(None, [])
+    if roots:
+        visit(max(roots, key=span_end))
+    return path
+
+def show_trace(trace_id: str, spans: List[Dict[str, Any]], width: int = 40):
+    ids = {s["span"] for s in spans}
+    children = defaultdict(list)
+    for span in spans:
+        # Spans whose parent was not exported (e.g. a hop without tracing) are shown as roots
+        children[span["parent"] if span["parent"] in ids else None].append(span)
+    for kids in children.values():
+        kids.sort(key=lambda s: s["start"])
+    critical = critical_path(children)
+    t0, total = trace_bounds(spans)
+    scale = width / total if total else 0
+
+    print(f"Trace {trace_id}: {total * 1000:.1f}ms, {len(spans)} spans, services: {', '.join(sorted({s['service'] for s in spans}))}\n")
+
+    def walk(span, depth):
+        offset = (span["start"] - t0) * 1000
+        bar_start = int(offset / 1000 * scale)
+        bar = " " * bar_start + "█" * max(1, int(span["ms"] / 1000 * scale))
+        mark = "*" if span["span"] in critical else " "
+        label = f"{'  ' * depth}{span['service']}:{span['name']}"
+        attrs = " ".join(f"{k}={v}" for k, v in span.get("attrs", {}).items())
+        error = f" ERROR {span['error']}" if span.get("error") else ""
+        print(f"{mark} {label:<40} {offset:>9.1f}ms {span['ms']:>9.1f}ms |{bar:<{width}}| {attrs}{error}")
+        for child in children.get(span["span"], []):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+
+    print("\nCritical path:")
+    for span in sorted((s for s in spans if s["span"] in critical), key=lambda s: s["start"]):
+        own = span["ms"] - sum(c["ms"] for c in children.get(span["span"], []) if c["span"] in critical)
+        print(f"  {span['service']}:{span['name']:<24} {span['ms']:>9.1f}ms (self {max(own, 0):.1f}ms)")
+
+def list_traces(traces: Dict[str, List[Dict[str, Any]]], limit: int):
+    rows = []
+    for trace_id, spans in traces.items():
+        _, total = trace_bounds(spans)
+        root = min(spans, key=lambda s: s["start"])
+        rows.append((total, trace_id, root, spans))
+    rows.sort(key=lambda r: r[0], reverse=True)
+    print(f"{'trace':<34} {'root':<24} {'total':>10} {'spans':>6}  services")
+    for total, trace_id, root, spans in rows[:limit]:
+        services = ",".join(sorted({s["service"] for s in spans}))
+        print(f"{trace_id:<34} {root['service'] + ':' + root['name']:<24} {total * 1000:>8.1f}ms {len(spans):>6}  {services}")
+
+def serve(port: int, out: str):
+    lock = threading.Lock()
+    sink = open(out, "a", encoding="utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            try:
+                spans = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if isinstance(spans, dict):
+                    spans = [spans]
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            lines = "".join(json.dumps(s, separators=(",", ":"), ensure_ascii=False) + "\n" for s in spans)
+            with lock:
+                sink.write(lines)
+                sink.flush()
+            self.send_response(204)
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    print(f"Collecting spans on http://localhost:{port}/spans into {out}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect and inspect request traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="Run a local span collector")
+    serve_cmd.add_argument("--port", type=int, default=4318)
+    serve_cmd.add_argument("--out", default="spans.jsonl", help="JSON Lines file spans are appended to")
+
+    list_cmd = commands.add_parser("list", help="List the slowest traces")
+    list_cmd.add_argument("files", nargs="+")
+    list_cmd.add_argument("--limit", type=int, default=20)
+
+    show_cmd = commands.add_parser("show", help="Show one trace (default: the slowest)")
+    show_cmd.add_argument("files", nargs="+")
+    show_cmd.add_argument("--trace", help="Trace id (a unique prefix is enough)")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.port, args.out)
+        return
+
+    traces = load_spans(args.files)
+    if not traces:
+        print("No spans found")
+        return
+    if args.command == "list":
+        list_traces(traces, args.limit)
+        return
+
+    if args.trace:
+        matches = [t for t in traces if t.startswith(args.trace)]
+        if len(matches) != 1:
+            print(f"{len(matches)} traces match {args.trace}")
+            return
+        trace_id = matches[0]
+    else:
+        trace_id = max(traces, key=lambda t: trace_bounds(traces[t])[1])
+    show_trace(trace_id, traces[trace_id])
+
+if __name__ == "__main__":
+    main()
@@ -16,8 +16,13 @@ import { NextRequest, NextResponse } from "next/server";
 import { QdrantIntelligentService } from "@/lib/qdrant-intelligent";
 import { supabase } from "@/lib/supabase";
 import { analyzeQuery } from "@/lib/agents/query-agent-client";
+import { endSpan, startSpan, traceparent } from "@/lib/tracing";
 
 export async function POST(req: NextRequest) {
+  // Continue the caller's trace (the main agent sends a traceparent header)
+  const span = startSpan('smart-search-route', req.headers.get('traceparent'));
+  let failure: unknown;
+
   try {
     const body = await req.json();
     console.log('[SmartSearch] Received request body:', JSON.stringify(body));
@@ -117,7 +122,9 @@ export async function POST(req: NextRequest) {
       keywords: s.tags || []
     }));
 
-    const queryIntent = await analyzeQuery(query, sponsorContexts);
+    const intentSpan = startSpan('query-understanding', span, { projects: sponsorContexts.length });
+    const queryIntent = await analyzeQuery(query, sponsorContexts, traceparent(intentSpan));
+    endSpan(intentSpan);
 
     console.log(`[SmartSearch] Query intent extracted:`);
     console.log(`  - Wants code: ${queryIntent.wants_code}`);
@@ -167,6 +174,7 @@ export async function POST(req: NextRequest) {
     console.log(`[SmartSearch] Searching collections:`, collectionNames);
 
     // Use new parallel search method
+    const qdrantSpan = startSpan('qdrant-search', span, { collections: collectionNames.length, limit });
     const allResults = await qdrantService.searchMultipleCollections(
       collectionNames,
       query,
@@ -175,6 +183,7 @@ export async function POST(req: NextRequest) {
         filter: Object.keys(qdrantFilters).length > 0 ? qdrantFilters : undefined
       }
     );
+    endSpan(qdrantSpan);
 
     // Enrich results with sponsor info
     const enrichedResults = allResults.map(r => {
@@ -189,6 +198,7 @@ export async function POST(req: NextRequest) {
     });
 
     console.log(`[SmartSearch] Found ${enrichedResults.length} results from ${relevantSponsors.length} sponsors`);
+    span.attrs.results = enrichedResults.length;
 
     // 7. Return results with metadata
     return NextResponse.json({
@@ -214,6 +224,7 @@ export async function POST(req: NextRequest) {
     }, { status: 200 });
 
   } catch (error) {
+    failure = error;
     console.error('[SmartSearch] Error:', error);
     return NextResponse.json(
       {
@@ -222,6 +233,8 @@ export async function POST(req: NextRequest) {
       },
       { status: 500 }
     );
+  } finally {
+    endSpan(span, failure);
   }
 }
 
@@ -8,7 +8,8 @@
  * Response: {
  *   hasDocumentation: boolean,
  *   hackathon?: { id, name, isActive },
- *   sources: { sponsors: number, projects: number }
+ *   sources: { sponsors: number, projects: number },
+ *   sponsorList: { id, name, documentCount, lastIndexedAt }[]
  * }
  */
 
@@ -85,6 +86,7 @@ export async function GET(req: NextRequest) {
           id: s.id,
           name: s.name,
           documentCount: s.document_count,
+          lastIndexedAt: s.last_indexed_at,
         })),
       },
       { status: 200 }
@@ -26,6 +26,7 @@ interface ProjectContext {
 interface QueryAnalysisRequest {
   query: string;
   available_projects: ProjectContext[];
+  traceparent?: string;
 }
 
 export interface QueryIntent {
@@ -43,11 +44,13 @@ export interface QueryIntent {
  *
  * @param query - User's search query
  * @param availableProjects - List of available projects with metadata
+ * @param traceparent - Trace context of the calling request (W3C traceparent)
  * @returns Query intent and filters
  */
 export async function analyzeQuery(
   query: string,
-  availableProjects: ProjectContext[] = []
+  availableProjects: ProjectContext[] = [],
+  traceparent?: string
 ): Promise<QueryIntent> {
   if (!QUERY_AGENT_URL) {
     throw new Error('QUERY_AGENT_URL environment variable not set. Please deploy the agent to Agentverse first.');
@@ -57,15 +60,18 @@ export async function analyzeQuery(
     console.log(`[QueryAgent] Analyzing query: "${query}"`);
     console.log(`[QueryAgent] Available projects: ${availableProjects.length}`);
 
+    // The agent's REST handlers don't see headers, so the trace context also travels in the body
     const request: QueryAnalysisRequest = {
       query,
-      available_projects: availableProjects
+      available_projects: availableProjects,
+      ...(traceparent ? { traceparent } : {})
     };
 
     const response = await fetch(QUERY_AGENT_URL, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        ...(traceparent ? { traceparent } : {}),
       },
       body: JSON.stringify(request)
     });
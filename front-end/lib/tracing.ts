@@ -0,0 +1,85 @@
+/**
+ * Request Tracing
+ *
+ * Continues the main agent's trace across the API routes. The trace context
+ * arrives as a W3C `traceparent` header; spans are logged and, when
+ * TRACE_COLLECTOR_URL is set, POSTed to the collector in the same format as
+ * the agents' spans (see agents/agents/main-agent/tracing.py).
+ */
+
+import { randomBytes } from 'crypto';
+
+const TRACE_COLLECTOR_URL = process.env.TRACE_COLLECTOR_URL || '';
+
+export interface Span {
+  traceId: string;
+  spanId: string;
+  parentId: string | null;
+  name: string;
+  start: number;
+  attrs: Record<string, unknown>;
+}
+
+/**
+ * Starts a span continuing the trace of `parent` (a traceparent value or a
+ * span of this request), or a new trace when there is none
+ */
+export function startSpan(
+  name: string,
+  parent?: string | Span | null,
+  attrs: Record<string, unknown> = {}
+): Span {
+  let traceId = randomBytes(16).toString('hex');
+  let parentId: string | null = null;
+
+  if (typeof parent === 'string') {
+    const parts = parent.trim().split('-');
+    if (parts.length === 4 && parts[1].length === 32 && parts[2].length === 16) {
+      traceId = parts[1];
+      parentId = parts[2];
+    }
+  } else if (parent) {
+    traceId = parent.traceId;
+    parentId = parent.spanId;
+  }
+
+  return { traceId, spanId: randomBytes(8).toString('hex'), parentId, name, start: Date.now(), attrs };
+}
+
+/**
+ * traceparent value handing this span to the next hop
+ */
+export function traceparent(span: Span): string {
+  return `00-${span.traceId}-${span.spanId}-01`;
+}
+
+/**
+ * Ends a span and exports it in the background (never throws or delays the caller)
+ */
+export function endSpan(span: Span, error?: unknown): void {
+  const ms = Date.now() - span.start;
+  const record: Record<string, unknown> = {
+    trace: span.traceId,
+    span: span.spanId,
+    parent: span.parentId,
+    service: 'next-api',
+    name: span.name,
+    start: span.start / 1000,
+    ms,
+    attrs: span.attrs,
+  };
+  if (error !== undefined) {
+    record.error = error instanceof Error ? `${error.name}: ${error.message}` : String(error);
+  }
+
+  console.log(`[Trace] ${span.traceId} ${span.name} ${ms}ms`);
+
+  if (!TRACE_COLLECTOR_URL) {
+    return;
+  }
+  fetch(TRACE_COLLECTOR_URL, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify([record]),
+  }).catch(err => console.warn('[Trace] Failed to export span:', err));
+}